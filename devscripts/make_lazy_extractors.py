@@ -16,7 +16,7 @@
 
 NO_ATTR = object()
 STATIC_CLASS_PROPERTIES = [
-    'IE_NAME', '_ENABLED', '_VALID_URL',  # Used for URL matching
+    'IE_NAME', '_ENABLED', '_VALID_URL', '_VALID_URL_LITERALS',  # Used for URL matching
     '_WORKING', 'IE_DESC', '_NETRC_MACHINE', 'SEARCH_KEY',  # Used for --extractor-descriptions
     'age_limit',  # Used for --age-limit (evaluated)
     '_RETURN_TYPE',  # Accessed in CLI only with instance (evaluated)
@@ -43,7 +43,7 @@ def main():
 
     import_extractors()
 
-    DummyInfoExtractor = type('InfoExtractor', (InfoExtractor,), {'IE_NAME': NO_ATTR})
+    DummyInfoExtractor = type('InfoExtractor', (InfoExtractor,), {'IE_NAME': NO_ATTR, '_VALID_URL_LITERALS': NO_ATTR})
     module_src = '\n'.join((
         MODULE_TEMPLATE,
         '    _module = None',
@@ -14,6 +14,8 @@
 import contextlib
 import copy
 import json
+import threading
+import time
 
 from test.helper import FakeYDL, assertRegexpMatches, try_rm
 from yt_dlp import YoutubeDL
@@ -21,8 +23,10 @@
 from yt_dlp.extractor.common import InfoExtractor
 from yt_dlp.postprocessor.common import PostProcessor
 from yt_dlp.utils import (
+    ExistingVideoReached,
     ExtractorError,
     LazyList,
+    MaxDownloadsReached,
     OnDemandPagedList,
     int_or_none,
     match_filter_func,
@@ -336,6 +340,52 @@ def test_format_selection_string_ops(self):
         ydl = YDL({'format': '[format_id!*=-]'})
         self.assertRaises(ExtractorError, ydl.process_ie_result, info_dict.copy())
 
+    def test_format_sort_compiled(self):
+        formats = []
+        for i, (f_id, info) in enumerate(YoutubeIE._formats.items()):
+            info = {**info, 'format_id': f_id, 'url': f'https://localhost/{f_id}'}
+            if 'acodec' in info and 'vcodec' not in info:
+                info['vcodec'] = 'none'
+            elif 'vcodec' in info and 'acodec' not in info:
+                info['acodec'] = 'none'
+            if i % 3:
+                info['filesize'] = i * 1_000_000
+                info['language_preference'] = i % 5
+            formats.append(info)
+
+        for format_sort in ([], ['res:720', '+size', 'vcodec:vp9', 'ext'], ['+br~500', 'hasaud', 'proto', 'lang', 'id'],
+                            ['quality', 'codec:avc:m4a', 'fps', 'channels', 'asr:44100', 'filesize_approx']):
+            for prefer_free_formats in (False, True):
+                ydl = YDL({'format_sort': format_sort, 'prefer_free_formats': prefer_free_formats})
+                sorter = ydl._get_format_sorter(['source', '+res'])
+                self.assertIs(ydl._get_format_sorter(['source', '+res']), sorter)
+                for fmt in formats:
+                    # The compiled fields must give the same results as the interpreted settings
+                    self.assertEqual(sorter.calculate_preference(fmt), tuple(
+                        sorter._calculate_field_preference(fmt, field) for field in sorter._order))
+
+    def test_format_selector_cached(self):
+        formats = [
+            {'format_id': 'A', 'ext': 'mp4', 'height': 1080, 'vcodec': 'avc1', 'acodec': 'none', 'url': TEST_URL},
+            {'format_id': 'B', 'ext': 'webm', 'height': 720, 'vcodec': 'vp9', 'acodec': 'none', 'url': TEST_URL},
+            {'format_id': 'C', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a', 'abr': 128, 'url': TEST_URL},
+            {'format_id': 'D', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 160, 'url': TEST_URL},
+            {'format_id': 'E', 'ext': 'mp4', 'height': 360, 'vcodec': 'avc1', 'acodec': 'mp4a', 'url': TEST_URL},
+        ]
+        ydl = YDL({'allow_multiple_audio_streams': True})
+        for format_spec in ('bv*[height<=720]+ba/b[height<=720]', 'bv[ext=mp4]+ba[ext=m4a]/b', 'B+C,D/E,all',
+                            'wv.2+(ba[abr>130]/ba)', '(mp4,webm)[height>300]', 'mergeall[vcodec=none]'):
+            selector = ydl.build_format_selector(format_spec)
+            self.assertIs(ydl.build_format_selector(format_spec), selector)
+            # The indexed formats must give the same results as filtering the formats every time
+            ctx = {'formats': formats, 'has_merged_format': True, 'incomplete_formats': False}
+            self.assertEqual(
+                ydl._select_formats(formats, selector), list(selector(ctx)), format_spec)
+
+        self.assertIsNot(ydl.build_format_selector('b'), YDL().build_format_selector('b'))
+        for _ in range(2):
+            self.assertRaises(SyntaxError, ydl.build_format_selector, 'bv+')
+
     def test_youtube_format_selection(self):
         # FIXME: Rewrite in accordance with the new format sorting options
         return
@@ -578,10 +628,17 @@ def test_format_filtering(self):
 
     @patch('yt_dlp.postprocessor.ffmpeg.FFmpegMergerPP.available', False)
     def test_default_format_spec_without_ffmpeg(self):
+        native_spec = 'bestvideo*[container=mp4_dash]+bestaudio[container=m4a_dash]/best'
         ydl = YDL({})
+        self.assertEqual(ydl._default_format_spec({}), native_spec)
+
+        ydl = YDL({'native_merge': True})
+        self.assertEqual(ydl._default_format_spec({}), native_spec)
+
+        ydl = YDL({'native_merge': False})
         self.assertEqual(ydl._default_format_spec({}), 'best/bestvideo+bestaudio')
 
-        ydl = YDL({'simulate': True})
+        ydl = YDL({'simulate': True, 'native_merge': False})
         self.assertEqual(ydl._default_format_spec({}), 'best/bestvideo+bestaudio')
 
         ydl = YDL({})
@@ -593,10 +650,27 @@ def test_default_format_spec_without_ffmpeg(self):
         ydl = YDL({'outtmpl': '-'})
         self.assertEqual(ydl._default_format_spec({}), 'best/bestvideo+bestaudio')
 
-        ydl = YDL({})
+        ydl = YDL({'native_merge': False})
         self.assertEqual(ydl._default_format_spec({}), 'best/bestvideo+bestaudio')
         self.assertEqual(ydl._default_format_spec({'is_live': True}), 'best/bestvideo+bestaudio')
 
+    @patch('yt_dlp.postprocessor.ffmpeg.FFmpegMergerPP.available', False)
+    def test_default_format_native_merge(self):
+        formats = [
+            {'format_id': 'best', 'url': TEST_URL, 'ext': 'mp4', 'height': 360},
+            {'format_id': 'video', 'url': TEST_URL, 'ext': 'mp4', 'height': 1080,
+             'acodec': 'none', 'container': 'mp4_dash'},
+            {'format_id': 'audio', 'url': TEST_URL, 'ext': 'm4a', 'vcodec': 'none', 'container': 'm4a_dash'},
+            {'format_id': 'webm', 'url': TEST_URL, 'ext': 'webm', 'height': 2160, 'acodec': 'none'},
+        ]
+        ydl = YDL({'format': None})
+        ydl.process_ie_result(_make_result(formats))
+        self.assertEqual(ydl.downloaded_info_dicts[0]['format_id'], 'video+audio')
+
+        ydl = YDL({'format': None, 'native_merge': False})
+        ydl.process_ie_result(_make_result(formats))
+        self.assertEqual(ydl.downloaded_info_dicts[0]['format_id'], 'best')
+
     @patch('yt_dlp.postprocessor.ffmpeg.FFmpegMergerPP.available', True)
     @patch('yt_dlp.postprocessor.ffmpeg.FFmpegMergerPP.can_merge', lambda _: True)
     def test_default_format_spec_with_ffmpeg(self):
@@ -951,6 +1025,25 @@ def gen():
         test('%(title3)s', ('foo/bar\\test', 'foo⧸bar⧹test'))
         test('folder/%(title3)s', ('folder/foo/bar\\test', f'folder{os.path.sep}foo⧸bar⧹test'))
 
+    def test_compile_outtmpl(self):
+        tmpl = '100%% %(title)s %d %(id,display_id|x)s%(duration-1>%H)s'
+        compiled = YoutubeDL._compile_outtmpl(tmpl)
+        self.assertIs(YoutubeDL._compile_outtmpl(tmpl), compiled)
+        self.assertEqual(len(compiled), 5)
+        self.assertEqual(compiled[0], '100%% ')
+        self.assertEqual(compiled[2], ' %d ')
+        self.assertEqual(compiled[1].alternatives[0].path, ['title'])
+        self.assertEqual([(a.fields, a.default, a.alternate) for a in compiled[3].alternatives],
+                         [('id', 'x', True), ('display_id', 'x', False)])
+        self.assertEqual(compiled[4].alternatives[0].maths, [(float.__sub__, 1, 1.0, None)])
+        self.assertEqual(YoutubeDL._compile_outtmpl('foo.bar'), ('foo.bar',))
+
+        # The compiled template must not depend on the info dict it was first used with
+        ydl = YDL()
+        for info in ({'title': 'a', 'id': '1', 'duration': 3601}, {'title': 'b', 'display_id': '2'}):
+            self.assertEqual(ydl.evaluate_outtmpl(tmpl, info), '100% {} %d {}{}'.format(
+                info['title'], info.get('id', info.get('display_id')), '01' if 'duration' in info else 'NA'))
+
     def test_format_note(self):
         ydl = YoutubeDL()
         self.assertEqual(ydl._format_note({}), '')
@@ -1137,16 +1230,19 @@ def test_selection(params, expected_ids, evaluate_all=False):
                 pagedlist_eval = INDICES[PAGE_SIZE * page_num(min(expected_ids)) - PAGE_SIZE:
                                          PAGE_SIZE * page_num(max(expected_ids))]
 
-            for name, func, expected_eval in (
-                ('list', list_entries, INDICES),
-                ('Generator', generator_entries, generator_eval),
+            for name, func, expected_eval, extra_params in (
+                ('list', list_entries, INDICES, {}),
+                ('Generator', generator_entries, generator_eval, {}),
                 # ('LazyList', lazylist_entries, generator_eval),  # Generator and LazyList follow the exact same code path
-                ('PagedList', pagedlist_entries, pagedlist_eval),
+                ('PagedList', pagedlist_entries, pagedlist_eval, {}),
+                ('lazy Generator', generator_entries, generator_eval, {'lazy_playlist': True, 'extract_flat': 'discard'}),
             ):
+                if extra_params.get('lazy_playlist') and params.get('playlistreverse'):
+                    continue
                 evaluated = []
                 entries = func(evaluated)
                 results = [(v['playlist_autonumber'] - 1, (int(v['id']), v['playlist_index']))
-                           for v in get_downloaded_info_dicts(params, entries)]
+                           for v in get_downloaded_info_dicts({**params, **extra_params}, entries)]
                 self.assertEqual(results, list(enumerate(zip(expected_ids, expected_ids))), f'Entries of {name} for {params}')
                 self.assertEqual(sorted(evaluated), expected_eval, f'Evaluation of {name} for {params}')
 
@@ -1456,6 +1552,69 @@ def close_hook_two():
         self.assertTrue(close_hook_called, 'Close hook was not called')
         self.assertTrue(close_hook_two_called, 'Close hook two was not called')
 
+    def test_concurrent_downloads(self):
+        class _YDL(YoutubeDL):
+            def to_screen(self, *args, **kwargs):
+                pass
+
+            def to_stdout(self, message, *args, **kwargs):
+                filenames.append(message)
+
+        class SleepIE(InfoExtractor):
+            _VALID_URL = r'sleep:(?P<id>\d+)'
+
+            def _real_extract(self, url):
+                nonlocal running, max_running
+                video_id = self._match_id(url)
+                with lock:
+                    running += 1
+                    max_running = max(max_running, running)
+                time.sleep(0.1)
+                with lock:
+                    running -= 1
+                return {'id': video_id, 'title': video_id, 'url': TEST_URL, 'ext': 'mp4'}
+
+        def run(urls, **params):
+            nonlocal ydl, filenames, max_running
+            filenames, max_running = [], 0
+            ydl = _YDL({
+                'simulate': True,
+                'force_write_download_archive': True,
+                'download_archive': set(),
+                'outtmpl': {'default': '%(autonumber)s.%(ext)s'},
+                'forcefilename': True,
+                'concurrent_downloads': 4,
+                **params,
+            }, auto_init=False)
+            ydl.add_info_extractor(SleepIE())
+            try:
+                ydl.download(urls)
+            finally:
+                ydl.close()
+            return ydl
+
+        ydl, filenames, lock, running, max_running = None, [], threading.Lock(), 0, 0
+        urls = [f'sleep:{i}' for i in range(8)]
+        run(urls)
+        self.assertGreater(max_running, 1)
+        self.assertLessEqual(max_running, 4)
+        self.assertEqual(ydl._num_downloads, 8)
+        self.assertEqual(ydl.archive, {f'sleep {i}' for i in range(8)})
+        # Every download gets its own number
+        self.assertEqual(sorted(filenames), sorted(f'{i:05d}.mp4' for i in range(1, 9)))
+
+        with self.assertRaises(MaxDownloadsReached):
+            run(urls, max_downloads=3)
+        self.assertEqual(len(ydl.archive), 3)
+
+        # The downloads of one URL do not count towards the others
+        run(urls, max_downloads=1, break_per_url=True)
+        self.assertEqual(len(ydl.archive), 8)
+        self.assertEqual(filenames, ['00001.mp4'] * 8)
+
+        with self.assertRaises(ExistingVideoReached):
+            run(urls, download_archive={'sleep 0'}, break_on_existing=True)
+        self.assertNotIn('sleep 7', ydl.archive)
 
 if __name__ == '__main__':
     unittest.main()
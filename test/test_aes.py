@@ -9,6 +9,7 @@
 
 
 import base64
+import time
 
 from yt_dlp.aes import (
     aes_cbc_decrypt,
@@ -139,6 +140,37 @@ def test_key_expansion(self):
             0xE8, 0xA6, 0xC1, 0xE9, 0xC0, 0x4C, 0xE3, 0xF9, 0xE9, 0x3C, 0x9C, 0x3A, 0xD9, 0x58, 0x54, 0xF3,
             0xB4, 0x86, 0xCC, 0xDC, 0x74, 0xCA, 0x2F, 0x25, 0x9D, 0xF6, 0xB3, 0x1F, 0x44, 0xAE, 0xE7, 0xEC])
 
+    def test_fips_197_vectors(self):
+        # FIPS-197, Appendix C
+        plaintext = list(bytes.fromhex('00112233445566778899aabbccddeeff'))
+        for key, ciphertext in (
+            ('000102030405060708090a0b0c0d0e0f', '69c4e0d86a7b0430d8cdb78070b4c55a'),
+            ('000102030405060708090a0b0c0d0e0f1011121314151617', 'dda97ca4864cdfe06eaf70a0ec0d7191'),
+            ('000102030405060708090a0b0c0d0e0f101112131415161718191a1b1c1d1e1f', '8ea2b7ca516745bfeafc49904b496089'),
+        ):
+            expanded_key = key_expansion(list(bytes.fromhex(key)))
+            self.assertEqual(bytes(aes_encrypt(plaintext, expanded_key)).hex(), ciphertext)
+            self.assertEqual(aes_decrypt(list(bytes.fromhex(ciphertext)), expanded_key), plaintext)
+
+    def test_bulk_decrypt(self):
+        data = bytes(range(256)) * 512
+        for key in (self.key, self.key + [1] * 8, self.key * 2):
+            encrypted = aes_cbc_encrypt(list(data), key, self.iv)
+            self.assertEqual(bytes(aes_cbc_decrypt(encrypted, key, self.iv)), data)
+            self.assertEqual(aes_cbc_decrypt_bytes(bytes(encrypted), bytes(key), bytes(self.iv)), data)
+            encrypted = aes_ctr_encrypt(list(data), key, [0xFF] * 16)
+            self.assertEqual(bytes(aes_ctr_decrypt(encrypted, key, [0xFF] * 16)), data)
+
+    @unittest.skipUnless(os.environ.get('YT_DLP_BENCHMARK'), 'set YT_DLP_BENCHMARK to run the benchmark')
+    def test_decrypt_benchmark(self):
+        # The native implementation is used for HLS fragments when pycryptodome is not installed
+        data = list(bytes(128 * 1024))
+        for name, func in (('CBC', aes_cbc_decrypt), ('CTR', aes_ctr_decrypt)):
+            start = time.perf_counter()
+            func(data, self.key, self.iv)
+            elapsed = time.perf_counter() - start
+            print(f'AES-{name} decryption: {len(data) / 1024 / elapsed:.1f} KiB/s', file=sys.stderr)
+
     def test_pad_block(self):
         block = [0x21, 0xA0, 0x43, 0xFF]
 
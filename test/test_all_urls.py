@@ -12,6 +12,7 @@
 
 from test.helper import gettestcases
 from yt_dlp.extractor import FacebookIE, YoutubeIE, gen_extractors
+from yt_dlp.extractor._urlindex import URLIndex, valid_url_literals
 
 
 class TestAllURLsMatching(unittest.TestCase):
@@ -82,6 +83,32 @@ def test_no_duplicates(self):
                         ie.suitable(url),
                         f'{type(ie).__name__} should not match URL {url!r} . That URL belongs to {tc["name"]}.')
 
+    def test_url_index(self):
+        ies = {ie.ie_key(): ie for ie in self.ies}
+        index = URLIndex(ies)
+        for tc in gettestcases(include_onlymatching=True):
+            url = tc['url']
+            candidates = index.candidates(url)
+            self.assertIn(tc['name'], candidates, f'{tc["name"]} should be a candidate for URL {url!r}')
+            self.assertEqual(candidates[-1], 'Generic')
+
+        self.assertLess(len(index.candidates('https://www.youtube.com/watch?v=BaW_jenozKc')), 100)
+        self.assertEqual(len(index.candidates('https://ünicode.example/')), len(ies))
+
+    def test_valid_url_literals(self):
+        self.assertEqual(valid_url_literals(False), ())
+        self.assertIsNone(valid_url_literals(None))
+        self.assertIsNone(valid_url_literals(r'.*'))
+        self.assertIsNone(valid_url_literals(r'(?:https?|ftp)://(?P<id>\d+)'))
+        self.assertEqual(valid_url_literals(r'https?://(?:www\.)?Example\.com/(?P<id>\d+)'), ('example.com/',))
+        self.assertEqual(valid_url_literals(r'(?i)https?://(?:foo|bar)\.example\.com/\d+'), ('.example.com/',))
+        self.assertEqual(
+            valid_url_literals(r'https?://(?:www\.)?(?:example|another)\.(?:com|net)/v/\d+'),
+            ('another', 'example'))
+        self.assertEqual(
+            valid_url_literals((r'https?://example\.com/\d+', r'sample:(?P<id>\w+)')), ('://example.com/', 'sample:'))
+        self.assertIsNone(valid_url_literals((r'https?://example\.com/\d+', r'(?P<id>\w+)')))
+
     def test_keywords(self):
         self.assertMatch(':ytsubs', ['youtube:subscriptions'])
         self.assertMatch(':ytsubscriptions', ['youtube:subscriptions'])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import shutil
+import subprocess
+
+from test.helper import FakeYDL
+from yt_dlp.archive import SQLiteArchive
+from yt_dlp.dependencies import sqlite3
+
+
+def _mkdir(d):
+    if not os.path.exists(d):
+        os.mkdir(d)
+
+
+@unittest.skipUnless(sqlite3, 'sqlite3 is not available')
+class TestSQLiteArchive(unittest.TestCase):
+    def setUp(self):
+        TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+        TESTDATA_DIR = os.path.join(TEST_DIR, 'testdata')
+        _mkdir(TESTDATA_DIR)
+        self.test_dir = os.path.join(TESTDATA_DIR, 'archive_test')
+        self.tearDown()
+        os.mkdir(self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_archive(self):
+        fn = os.path.join(self.test_dir, 'archive.sqlite')
+        with SQLiteArchive(fn) as archive:
+            self.assertFalse(archive)
+            self.assertNotIn('youtube abc', archive)
+            archive.add('youtube abc')
+            archive.add('youtube abc')
+            self.assertIn('youtube abc', archive)
+            self.assertEqual(archive.update(['vimeo 123', 'youtube abc']), 1)
+            self.assertTrue(archive)
+            self.assertEqual(len(archive), 2)
+            self.assertEqual(set(archive), {'youtube abc', 'vimeo 123'})
+
+        with SQLiteArchive(fn) as archive:
+            self.assertIn('vimeo 123', archive)
+            self.assertEqual(len(archive), 2)
+
+    def test_import_text(self):
+        text_fn = os.path.join(self.test_dir, 'archive.txt')
+        with open(text_fn, 'w', encoding='utf-8') as f:
+            f.write('youtube abc\nvimeo 123\n\nyoutube abc\n')
+        with SQLiteArchive(os.path.join(self.test_dir, 'archive.db')) as archive:
+            self.assertEqual(archive.import_text(text_fn), 2)
+            self.assertEqual(archive.import_text(text_fn), 0)
+            self.assertEqual(set(archive), {'youtube abc', 'vimeo 123'})
+
+    def test_concurrent_processes(self):
+        fn = os.path.join(self.test_dir, 'archive.sqlite')
+        script = (
+            'import sys; from yt_dlp.archive import SQLiteArchive\n'
+            'with SQLiteArchive(sys.argv[1]) as archive:\n'
+            '    print("youtube abc" in archive)\n'
+            '    archive.add("vimeo 123")\n')
+        with SQLiteArchive(fn) as archive:
+            archive.add('youtube abc')
+            # The other process sees the entry and can add its own while the archive is open here
+            output = subprocess.check_output(
+                [sys.executable, '-c', script, fn], timeout=20, text=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            self.assertEqual(output.strip(), 'True')
+            self.assertIn('vimeo 123', archive)
+            archive.add('youtube def')
+
+    def test_sqlite_path(self):
+        fn = os.path.join(self.test_dir, 'archive.db')
+        self.assertEqual(SQLiteArchive.sqlite_path(f'sqlite:{fn}'), fn)
+        self.assertIsNone(SQLiteArchive.sqlite_path(fn))
+        self.assertIsNone(SQLiteArchive.sqlite_path({'youtube abc'}))
+
+    def test_ydl_archive(self):
+        fn = os.path.join(self.test_dir, 'archive.sqlite3')
+        info = {'id': 'abc', 'extractor_key': 'Youtube', '_old_archive_ids': ['youtube old']}
+        # SQLite is only used when it is asked for
+        with FakeYDL({'download_archive': fn}) as ydl:
+            self.assertIsInstance(ydl.archive, set)
+        fn = f'sqlite:{fn}'
+        with FakeYDL({'download_archive': fn}) as ydl:
+            self.assertIsInstance(ydl.archive, SQLiteArchive)
+            self.assertFalse(ydl.in_download_archive(info))
+            ydl.record_download_archive(info)
+            self.assertTrue(ydl.in_download_archive(info))
+
+        with FakeYDL({'download_archive': fn}) as ydl:
+            self.assertTrue(ydl.in_download_archive({'id': 'abc', 'ie_key': 'Youtube'}))
+            self.assertFalse(ydl.in_download_archive({'id': 'old', 'ie_key': 'Youtube'}))
+            ydl.archive.add('youtube old')
+            self.assertTrue(ydl.in_download_archive({'id': 'new', 'ie_key': 'Youtube', '_old_archive_ids': ['youtube old']}))
+
+    def test_ydl_import_archive(self):
+        text_fn = os.path.join(self.test_dir, 'archive.txt')
+        with open(text_fn, 'w', encoding='utf-8') as f:
+            f.write('youtube abc\nvimeo 123\n')
+        fn = f'sqlite:{os.path.join(self.test_dir, "archive.db")}'
+        with FakeYDL({'download_archive': fn, 'import_download_archive': text_fn}) as ydl:
+            self.assertTrue(ydl.in_download_archive({'id': 'abc', 'ie_key': 'Youtube'}))
+            self.assertTrue(ydl.in_download_archive({'id': '123', 'ie_key': 'Vimeo'}))
+            self.assertEqual(len(ydl.archive), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,10 +8,12 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+import itertools
 import shutil
 
 from test.helper import FakeYDL
-from yt_dlp.cache import Cache
+from yt_dlp.cache import Cache, MemoryCacheBackend
+from yt_dlp.dependencies import sqlite3
 
 
 def _is_empty(d):
@@ -52,6 +54,94 @@ def test_cache(self):
         self.assertFalse(os.path.exists(self.test_dir))
         self.assertEqual(c.load('test_cache', 'k.'), None)
 
+    def test_cache_memory_layer(self):
+        backend = MemoryCacheBackend()
+        c = Cache(FakeYDL({'cachedir': backend}))
+        self.assertEqual(c.load('test_cache', 'k'), None)
+        backend.store('test_cache', 'k', '{"yt-dlp_version": "2024.01.01", "data": 1}')
+        # Misses are remembered until they expire
+        self.assertEqual(c.load('test_cache', 'k'), None)
+        c._memory.clear()
+        self.assertEqual(c.load('test_cache', 'k'), 1)
+
+        c.store('test_cache', 'k', {'x': [1]})
+        backend.remove(FakeYDL())
+        obj = c.load('test_cache', 'k')
+        self.assertEqual(obj, {'x': [1]})
+        obj['x'].append(2)
+        self.assertEqual(c.load('test_cache', 'k'), {'x': [1]})
+        self.assertEqual(c.load('test_cache', 'k', min_ver='9999.01.01'), None)
+
+        c.MEMORY_TTL = -1
+        c.store('test_cache', 'k', 1)
+        backend.remove(FakeYDL())
+        self.assertEqual(c.load('test_cache', 'k'), None)
+
+        c.MEMORY_TTL, c.MEMORY_SIZE = 60, 2
+        for key in 'abc':
+            c.store('test_cache', key, key)
+        self.assertEqual(list(c._memory), [('test_cache', 'b'), ('test_cache', 'c')])
+
+    def check_eviction(self, c, stored=lambda section, key: None):
+        def store(section, key, data, **kwargs):
+            c.store(section, key, data, **kwargs)
+            stored(section, key)
+
+        for key in 'abc':
+            store('test_cache', key, key, max_entries=2)
+            store('test_cache2', key, key)
+        c._memory.clear()
+        self.assertEqual([c.load('test_cache', key) for key in 'abc'], [None, 'b', 'c'])
+        self.assertEqual([c.load('test_cache2', key) for key in 'abc'], ['a', 'b', 'c'])
+
+        # Storing an entry again makes it the most recent one
+        store('test_cache', 'b', 'b2')
+        store('test_cache', 'd', 'd', max_entries=2)
+        c._memory.clear()
+        self.assertEqual([c.load('test_cache', key) for key in 'bcd'], ['b2', None, 'd'])
+
+    def test_cache_eviction(self):
+        self.check_eviction(Cache(FakeYDL({'cachedir': MemoryCacheBackend()})))
+
+        # The file system orders the entries by modification time, which may be too coarse to tell them apart
+        def set_mtime(section, key):
+            mtime = next(mtimes)
+            os.utime(c.backend._get_cache_fn(section, key), ns=(mtime, mtime))
+
+        mtimes = itertools.count(10 ** 18, 10 ** 9)
+        c = Cache(FakeYDL({'cachedir': self.test_dir}))
+        self.check_eviction(c, set_mtime)
+        c.store('test_cache', 'e', 'e', max_entries=0)
+        self.assertEqual(os.listdir(os.path.join(self.test_dir, 'test_cache')), [])
+
+    @unittest.skipUnless(sqlite3, 'sqlite3 is not available')
+    def test_cache_sqlite(self):
+        fn = os.path.join(self.test_dir, 'cache.sqlite')
+        obj = {'x': 1, 'y': ['ä', '\\a', True]}
+        c = Cache(FakeYDL({'cachedir': fn}))
+        self.assertEqual(c.load('test_cache', 'k.'), None)
+        c.store('test_cache', 'k.', obj)
+        self.assertTrue(os.path.exists(fn))
+
+        c2 = Cache(FakeYDL({'cachedir': fn}))
+        self.assertEqual(c2.load('test_cache', 'k.'), obj)
+        self.assertEqual(c2.load('test_cache2', 'k.'), None)
+        c2.remove()
+        self.assertEqual(Cache(FakeYDL({'cachedir': fn})).load('test_cache', 'k.'), None)
+
+        self.check_eviction(c2)
+
+        # The order of storage is added to databases created by older versions
+        fn = os.path.join(self.test_dir, 'old.sqlite')
+        with sqlite3.connect(fn) as conn:
+            conn.execute('''CREATE TABLE cache (
+                section TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL,
+                PRIMARY KEY (section, key)) WITHOUT ROWID''')
+        conn.close()
+        c = Cache(FakeYDL({'cachedir': fn}))
+        c.store('test_cache', 'k', 1, max_entries=1)
+        self.assertEqual(c.load('test_cache', 'k'), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import concurrent.futures
+import http.server
+import io
+import threading
+
+from test.helper import http_server_port, try_rm
+from yt_dlp import YoutubeDL
+from yt_dlp.aes import aes_cbc_encrypt_bytes
+from yt_dlp.downloader import get_suitable_downloader
+from yt_dlp.downloader.dash import DashSegmentsFD
+from yt_dlp.downloader.fragment import FragmentFD, HttpQuietDownloader
+from yt_dlp.downloader.hls import HlsFD
+from yt_dlp.downloader.ism import box, full_box, u32, u64, write_piff_header
+from yt_dlp.postprocessor.mp4merger import merge_fragmented_mp4
+from yt_dlp.utils._utils import _YDLLogger as FakeLogger
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FRAGMENT_COUNT = 5
+FRAGMENT_SIZE = 1000
+FRAGMENTS = [bytes([i]) * FRAGMENT_SIZE for i in range(FRAGMENT_COUNT)]
+KEY = IV = b'\x20\x15' + 14 * b'\x00'
+
+
+def make_manifest(encrypted=False):
+    lines = ['#EXTM3U', '#EXT-X-TARGETDURATION:10', '#EXT-X-MEDIA-SEQUENCE:0']
+    if encrypted:
+        lines.append(f'#EXT-X-KEY:METHOD=AES-128,URI="/key",IV=0x{IV.hex()}')
+    for i in range(FRAGMENT_COUNT):
+        lines.extend(('#EXTINF:10.0,', f'/{"enc" if encrypted else "frag"}{i}.ts'))
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines)
+
+
+def make_dash_segments(stream_type, timescale):
+    """ The init segment and FRAGMENT_COUNT media segments of a fragmented MP4 track """
+    init_segment = io.BytesIO()
+    write_piff_header(init_segment, {
+        'track_id': 1, 'fourcc': 'AACL' if stream_type == 'audio' else 'TTML', 'duration': 0,
+        'timescale': timescale, 'sampling_rate': 48000, 'stream_type': stream_type,
+    })
+    segments = [init_segment.getvalue()]
+    for i, fragment in enumerate(FRAGMENTS):
+        traf = (full_box(b'tfhd', 0, 0x20000, u32.pack(1))  # default-base-is-moof
+                + full_box(b'tfdt', 1, 0, u64.pack(i * timescale)))
+        segments.append(box(b'moof', full_box(b'mfhd', 0, 0, u32.pack(i + 1)) + box(b'traf', traf))
+                        + box(b'mdat', stream_type.encode() + fragment))
+    return segments
+
+
+DASH_SEGMENTS = {'audio': make_dash_segments('audio', 48000), 'text': make_dash_segments('text', 1000)}
+
+
+class HTTPTestRequestHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def serve(self, content):
+        self.send_response(200)
+        self.send_header('Content-Length', len(content))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        if self.path == '/live.m3u8':
+            # Every reload of the playlist moves the window of 2 fragments by one
+            start = self.server.live_reloads = getattr(self.server, 'live_reloads', -1) + 1
+            lines = ['#EXTM3U', '#EXT-X-TARGETDURATION:0.1', f'#EXT-X-MEDIA-SEQUENCE:{start}']
+            for i in range(start, min(start + 2, FRAGMENT_COUNT)):
+                lines.extend(('#EXTINF:0.1,', f'/frag{i}.ts'))
+            if start + 2 >= FRAGMENT_COUNT:
+                lines.append('#EXT-X-ENDLIST')
+            self.serve('\n'.join(lines).encode())
+        elif self.path.startswith('/dash/'):
+            stream_type, index = self.path[6:-4].split('-')
+            self.serve(DASH_SEGMENTS[stream_type][int(index)])
+        elif self.path == '/key':
+            self.serve(KEY)
+        elif self.path.startswith('/frag'):
+            self.serve(FRAGMENTS[int(self.path[5:-3])])
+        elif self.path.startswith('/enc'):
+            self.serve(aes_cbc_encrypt_bytes(FRAGMENTS[int(self.path[4:-3])], KEY, IV))
+        else:
+            assert False
+
+
+class TestFragmentFD(unittest.TestCase):
+    def setUp(self):
+        self.httpd = http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), HTTPTestRequestHandler)
+        self.port = http_server_port(self.httpd)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def test_download_fragment(self):
+        filename = os.path.join(TEST_DIR, 'testfile.ts-Frag0')
+        url = f'http://127.0.0.1:{self.port}/frag1.ts'
+        params = {'logger': FakeLogger(), 'noprogress': True}
+        downloader = HttpQuietDownloader(YoutubeDL(params), params)
+
+        for max_memory, in_memory in ((FRAGMENT_SIZE, True), (FRAGMENT_SIZE - 1, False), (0, False)):
+            try_rm(filename)
+            success, content = downloader.download_fragment(filename, {'url': url}, max_memory)
+            self.assertTrue(success)
+            if in_memory:
+                self.assertEqual(content, FRAGMENTS[1])
+                self.assertFalse(os.path.exists(filename))
+                self.assertFalse(os.path.exists(f'{filename}.part'))
+            else:
+                self.assertIsNone(content)
+                with open(filename, 'rb') as f:
+                    self.assertEqual(f.read(), FRAGMENTS[1])
+        try_rm(filename)
+
+    def download_hls(self, params, encrypted=False, progress_hook=None):
+        params['logger'] = FakeLogger()
+        filename = os.path.join(TEST_DIR, 'testfile.mp4')
+        try_rm(filename)
+        downloader = HlsFD(YoutubeDL(params), params)
+        if progress_hook:
+            downloader.add_progress_hook(progress_hook)
+        self.assertTrue(downloader.real_download(filename, {
+            'url': f'http://127.0.0.1:{self.port}/index.m3u8',
+            'hls_media_playlist_data': make_manifest(encrypted),
+            'ext': 'mp4',
+        }))
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), b''.join(FRAGMENTS), params)
+        self.assertEqual([fn for fn in os.listdir(TEST_DIR) if fn.startswith('testfile.')], ['testfile.mp4'])
+        try_rm(filename)
+
+    def test_hls(self):
+        for memory_limit in (None, 0, FRAGMENT_SIZE // 2):
+            for concurrent_fragments in (1, 3):
+                for encrypted in (False, True):
+                    self.download_hls({
+                        'fragment_memory_limit': memory_limit,
+                        'concurrent_fragment_downloads': concurrent_fragments,
+                    }, encrypted)
+
+    def test_hls_async(self):
+        progress = []
+        for encrypted in (False, True):
+            self.download_hls(
+                {'concurrent_fragment_downloads': 3, 'async_fragment_downloads': True}, encrypted,
+                lambda s: progress.append((s['status'], s.get('fragment_index'))))
+            # The progress of every fragment is reported once it is complete
+            self.assertEqual(progress[-FRAGMENT_COUNT - 1:], [
+                *(('downloading', i) for i in range(1, FRAGMENT_COUNT + 1)), ('finished', None)])
+
+    def test_hls_live(self):
+        for concurrent_fragments in (1, 3):
+            self.httpd.live_reloads = -1
+            filename = os.path.join(TEST_DIR, 'testfile.mp4')
+            try_rm(filename)
+            params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': concurrent_fragments}
+            downloader = HlsFD(YoutubeDL(params), params)
+            self.assertTrue(downloader.real_download(filename, {
+                'url': f'http://127.0.0.1:{self.port}/live.m3u8',
+                'ext': 'mp4',
+                'is_live': True,
+            }))
+            # The fragments that are repeated in the reloaded playlists are only downloaded once
+            with open(filename, 'rb') as f:
+                self.assertEqual(f.read(), b''.join(FRAGMENTS))
+            self.assertEqual(self.httpd.live_reloads, FRAGMENT_COUNT - 2)
+            try_rm(filename)
+
+    def test_dash_merge_during_download(self):
+        filename = os.path.join(TEST_DIR, 'testfile.mp4')
+        expected_filenames = [os.path.join(TEST_DIR, f'testfile.{stream_type}.mp4') for stream_type in DASH_SEGMENTS]
+        for name, segments in zip(expected_filenames, DASH_SEGMENTS.values()):
+            with open(name, 'wb') as f:
+                f.write(b''.join(segments))
+        try:
+            merge_fragmented_mp4(expected_filenames, filename)
+            with open(filename, 'rb') as f:
+                expected = f.read()
+        finally:
+            for name in (*expected_filenames, filename):
+                try_rm(name)
+
+        formats = [{
+            'format_id': stream_type,
+            'url': f'http://127.0.0.1:{self.port}/manifest.mpd',
+            'protocol': 'http_dash_segments',
+            'ext': 'mp4',
+            'container': 'mp4_dash',
+            'fragments': [
+                {'url': f'http://127.0.0.1:{self.port}/dash/{stream_type}-{i}.m4s'} for i in range(len(segments))],
+        } for stream_type, segments in DASH_SEGMENTS.items()]
+        info_dict = {
+            'url': '\n'.join(fmt['url'] for fmt in formats),
+            'ext': 'mp4',
+            'protocol': 'http_dash_segments+http_dash_segments',
+            'requested_formats': formats,
+        }
+        for concurrent_fragments in (1, 4):
+            params = {
+                'logger': FakeLogger(),
+                'merge_during_download': True,
+                'concurrent_fragment_downloads': concurrent_fragments,
+            }
+            self.assertIsNone(get_suitable_downloader(info_dict, {}))
+            self.assertEqual(get_suitable_downloader(info_dict, params), DashSegmentsFD)
+            downloader = DashSegmentsFD(YoutubeDL(params), params)
+            finished = []
+            downloader.add_progress_hook(
+                lambda d: d['status'] == 'finished' and finished.append(d['filename']))
+            self.assertTrue(downloader.real_download(filename, info_dict))
+            self.assertEqual(finished, [filename])
+            # The formats are only written to the merged file
+            self.assertEqual([fn for fn in os.listdir(TEST_DIR) if fn.startswith('testfile.')], ['testfile.mp4'])
+            with open(filename, 'rb') as f:
+                self.assertEqual(f.read(), expected)
+            try_rm(filename)
+
+    def test_reorder_limit(self):
+        def download(fragment):
+            started.append(fragment)
+            if fragment == 0:
+                head_done.wait(5)
+            return {'fragment_content': b'#' * FRAGMENT_SIZE}
+
+        # Only the fragments that were started before one was finished can be running
+        for limit, expected in ((FRAGMENT_SIZE, 3), (None, 10)):
+            started, head_done = [], threading.Event()
+            params = {'logger': FakeLogger(), 'fragment_reorder_limit': limit}
+            fd = FragmentFD(YoutubeDL(params), params)
+            with concurrent.futures.ThreadPoolExecutor(3) as pool:
+                results = fd._map_fragments(pool, download, range(10), 3)
+                threading.Timer(0.5, head_done.set).start()
+                self.assertEqual(next(results)[0], 0)
+                self.assertLessEqual(len(started), expected, limit)
+                self.assertGreater(len(started), expected - 2, limit)
+                self.assertEqual([fragment for fragment, _ in results], list(range(1, 10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
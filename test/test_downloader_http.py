@@ -8,19 +8,24 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+import concurrent.futures
 import http.server
+import json
 import re
 import threading
+import time
+import unittest.mock
 
 from test.helper import http_server_port, try_rm
 from yt_dlp import YoutubeDL
-from yt_dlp.downloader.http import HttpFD
+from yt_dlp.downloader.http import HttpFD, _ReadBuffer
 from yt_dlp.utils._utils import _YDLLogger as FakeLogger
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 TEST_SIZE = 10 * 1024
+SEGMENTED_CONTENT = bytes(range(256)) * 4099
 
 
 class HTTPTestRequestHandler(http.server.BaseHTTPRequestHandler):
@@ -54,8 +59,40 @@ def serve(self, range=True, content_length=True):
         self.end_headers()
         self.wfile.write(b'#' * size)
 
+    def serve_segmented(self):
+        start, end = 0, len(SEGMENTED_CONTENT) - 1
+        mobj = re.search(r'^bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+        if mobj:
+            start, end = int(mobj.group(1)), min(int(mobj.group(2) or end), end)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(SEGMENTED_CONTENT)}')
+        else:
+            self.send_response(200)
+        self.server.requested_ranges.append((start, end + 1))
+        self.send_header('Content-Length', end - start + 1)
+        self.end_headers()
+        try:
+            # Slowly, so that the other connections have the time to take over parts of the range
+            for pos in range(start, end + 1, 64 * 1024):
+                self.wfile.write(SEGMENTED_CONTENT[pos:min(pos + 64 * 1024, end + 1)])
+                time.sleep(0.005)
+        except ConnectionError:
+            pass  # The client stops reading once another connection takes over the end of its range
+
+    def serve_large(self):
+        self.send_response(200)
+        content = memoryview(self.server.large_content)
+        self.send_header('Content-Length', len(content))
+        self.end_headers()
+        for pos in range(0, len(content), 1024 * 1024):
+            self.wfile.write(content[pos:pos + 1024 * 1024])
+
     def do_GET(self):
-        if self.path == '/regular':
+        if self.path == '/segmented':
+            self.serve_segmented()
+        elif self.path == '/large':
+            self.serve_large()
+        elif self.path == '/regular':
             self.serve()
         elif self.path == '/no-content-length':
             self.serve(content_length=False)
@@ -71,6 +108,7 @@ class TestHttpFD(unittest.TestCase):
     def setUp(self):
         self.httpd = http.server.HTTPServer(
             ('127.0.0.1', 0), HTTPTestRequestHandler)
+        self.httpd.requested_ranges = []
         self.port = http_server_port(self.httpd)
         self.server_thread = threading.Thread(target=self.httpd.serve_forever)
         self.server_thread.daemon = True
@@ -100,6 +138,89 @@ def test_chunked(self):
             'http_chunk_size': 1000,
         })
 
+    def test_shared_ratelimit(self):
+        def download(filename):
+            params = {'logger': FakeLogger(), 'shared_ratelimit': {'total': TEST_SIZE}}
+            downloader = HttpFD(YoutubeDL(params), params)
+            try:
+                return downloader.real_download(filename, {'url': f'http://127.0.0.1:{self.port}/regular'})
+            finally:
+                try_rm(filename)
+
+        # The limit is shared by the instances, so the second half of the data has to wait
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            self.assertTrue(all(pool.map(download, ('testfile1.mp4', 'testfile2.mp4'))))
+        self.assertGreater(time.perf_counter() - start, 0.8)
+
+    def test_large_download(self):
+        # The download loop must read into a buffer that is reused across blocks
+        content = self.httpd.large_content = bytes(range(256)) * (32 * 1024)
+        buffers, block_sizes, sizes = [], set(), []
+        read = _ReadBuffer.read
+
+        def recording_read(buffer, response, size):
+            view = read(buffer, response, size)
+            if not any(view.obj is b for b in buffers):
+                buffers.append(view.obj)
+            block_sizes.add(size)
+            sizes.append(len(view))
+            return view
+
+        filename = 'testfile.mp4'
+        params = {'logger': FakeLogger()}
+        downloader = HttpFD(YoutubeDL(params), params)
+        with unittest.mock.patch.object(_ReadBuffer, 'read', recording_read):
+            self.assertTrue(downloader.real_download(filename, {
+                'url': f'http://127.0.0.1:{self.port}/large',
+            }))
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        try_rm(filename)
+        self.assertEqual(sum(sizes), len(content))
+        # A new buffer is only allocated when the block size outgrows the current one
+        self.assertLessEqual(len(buffers), len(block_sizes))
+        self.assertLess(len(buffers), len(sizes))
+
+    def download_segmented(self, params):
+        params['logger'] = FakeLogger()
+        downloader = HttpFD(YoutubeDL(params), params)
+        downloader._MIN_SEGMENT_SIZE = 64 * 1024
+        filename = 'testfile.mp4'
+        self.assertTrue(downloader.real_download(filename, {
+            'url': f'http://127.0.0.1:{self.port}/segmented',
+        }))
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), SEGMENTED_CONTENT)
+        self.assertFalse(os.path.exists(downloader.ytdl_filename(filename)))
+        try_rm(filename)
+
+    def test_segmented(self):
+        # The files are too small to be split
+        self.download_all({'http_connections': 4})
+
+        for params in ({}, {'http_chunk_size': 100_000}):
+            self.httpd.requested_ranges.clear()
+            self.download_segmented({'http_connections': 4, **params})
+            self.assertGreater(len(self.httpd.requested_ranges), 3)
+
+    def test_segmented_resume(self):
+        filename = 'testfile.mp4'
+        remaining = [[100_000, 300_000], [500_000, len(SEGMENTED_CONTENT)]]
+        content = bytearray(SEGMENTED_CONTENT)
+        for start, end in remaining:
+            content[start:end] = bytes(end - start)
+        with open(f'{filename}.part', 'wb') as f:
+            f.write(content)
+        with open(f'{filename}.ytdl', 'w') as f:
+            json.dump({'downloader': {'http_segments': {
+                'total_bytes': len(SEGMENTED_CONTENT), 'remaining': remaining}}}, f)
+
+        self.download_segmented({'http_connections': 2})
+        # The first request only determines the size of the file
+        for start, end in self.httpd.requested_ranges[1:]:
+            self.assertTrue(any(s <= start and end <= e for s, e in remaining), (start, end))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -541,6 +541,18 @@ def test_undefined_varnames(self):
         self._test(jsi, [JS_Undefined, JS_Undefined])
         self.assertEqual(jsi._undefined_varnames, {'b'})
 
+    def test_repeated_evaluation(self):
+        jsi = JSInterpreter('''
+            function f(x) {
+                var a = [1, [2]], b = "str", c = 0;
+                a[1].push(x);
+                for (var i = 0; i < 3; i++) { c = c + i * x; }
+                return [a, b, c];
+            }
+        ''')
+        for x in range(3):
+            self._test(jsi, [[1, [2, x]], 'str', 3 * x], args=[x])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,10 +6,11 @@
 
 import pytest
 
-from yt_dlp.networking.common import Features, DEFAULT_TIMEOUT
+from yt_dlp.networking.common import AsyncResponse, Features, DEFAULT_TIMEOUT
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import asyncio
 import gzip
 import http.client
 import http.cookiejar
@@ -310,7 +311,7 @@ def setup_class(cls):
         cls.https_server_thread.start()
 
 
-@pytest.mark.parametrize('handler', ['Urllib', 'Requests', 'CurlCFFI'], indirect=True)
+@pytest.mark.parametrize('handler', ['Urllib', 'Requests', 'CurlCFFI', 'Asyncio'], indirect=True)
 class TestHTTPRequestHandler(TestRequestHandlerBase):
 
     def test_verify_cert(self, handler):
@@ -676,6 +677,39 @@ def test_read(self, handler):
             assert res.read().decode().endswith('\n\n')
             assert res.read() == b''
 
+    def test_readinto(self, handler):
+        with handler() as rh:
+            res = validate_and_send(
+                rh, Request(f'http://127.0.0.1:{self.http_port}/headers'))
+            buffer = bytearray(4)
+            assert res.readinto(buffer) == 4
+            assert buffer == b'Host'
+            view = memoryview(bytearray(1 << 16))
+            size = res.readinto(view[:1 << 15])
+            assert view[:size].tobytes().decode().endswith('\n\n')
+            assert res.readinto(view) == 0
+
+    @pytest.mark.skip_handler('CurlCFFI', 'does not provide connection statistics')
+    @pytest.mark.skip_handler('Asyncio', 'does not reuse connections')
+    def test_connection_reuse(self, handler):
+        for url in (f'http://127.0.0.1:{self.http_port}', f'https://127.0.0.1:{self.https_port}'):
+            with handler(max_connections_per_host=2, verify=False) as rh:
+                for path in ('/headers', '/gen_404', '/redirect_302', '/headers'):
+                    try:
+                        validate_and_send(rh, Request(f'{url}{path}')).read()
+                    except HTTPError as e:
+                        e.response.read()
+                stats = rh.get_connection_stats()
+                assert stats['requests'] == 5
+                assert stats['connections'] == 1
+
+                # A response that is not read completely can not give its connection back
+                res = validate_and_send(rh, Request(f'{url}/headers'))
+                res.read(1)
+                res.close()
+                validate_and_send(rh, Request(f'{url}/headers')).read()
+                assert rh.get_connection_stats()['connections'] == 2
+
     def test_request_disable_proxy(self, handler):
         for proxy_proto in handler._SUPPORTED_PROXY_SCHEMES or ['http']:
             # Given the handler is configured with a proxy
@@ -880,6 +914,25 @@ def test_file_urls(self, handler):
 
         os.unlink(tf.name)
 
+    def test_connection_pool(self, handler):
+        url = f'https://127.0.0.1:{self.https_port}/headers'
+        with handler(max_connections_per_host=1, verify=False) as rh:
+            validate_and_send(rh, Request(url)).read()
+            first = validate_and_send(rh, Request(url))
+            second = validate_and_send(rh, Request(url))
+            first.read()
+            second.read()
+            validate_and_send(rh, Request(url)).read()
+            stats = rh.get_connection_stats()
+            assert stats['requests'] == 4
+            # Only one idle connection was kept, and the second one resumed the TLS session of the first
+            assert stats['connections'] == 2
+            assert stats['tls_sessions_resumed'] == 1
+
+        with handler() as rh:
+            validate_and_send(rh, Request(f'http://127.0.0.1:{self.http_port}/headers')).read()
+            assert rh.get_connection_stats() == {}
+
     def test_http_error_returns_content(self, handler):
         # urllib HTTPError will try close the underlying response if reference to the HTTPError object is lost
         def get_response():
@@ -929,6 +982,27 @@ def test_httplib_validation_errors(self, handler, req, match, version_check):
             assert not isinstance(exc_info.value, TransportError)
 
 
+@pytest.mark.parametrize('handler', ['Asyncio'], indirect=True)
+class TestAsyncioRequestHandler(TestRequestHandlerBase):
+    def test_send_async(self, handler):
+        async def fetch(rh, path):
+            response = await rh.send_async(Request(f'http://127.0.0.1:{self.http_port}{path}'))
+            async with response:
+                return response.status, await response.read()
+
+        async def main():
+            with handler() as rh:
+                results = await asyncio.gather(*(fetch(rh, f'/headers?{i}') for i in range(20)))
+                assert all(status == 200 and b'Host: 127.0.0.1' in data for status, data in results)
+
+                with pytest.raises(HTTPError) as exc_info:
+                    await fetch(rh, '/gen_404')
+                assert exc_info.value.status == 404
+                assert exc_info.value.response.read() == b'<html></html>'
+
+        asyncio.run(main())
+
+
 @pytest.mark.parametrize('handler', ['Requests'], indirect=True)
 class TestRequestsRequestHandler(TestRequestHandlerBase):
     @pytest.mark.parametrize('raised,expected', [
@@ -1430,6 +1504,14 @@ def __init__(self, request):
         super().__init__(fp=io.BytesIO(b''), headers={}, url=request.url)
 
 
+class FakeAsyncResponse(AsyncResponse):
+    async def read(self, amt=None):
+        return b''
+
+    async def close(self):
+        pass
+
+
 class FakeRH(RequestHandler):
 
     def __init__(self, *args, **params):
@@ -1503,6 +1585,56 @@ def test_send(self):
         director.add_handler(FakeRH(logger=FakeLogger()))
         assert isinstance(director.send(Request('http://')), FakeResponse)
 
+    def test_send_async(self):
+        class AsyncRH(FakeRH):
+            supports_async = True
+
+            async def _send_async(self, request):
+                return FakeAsyncResponse(request.url, {'X-Async': '1'})
+
+        async def main():
+            director = RequestDirector(logger=FakeLogger())
+            director.add_handler(FakeRH(logger=FakeLogger()))
+            # Handlers without native support are run in another thread
+            response = await director.send_async(Request('http://'))
+            assert isinstance(response, AsyncResponse)
+            assert await response.read() == b''
+            with pytest.raises(SSLError):
+                await director.send_async(Request('ssl://something'))
+
+            director.add_handler(AsyncRH(logger=FakeLogger()))
+            director.preferences.add(lambda rh, _: -100 if isinstance(rh, AsyncRH) else 0)
+            assert director.send(Request('http://')).get_header('X-Async') is None
+            response = await director.send_async(Request('http://'))
+            assert response.get_header('X-Async') == '1'
+
+        asyncio.run(main())
+
+    def test_rate_limiter(self, monkeypatch):
+        class FakeRateLimiter:
+            def reserve(self, kind, amount=1, **keys):
+                reservations.append((kind, amount, keys))
+                return 0.5
+
+        reservations, sleeps = [], []
+        monkeypatch.setattr(time, 'sleep', sleeps.append)
+        director = RequestDirector(logger=FakeLogger(), rate_limiter=FakeRateLimiter())
+        director.add_handler(FakeRH(logger=FakeLogger()))
+        director.send(Request('http://example.com/a'))
+        assert reservations == [('requests', 1, {'total': True, 'host': 'example.com'})]
+        assert sleeps == [0.5]
+
+    def test_connection_stats(self):
+        class PoolingRH(FakeRH):
+            def get_connection_stats(self):
+                return {'requests': 2, 'connections': 1}
+
+        director = RequestDirector(logger=FakeLogger())
+        director.add_handler(FakeRH(logger=FakeLogger()))
+        assert director.get_connection_stats() == {}
+        director.add_handler(PoolingRH(logger=FakeLogger()))
+        assert director.get_connection_stats() == {'Pooling': {'requests': 2, 'connections': 1}}
+
     def test_unsupported_handlers(self):
         class SupportedRH(RequestHandler):
             _SUPPORTED_URL_SCHEMES = ['http']
@@ -1628,6 +1760,13 @@ def test_sanitize_url(self):
             res = ydl.urlopen(Request('httpss://foo.bar'))
             assert res.request.url == 'https://foo.bar'
 
+    def test_urlopen_async(self):
+        with FakeRHYDL() as ydl:
+            res = asyncio.run(ydl.urlopen_async('httpss://foo.bar'))
+            assert res.response.request.url == 'https://foo.bar'
+            with pytest.raises(RequestError, match='--legacy-server-connect'):
+                asyncio.run(ydl.urlopen_async('ssl://SSLV3_ALERT_HANDSHAKE_FAILURE'))
+
     def test_file_urls_error(self):
         # use urllib handler
         with FakeYDL() as ydl:
@@ -1808,6 +1947,16 @@ def test_build_handler_params(self):
             assert rh.verify is False
             assert rh.legacy_ssl_support is True
 
+    @pytest.mark.parametrize('ydl_params,expected', [
+        ({}, None),
+        ({'concurrent_fragment_downloads': 1, 'http_connections': 1}, None),
+        ({'concurrent_fragment_downloads': 4}, 4),
+        ({'concurrent_fragment_downloads': 2, 'http_connections': 3}, 3),
+    ])
+    def test_max_connections_per_host(self, ydl_params, expected):
+        with FakeYDL(ydl_params) as ydl:
+            assert self.build_handler(ydl).max_connections_per_host == expected
+
     @pytest.mark.parametrize('ydl_params', [
         {'client_certificate': 'fakecert.crt'},
         {'client_certificate': 'fakecert.crt', 'client_certificate_key': 'fakekey.key'},
@@ -10,14 +10,21 @@
 
 import io
 import random
+import socket
 import ssl
+import threading
+import time
 
 from yt_dlp.cookies import YoutubeDLCookieJar
 from yt_dlp.dependencies import certifi
 from yt_dlp.networking import Response
 from yt_dlp.networking._helper import (
+    DNSCache,
     InstanceStoreMixin,
+    RateLimiter,
+    TokenBucket,
     add_accept_encoding_header,
+    create_connection,
     get_redirect_method,
     make_socks_proxy_opts,
     ssl_load_certs,
@@ -167,6 +174,159 @@ def test_mixin(self):
         assert mixin._get_instance(t=1234) != m
 
 
+def make_addr(ip):
+    family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+    return (family, socket.SOCK_STREAM, 6, '', (ip, 80))
+
+
+class FakeSocket:
+    def __init__(self, ip):
+        self.ip = ip
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class TestConnection:
+    def make_cache(self, *ips, **kwargs):
+        def resolver(host, port, *args):
+            lookups.append(host)
+            return [make_addr(ip) for ip in ips]
+        lookups = []
+        return DNSCache(resolver=resolver, **kwargs), lookups
+
+    def test_dns_cache(self):
+        cache, lookups = self.make_cache('1.1.1.1')
+        assert cache.getaddrinfo('a', 80) == [make_addr('1.1.1.1')]
+        assert cache.getaddrinfo('a', 80) == [make_addr('1.1.1.1')]
+        assert cache.getaddrinfo('b', 80)
+        assert lookups == ['a', 'b']
+
+        cache.invalidate('a', 80)
+        cache.getaddrinfo('a', 80)
+        cache.getaddrinfo('b', 80)
+        assert lookups == ['a', 'b', 'a']
+
+        cache, lookups = self.make_cache('1.1.1.1', maxsize=1)
+        for host in ('a', 'b', 'a'):
+            cache.getaddrinfo(host, 80)
+        assert lookups == ['a', 'b', 'a']
+
+        cache, lookups = self.make_cache('1.1.1.1', ttl=0)
+        cache.getaddrinfo('a', 80)
+        cache.getaddrinfo('a', 80)
+        assert lookups == ['a', 'a']
+
+    def test_create_connection(self):
+        def connect(ip_addr, timeout, source_address):
+            ip = ip_addr[4][0]
+            attempts.append(ip)
+            if ip in delays:
+                time.sleep(delays[ip])
+            if ip in unreachable:
+                raise OSError(f'{ip} is unreachable')
+            return sockets[ip]
+
+        ips = ('::1', '::2', '1.1.1.1', '1.1.1.2')
+        cache, lookups = self.make_cache(*ips)
+
+        # The address families are alternated, and a failure starts the next attempt immediately
+        attempts, sockets, delays, unreachable = [], {ip: FakeSocket(ip) for ip in ips}, {}, {'::1'}
+        start = time.monotonic()
+        assert create_connection(('a', 80), _create_socket_func=connect, _dns_cache=cache).ip == '1.1.1.1'
+        assert time.monotonic() - start < 0.2
+        assert attempts == ['::1', '1.1.1.1']
+
+        # A slow address does not block the next one, and is closed once it connects
+        attempts, sockets, delays, unreachable = [], {ip: FakeSocket(ip) for ip in ips}, {'::1': 0.5}, set()
+        assert create_connection(('a', 80), _create_socket_func=connect, _dns_cache=cache).ip == '1.1.1.1'
+        assert attempts == ['::1', '1.1.1.1']
+        assert sockets['::1'].closed.wait(2)
+        assert not sockets['1.1.1.1'].closed.is_set()
+
+        # The addresses are forgotten if none of them works
+        attempts, sockets, delays, unreachable = [], {ip: FakeSocket(ip) for ip in ips}, {}, set(ips)
+        with pytest.raises(OSError, match='unreachable'):
+            create_connection(('a', 80), _create_socket_func=connect, _dns_cache=cache)
+        assert sorted(attempts) == sorted(unreachable)
+        assert lookups == ['a']
+        with pytest.raises(OSError):
+            create_connection(('a', 80), _create_socket_func=connect, _dns_cache=cache)
+        assert lookups == ['a', 'a']
+
+        # Only the addresses of the family of the source address are used
+        attempts, sockets, delays, unreachable = [], {ip: FakeSocket(ip) for ip in ips}, {}, set()
+        assert create_connection(
+            ('a', 80), source_address=('::', 0), _create_socket_func=connect, _dns_cache=cache).ip == '::1'
+
+        # An unexpected error fails the attempt instead of leaving it pending
+        attempts, sockets, delays, unreachable = [], {'1.1.1.1': FakeSocket('1.1.1.1')}, {}, set()
+        assert create_connection(('a', 80), _create_socket_func=connect, _dns_cache=cache).ip == '1.1.1.1'
+        assert attempts == ['::1', '1.1.1.1']
+        sockets = {}
+        with pytest.raises(KeyError):
+            create_connection(('a', 80), _create_socket_func=connect, _dns_cache=cache)
+
+
+class TestRateLimiter:
+    @pytest.fixture(autouse=True)
+    def clock(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+        monkeypatch.setattr(RateLimiter, '_buckets', {})
+        return clock
+
+    def test_token_bucket(self, clock):
+        bucket = TokenBucket(100)
+        assert bucket.reserve(60) == 0
+        assert bucket.reserve(60) == pytest.approx(0.2)
+        # Later reservations wait for the earlier ones
+        assert bucket.reserve(100) == pytest.approx(1.2)
+        clock[0] += 1.2
+        assert bucket.reserve(50) == pytest.approx(0.5)
+        # Tokens do not accumulate beyond the capacity
+        clock[0] += 10
+        assert bucket.reserve(100) == 0
+        assert bucket.reserve(1) == pytest.approx(0.01)
+
+        # Requests at rates below 1/s are not delayed until the second one
+        bucket = TokenBucket(0.5)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(2)
+
+    def test_rate_limiter(self, clock):
+        assert not RateLimiter()
+        limiter = RateLimiter(bandwidth={'total': 100, 'host': 50, 'extractor': None}, requests={'extractor': 1})
+        assert limiter
+        assert limiter.reserve('bytes', 50, total=True, host='a', extractor='A') == 0
+        assert limiter.reserve('bytes', 50, total=True, host='a', extractor='A') == pytest.approx(1)
+        assert limiter.reserve('bytes', 10, total=True, host='b') == pytest.approx(0.1)
+        # Scopes without a key or a limit are not counted
+        assert limiter.reserve('bytes', 1000) == 0
+        assert limiter.reserve('requests', 5, total=True, host='a') == 0
+        assert limiter.reserve('requests', extractor='A') == 0
+        assert limiter.reserve('requests', extractor='A') == pytest.approx(1)
+        assert limiter.reserve('requests', extractor='B') == 0
+
+        # Instances with the same limits share the buckets
+        assert RateLimiter(requests={'extractor': 1}).reserve('requests', extractor='A') == pytest.approx(2)
+        assert RateLimiter(requests={'extractor': 2}).reserve('requests', extractor='A') == 0
+
+    def test_rate_limiter_buckets(self, clock):
+        limiter = RateLimiter(bandwidth={'host': 100})
+        for host in ('a', 'b', 'c'):
+            limiter.reserve('bytes', 100, host=host)
+        assert len(RateLimiter._buckets) == 3
+        # Buckets that have refilled are dropped once a new one is needed
+        clock[0] += 0.5
+        limiter.reserve('bytes', 100, host='a')
+        clock[0] += 0.5
+        assert limiter.reserve('bytes', 100, host='d') == 0
+        assert sorted(key for _, _, key, _ in RateLimiter._buckets) == ['a', 'd']
+        assert limiter.reserve('bytes', 100, host='a') == pytest.approx(1)
+
+
 class TestNetworkingExceptions:
 
     @staticmethod
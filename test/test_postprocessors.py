@@ -8,18 +8,36 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+import io
+import itertools
 import subprocess
+import tempfile
 
 from yt_dlp import YoutubeDL
-from yt_dlp.utils import shell_quote
+from yt_dlp.cache import MemoryCacheBackend
+from yt_dlp.utils import PostProcessingError, shell_quote
 from yt_dlp.postprocessor import (
     ExecPP,
+    FFmpegCopyStreamPP,
+    FFmpegEmbedSubtitlePP,
+    FFmpegFixupStretchedPP,
+    FFmpegMetadataPP,
+    FFmpegPostProcessor,
     FFmpegThumbnailsConvertorPP,
     MetadataFromFieldPP,
     MetadataParserPP,
     ModifyChaptersPP,
+    MP4MergerPP,
     SponsorBlockPP,
 )
+from yt_dlp.downloader.ism import box, full_box, u32, u64, write_piff_header
+from yt_dlp.postprocessor.mp4merger import (
+    FragmentedMP4Muxer,
+    _find_box,
+    _iter_boxes,
+    _parse_boxes,
+    merge_fragmented_mp4,
+)
 
 
 class TestMetadataFromField(unittest.TestCase):
@@ -76,6 +94,106 @@ def test_escaping(self):
         os.remove(initial_file)
 
 
+class TestFFmpegProbeCache(unittest.TestCase):
+    @unittest.skipIf(os.name == 'nt', 'the fake ffmpeg is a shell script')
+    def test_probe_cache(self):
+        def get_versions_and_features():
+            FFmpegPostProcessor._version_cache, FFmpegPostProcessor._features_cache = {None: None}, {}
+            return FFmpegPostProcessor.get_versions_and_features(
+                YoutubeDL({'ffmpeg_location': ffmpeg, 'cachedir': backend}))
+
+        def write_ffmpeg(version):
+            with open(ffmpeg, 'w') as f:
+                f.write(f'#!/bin/sh\necho x >> "{calls}"\n')
+                f.write(f'echo "ffmpeg version {version}"\necho setts\n' if version else 'exit 1\n')
+            os.chmod(ffmpeg, 0o755)
+
+        def call_count():
+            with open(calls) as f:
+                return len(f.readlines())
+
+        backend = MemoryCacheBackend()
+        version_cache, features_cache = FFmpegPostProcessor._version_cache, FFmpegPostProcessor._features_cache
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                ffmpeg, calls = os.path.join(tmpdir, 'ffmpeg'), os.path.join(tmpdir, 'calls')
+                # A failed probe is retried by the next process
+                write_ffmpeg(None)
+                self.assertEqual(get_versions_and_features()[0], {})
+                self.assertEqual(get_versions_and_features()[0], {})
+                self.assertEqual(call_count(), 2)
+
+                write_ffmpeg('4.4')
+                versions, features = get_versions_and_features()
+                self.assertEqual(versions, {'ffmpeg': '4.4'})
+                self.assertTrue(features['setts'])
+                self.assertEqual(call_count(), 3)
+
+                # A new process reuses the results while the executable is the same
+                self.assertEqual(get_versions_and_features(), (versions, features))
+                self.assertEqual(call_count(), 3)
+
+                write_ffmpeg('5.10')
+                self.assertEqual(get_versions_and_features()[0], {'ffmpeg': '5.10'})
+                self.assertEqual(call_count(), 4)
+        finally:
+            FFmpegPostProcessor._version_cache, FFmpegPostProcessor._features_cache = version_cache, features_cache
+
+
+class TestFFmpegPassPlanner(unittest.TestCase):
+    def run_pps(self, pps, params={}, fail_combined=False):
+        def run_ffmpeg_multiple_files(input_paths, out_path, opts, **kwargs):
+            if fail_combined and len(input_paths) > 2:
+                raise PostProcessingError('combined run failed')
+            calls.append((input_paths, opts))
+            with open(out_path, 'w'):
+                pass
+
+        calls = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename, sub_filename = os.path.join(tmpdir, 'video.mp4'), os.path.join(tmpdir, 'video.en.vtt')
+            for name in (filename, sub_filename):
+                with open(name, 'w'):
+                    pass
+            ydl = YoutubeDL({'quiet': True, 'no_warnings': True, **params})
+            for pp in pps:
+                pp.set_downloader(ydl)
+                pp.run_ffmpeg_multiple_files = run_ffmpeg_multiple_files
+            ydl.run_all_pps('post_process', {
+                'id': 'id', 'title': 'title', 'ext': 'mp4', 'filepath': filename, '__files_to_move': {},
+                'stretched_ratio': 2, 'chapters': [{'start_time': 0, 'end_time': 1, 'title': 'chapter'}],
+                'requested_subtitles': {'en': {'ext': 'vtt', 'filepath': sub_filename}},
+            }, additional_pps=pps)
+            self.assertFalse(set(os.listdir(tmpdir)) - {'video.mp4', 'video.en.vtt'})
+        return [([os.path.basename(path) for path in paths], opts) for paths, opts in calls]
+
+    def test_planner(self):
+        def pps():
+            return [FFmpegFixupStretchedPP(), FFmpegEmbedSubtitlePP(),
+                    FFmpegMetadataPP(None, add_metadata=False, add_infojson=False)]
+
+        copy_opts = ['-map', '0', '-dn', '-ignore_unknown', '-c', 'copy']
+        stretch_opts = ['-aspect', '2.000000']
+        sub_opts = ['-map', '-0:s', '-map', '1:0', '-metadata:s:s:0', 'language=eng']
+        self.assertEqual(self.run_pps(pps()), [(
+            ['video.mp4', 'video.en.vtt', 'video.meta'],
+            [*copy_opts, '-c:s', 'mov_text', *stretch_opts, *sub_opts, '-map_metadata', '2'])])
+
+        separate_runs = [
+            (['video.mp4'], [*copy_opts, *stretch_opts]),
+            (['video.mp4', 'video.en.vtt'], [*copy_opts, '-c:s', 'mov_text', *sub_opts]),
+            (['video.mp4', 'video.meta'], [*copy_opts, '-map_metadata', '1'])]
+        self.assertEqual(self.run_pps(pps(), {'compat_opts': ['no-batched-ffmpeg']}), separate_runs)
+        self.assertEqual(self.run_pps(pps(), fail_combined=True), separate_runs)
+        # The arguments of a post-processor are only given to its own pass
+        self.assertEqual(self.run_pps(pps(), {'postprocessor_args': {'embedsubtitle+ffmpeg': []}}), [
+            separate_runs[0], separate_runs[1], (['video.mp4', 'video.meta'], [*copy_opts, '-map_metadata', '1'])])
+
+        # Passes of the same post-processor are not made together
+        self.assertEqual(self.run_pps([FFmpegCopyStreamPP(), FFmpegCopyStreamPP()]), [
+            (['video.mp4'], copy_opts)] * 2)
+
+
 class TestExec(unittest.TestCase):
     def test_parse_cmd(self):
         pp = ExecPP(YoutubeDL(), '')
@@ -87,6 +205,103 @@ def test_parse_cmd(self):
         self.assertEqual(pp.parse_cmd('echo %(filepath)q', info), cmd)
 
 
+class TestMP4MergerPP(unittest.TestCase):
+    def write_fragmented_mp4(self, filename, stream_type, timescale, fragment_times):
+        with open(filename, 'wb') as f:
+            params = {'track_id': 1, 'fourcc': 'AACL', 'duration': 0, 'timescale': timescale, 'sampling_rate': 48000}
+            write_piff_header(f, {**params, 'stream_type': stream_type} if stream_type == 'audio'
+                              else {**params, 'fourcc': 'TTML', 'stream_type': stream_type})
+            for sequence_number, time in enumerate(fragment_times, 1):
+                payload = f'{stream_type[0]}{time}'.encode()
+                # The data starts after the moof (76 bytes) and the header of the mdat
+                moof = box(b'moof', full_box(b'mfhd', 0, 0, u32.pack(sequence_number)) + box(b'traf', (
+                    full_box(b'tfhd', 0, 0x1, u32.pack(1) + u64.pack(f.tell() + 84))
+                    + full_box(b'tfdt', 1, 0, u64.pack(time * timescale)))))
+                self.assertEqual(len(moof), 76)
+                f.write(moof + box(b'mdat', payload))
+
+    def test_merge(self):
+        filenames = [f'test_mp4merger_{stream_type}.mp4' for stream_type in ('audio', 'text')]
+        self.write_fragmented_mp4(filenames[0], 'audio', 48000, [0, 2, 4])
+        self.write_fragmented_mp4(filenames[1], 'text', 1000, [0, 1, 3])
+        info = {
+            'filepath': 'test_mp4merger.mp4',
+            'ext': 'mp4',
+            '__files_to_merge': filenames,
+            'requested_formats': [{'container': 'm4a_dash'}, {'container': 'mp4_dash'}],
+        }
+        self.assertTrue(MP4MergerPP.can_merge(info))
+        self.assertFalse(MP4MergerPP.can_merge({**info, 'ext': 'mkv'}))
+        try:
+            MP4MergerPP(YoutubeDL({'quiet': True})).run(info)
+            with open(info['filepath'], 'rb') as f:
+                data = f.read()
+        finally:
+            for filename in (*filenames, info['filepath']):
+                if os.path.exists(filename):
+                    os.remove(filename)
+
+        boxes = _parse_boxes(data)
+        self.assertEqual([box_type for box_type, _ in boxes[:2]], [b'ftyp', b'moov'])
+        moov = _parse_boxes(boxes[1][1])
+        traks = [_parse_boxes(payload) for box_type, payload in moov if box_type == b'trak']
+        self.assertEqual([u32.unpack_from(_find_box(trak, b'tkhd'), 20)[0] for trak in traks], [1, 2])
+        self.assertEqual(u32.unpack(_find_box(moov, b'mvhd')[-4:])[0], 3)
+        self.assertEqual([
+            u32.unpack_from(payload, 4)[0] for box_type, payload in _parse_boxes(_find_box(moov, b'mvex'))
+            if box_type == b'trex'], [1, 2])
+
+        fragments = []
+        for box_type, start, end in _iter_boxes(data):
+            if box_type == b'moof':
+                moof = _parse_boxes(data[start:end])
+                tfhd = _find_box(moof, b'traf', b'tfhd')
+                data_start = u64.unpack_from(tfhd, 8)[0]
+                fragments.append((
+                    u32.unpack_from(_find_box(moof, b'mfhd'), 4)[0], u32.unpack_from(tfhd, 4)[0],
+                    data[data_start:data_start + 2]))
+        self.assertEqual(fragments, [
+            (1, 1, b'a0'), (2, 2, b't0'), (3, 2, b't1'), (4, 1, b'a2'), (5, 2, b't3'), (6, 1, b'a4')])
+
+    def test_muxer(self):
+        filenames = [f'test_mp4merger_{stream_type}.mp4' for stream_type in ('audio', 'text')]
+        self.write_fragmented_mp4(filenames[0], 'audio', 48000, [0, 2, 4])
+        self.write_fragmented_mp4(filenames[1], 'text', 1000, [0, 1, 3])
+        try:
+            merge_fragmented_mp4(filenames, 'test_mp4merger.mp4')
+            with open('test_mp4merger.mp4', 'rb') as f:
+                expected = f.read()
+            inputs = []
+            for filename in filenames:
+                with open(filename, 'rb') as f:
+                    inputs.append(f.read())
+        finally:
+            for filename in (*filenames, 'test_mp4merger.mp4'):
+                if os.path.exists(filename):
+                    os.remove(filename)
+
+        # Merging while the inputs are written in pieces gives the same file as merging them afterwards
+        out_stream = io.BytesIO()
+        muxer = FragmentedMP4Muxer(out_stream, filenames)
+        for audio_start, text_start in zip(itertools.count(0, 50), itertools.count(0, 7)):
+            if audio_start >= len(inputs[0]) and text_start >= len(inputs[1]):
+                break
+            muxer.inputs[0].write(inputs[0][audio_start:audio_start + 50])
+            muxer.inputs[1].write(inputs[1][text_start:text_start + 7])
+        for inp in muxer.inputs:
+            inp.close()
+        muxer.finish()
+        self.assertEqual(out_stream.getvalue(), expected)
+
+        muxer = FragmentedMP4Muxer(io.BytesIO(), filenames)
+        muxer.inputs[0].write(inputs[0])
+        muxer.inputs[1].write(inputs[1][:-1])
+        for inp in muxer.inputs:
+            inp.close()
+        with self.assertRaisesRegex(PostProcessingError, 'truncated'):
+            muxer.finish()
+
+
 class TestModifyChaptersPP(unittest.TestCase):
     def setUp(self):
         self._pp = ModifyChaptersPP(YoutubeDL())
@@ -77,6 +77,7 @@
     limit_length,
     locked_file,
     lowercase_escape,
+    match_filter_func,
     match_str,
     merge_dicts,
     mimetype2ext,
@@ -134,7 +135,7 @@
     xpath_text,
     xpath_with_ns,
 )
-from yt_dlp.utils._utils import _UnsafeExtensionError
+from yt_dlp.utils._utils import _UnsafeExtensionError, _match_one
 from yt_dlp.utils.networking import (
     HTTPHeaderDict,
     escape_rfc3986,
@@ -1574,6 +1575,33 @@ def test_match_str(self):
         self.assertTrue(match_str('!x', {'id': 'foo'}, True))
         self.assertFalse(match_str('x', {'id': 'foo'}, False))
 
+    def test_match_str_compiled(self):
+        for filter_str, dct, incomplete, expected in [
+            ('x>1K', {'x': 1200}, False, True),
+            # Numbers are compared as strings to string fields
+            ('x>1K', {'x': '1200'}, False, False),
+            ('x=1200', {'x': '1200'}, False, True),
+            ('x *= 12', {'x': '1200'}, False, True),
+            ('x<=10:00', {'x': 600}, False, True),
+            ('x=?"1,2"', {}, False, True),
+            ('!y & x', {'x': False, 'y': None}, True, False),
+            ('x>1 & y<?2', {'x': 5.5}, {'y'}, True),
+            ('x!~=b', {'x': 'abc'}, False, False),
+            # Invalid parts only fail once they are reached
+            ('y=1 & ~x', {}, False, False),
+        ]:
+            self.assertIs(match_str(filter_str, dct, incomplete), expected, (filter_str, dct, incomplete))
+        self.assertRaises(ValueError, match_str, 'x *= 12', {'x': 1200})
+        self.assertRaises(ValueError, match_str, 'y=1 & ~x', {'y': 1})
+        self.assertFalse(_match_one('x>1K', {'x': 5}, False))
+        self.assertTrue(_match_one('x>1K', {}, {'x'}))
+
+        match_func = match_filter_func(['x>1K', 'y*=b'])
+        self.assertIsNone(match_func({'x': 1200}))
+        self.assertIsNone(match_func({'y': 'abc'}))
+        self.assertIsNotNone(match_func({'x': 5}))
+        self.assertIsNone(match_func({}, True))
+
     def test_parse_dfxp_time_expr(self):
         self.assertEqual(parse_dfxp_time_expr(None), None)
         self.assertEqual(parse_dfxp_time_expr(''), None)
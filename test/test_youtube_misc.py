@@ -8,7 +8,11 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+from test.helper import FakeYDL
+from yt_dlp.cache import MemoryCacheBackend
 from yt_dlp.extractor import YoutubeIE
+from yt_dlp.extractor.youtube._video import _PlayerArtifactCache
+from yt_dlp.utils import ExtractorError
 
 
 class TestYoutubeMisc(unittest.TestCase):
@@ -21,6 +25,111 @@ def test_youtube_extract(self):
         assertExtractId('http://www.youtube.com/watch?v=BaW_jenozKcsharePLED17F32AD9753930', 'BaW_jenozKc')
         assertExtractId('BaW_jenozKc', 'BaW_jenozKc')
 
+    def test_player_artifact_cache(self):
+        cache = _PlayerArtifactCache(max_players=2, max_results=2)
+        self.assertIsNone(cache.get('a', 'js'))
+        self.assertTrue(cache.add('a', 'js', 'code a'))
+        self.assertFalse(cache.add('a', 'js', 'other code'))
+        self.assertEqual(cache.get('a', 'js'), 'code a')
+        for n in 'xyz':
+            cache.add_result('a', 'nsig', n, n.upper())
+        self.assertIsNone(cache.get_result('a', 'nsig', 'x'))
+        self.assertEqual(cache.get_result('a', 'nsig', 'z'), 'Z')
+        self.assertEqual(str(cache), 'js 1/2, nsig result 1/2')
+
+        cache.add('b', 'js', 'code b')
+        cache.get('a', 'js')
+        cache.add('c', 'js', 'code c')
+        self.assertIsNone(cache.get('b', 'js'))
+        self.assertEqual(cache.get('a', 'js'), 'code a')
+
+    def test_player_artifacts_are_shared(self):
+        player_url = 'https://www.youtube.com/s/player/0123abcd/player_ias.vflset/en_US/base.js'
+        backend = MemoryCacheBackend()
+        ie = YoutubeIE(FakeYDL({'cachedir': backend}))
+        ie._PLAYER_ARTIFACTS = _PlayerArtifactCache()
+        player_js_key = ie._player_js_cache_key(player_url)
+
+        def new_process():
+            other_ie = YoutubeIE(FakeYDL({'cachedir': backend}))
+            other_ie._PLAYER_ARTIFACTS = _PlayerArtifactCache()
+            other_ie._download_webpage = ie._download_webpage
+            return other_ie
+
+        downloads = []
+        ie._download_webpage = lambda url, *args, **kwargs: downloads.append(url) or 'var code'
+        self.assertEqual(ie._load_player('id', player_url), 'var code')
+        # Other instances in the process, and other processes, reuse the player
+        other_ie = YoutubeIE(FakeYDL({'cachedir': backend}))
+        other_ie._PLAYER_ARTIFACTS = ie._PLAYER_ARTIFACTS
+        self.assertEqual(other_ie._load_player('id', player_url), 'var code')
+        self.assertEqual(new_process()._load_player('id', player_url), 'var code')
+        self.assertEqual(downloads, [player_url])
+
+        # Only the most recently downloaded players are persisted
+        ie._CACHED_PLAYERS = 1
+        other_player_url = player_url.replace('0123abcd', '4567cdef')
+        ie._load_player('id', other_player_url)
+        self.assertEqual(new_process()._load_player('id', player_url), 'var code')
+        self.assertEqual(downloads, [player_url, other_player_url, player_url])
+
+        ie._store_player_data_to_cache('sts', player_url, 12345)
+        other_ie = YoutubeIE(FakeYDL({'cachedir': False}))
+        other_ie._PLAYER_ARTIFACTS = ie._PLAYER_ARTIFACTS
+        self.assertEqual(other_ie._load_player_data_from_cache('sts', player_url), 12345)
+
+    def test_nsig_results_are_shared(self):
+        player_url = 'https://www.youtube.com/s/player/0123abcd/player_ias.vflset/en_US/base.js'
+        backend = MemoryCacheBackend()
+
+        def new_process():
+            ie = YoutubeIE(FakeYDL({'cachedir': backend}))
+            ie._PLAYER_ARTIFACTS = _PlayerArtifactCache()
+            ie._solve_nsig = lambda s, *args: solved.append(s) or s.upper()
+            return ie
+
+        solved = []
+        ie = new_process()
+        self.assertEqual([ie._decrypt_nsig(n, 'id', player_url) for n in ('ab', 'cd', 'ab')], ['AB', 'CD', 'AB'])
+        self.assertEqual(solved, ['ab', 'cd'])
+        # Another process reuses the results, and adds to them
+        ie = new_process()
+        ie._CACHED_NSIG_RESULTS = 2
+        self.assertEqual([ie._decrypt_nsig(n, 'id', player_url) for n in ('cd', 'ef')], ['CD', 'EF'])
+        self.assertEqual(solved, ['ab', 'cd', 'ef'])
+        self.assertEqual(ie._load_nsig_results(ie._player_js_cache_key(player_url)), {'cd': 'CD', 'ef': 'EF'})
+
+        def fail(s, *args):
+            solved.append(s)
+            raise ValueError(s)
+
+        # Failures are not persisted
+        ie = new_process()
+        ie._solve_nsig = fail
+        for _ in range(2):
+            with self.assertRaises(ExtractorError):
+                ie._decrypt_nsig('gh', 'id', player_url)
+        self.assertEqual(solved, ['ab', 'cd', 'ef', 'gh'])
+        self.assertEqual(new_process()._decrypt_nsig('gh', 'id', player_url), 'GH')
+
+    def test_player_functions_are_shared(self):
+        player_url = 'https://www.youtube.com/s/player/0123abcd/player_ias.vflset/en_US/base.js'
+        artifacts, calls = _PlayerArtifactCache(), []
+
+        def extract(arg):
+            calls.append(arg)
+            if arg == 'bad':
+                raise ValueError(arg)
+            return arg
+
+        for _ in range(2):
+            ie = YoutubeIE(FakeYDL({'cachedir': False}))
+            ie._PLAYER_ARTIFACTS = artifacts
+            self.assertEqual(ie._cached(extract, 'func', player_url)('good'), 'good')
+            with self.assertRaises(ExtractorError):
+                ie._cached(extract, 'func', player_url, 'bad')('bad')
+        self.assertEqual(calls, ['good', 'bad'])
+        self.assertEqual(artifacts.get(ie._player_js_cache_key(player_url), 'func'), 'good')
 
 if __name__ == '__main__':
     unittest.main()
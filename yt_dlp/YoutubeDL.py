@@ -1,4 +1,5 @@
 import collections
+import concurrent.futures
 import contextlib
 import copy
 import datetime as dt
@@ -19,18 +20,27 @@
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import tokenize
 import traceback
 import unicodedata
 
+from .archive import SQLiteArchive
 from .cache import Cache
 from .compat import urllib  # isort: split
 from .compat import urllib_req_to_req
 from .cookies import CookieLoadError, LenientSimpleCookie, load_cookies
-from .downloader import FFmpegFD, get_suitable_downloader, shorten_protocol_name
+from .downloader import (
+    DashSegmentsFD,
+    FFmpegFD,
+    FileDownloader,
+    get_suitable_downloader,
+    shorten_protocol_name,
+)
 from .downloader.rtmp import rtmpdump_version
 from .extractor import gen_extractor_classes, get_info_extractor, import_extractors
+from .extractor._urlindex import URLIndex
 from .extractor.common import UnsupportedURLIE
 from .extractor.openload import PhantomJSwrapper
 from .globals import (
@@ -45,6 +55,7 @@
 )
 from .minicurses import format_text
 from .networking import HEADRequest, Request, RequestDirector
+from .networking._helper import RateLimiter
 from .networking.common import _REQUEST_HANDLERS, _RH_PREFERENCES
 from .networking.exceptions import (
     HTTPError,
@@ -67,9 +78,11 @@
     FFmpegPostProcessor,
     FFmpegVideoConvertorPP,
     MoveFilesAfterDownloadPP,
+    MP4MergerPP,
     get_postprocessor,
 )
 from .postprocessor.ffmpeg import resolve_mapping as resolve_recode_mapping
+from .postprocessor.ffmpegplanner import FFmpegPassPlanner
 from .update import (
     REPOSITORY,
     _get_system_deprecation,
@@ -194,6 +207,75 @@ def wrapper(self, *args, **kwargs):
     return wrapper
 
 
+# Parsed format specs; see YoutubeDL._parse_format_spec
+PICKFIRST = 'PICKFIRST'
+MERGE = 'MERGE'
+SINGLE = 'SINGLE'
+GROUP = 'GROUP'
+FormatSelector = collections.namedtuple('FormatSelector', ['type', 'selector', 'filters'])
+
+
+class _FormatIndex:
+    """
+    The formats that a format selector is evaluated on
+
+    The same atoms and filters are often repeated in the alternatives of a format spec
+    (e.g. bv*[height<=720]+ba/b[height<=720]), so their matches are computed only once.
+    The returned lists are shared and must not be modified
+    """
+
+    def __init__(self, formats):
+        self.formats = formats
+        self._matches, self._filtered, self._by_id = {}, {}, None
+
+    def matching(self, key, filter_f):
+        matches = self._matches.get(key)
+        if matches is None:
+            matches = self._matches[key] = list(filter(filter_f, self.formats))
+        return matches
+
+    def with_id(self, format_id):
+        if self._by_id is None:
+            self._by_id = {}
+            for f in self.formats:
+                self._by_id.setdefault(f.get('format_id'), []).append(f)
+        return self._by_id.get(format_id, [])
+
+    def filtered(self, filter_spec, filter_f):
+        """Index of the formats that pass the filter"""
+        index = self._filtered.get(filter_spec)
+        if index is None:
+            index = self._filtered[filter_spec] = _FormatIndex(list(filter(filter_f, self.formats)))
+        return index
+
+
+# Compiled output templates; see YoutubeDL._compile_outtmpl
+_OuttmplField = collections.namedtuple('_OuttmplField', ['prefix', 'key', 'format', 'conversion', 'alternatives'])
+_OuttmplAlternative = collections.namedtuple('_OuttmplAlternative', [
+    'fields', 'path', 'negate', 'maths', 'strf_format', 'replacement', 'default', 'alternate'])
+
+
+class _ReplacementFormatter(string.Formatter):
+    def get_field(self, field_name, args, kwargs):
+        if field_name.isdigit():
+            return args[0], -1
+        raise ValueError('Unsupported field')
+
+
+_REPLACEMENT_FORMATTER = _ReplacementFormatter()
+
+
+class _ThreadState(threading.local):
+    """State of YoutubeDL that is specific to the thread processing a URL"""
+
+    def __init__(self):
+        self.playlist_level = 0
+        self.playlist_urls = set()
+        self.progress_line = None
+        self.url_downloads = 0  # Downloads started for the current input URL
+        self.autonumber = None  # Number of the last download started by the thread
+
+
 class YoutubeDL:
     """YoutubeDL class.
 
@@ -290,7 +372,8 @@ class YoutubeDL:
                        and don't overwrite any file if False
     playlist_items:    Specific indices of playlist to download.
     playlistrandom:    Download playlist items in random order.
-    lazy_playlist:     Process playlist entries as they are received.
+    lazy_playlist:     Process playlist entries as they are received. Entries that
+                       are not needed later (see extract_flat) are then not kept in memory
     matchtitle:        Download only matching titles.
     rejecttitle:       Reject downloads for matching titles.
     logger:            A class having a `debug`, `warning` and `error` function where
@@ -325,7 +408,9 @@ class YoutubeDL:
     keepvideo:         Keep the video file after post-processing
     daterange:         A utils.DateRange object, download only if the upload_date is in the range.
     skip_download:     Skip the actual download of the video file
-    cachedir:          Location of the cache files in the filesystem.
+    cachedir:          Location of the cache files in the filesystem, or the path of
+                       a SQLite database (.sqlite, .sqlite3 or .db) to use instead.
+                       A cache.CacheBackend instance can also be given.
                        False to disable filesystem cache.
     noplaylist:        Download single video instead of a playlist if in doubt.
     age_limit:         An integer representing the user's age in years.
@@ -341,10 +426,17 @@ class YoutubeDL:
                        downloaded. None for no limit.
     download_archive:  A set, or the name of a file where all downloads are recorded.
                        Videos already present in the file are not downloaded again.
+                       A name of the form "sqlite:PATH" is used as an indexed
+                       SQLite archive instead of a text file.
+    import_download_archive: The name of a text archive file whose entries are
+                       added to the SQLite download_archive when it is loaded
     break_on_existing: Stop the download process after attempting to download a
                        file that is in the archive.
     break_per_url:     Whether break_on_reject and break_on_existing
                        should act on each input URL as opposed to for the entire queue
+    concurrent_downloads:  Number of input URLs that are extracted and downloaded
+                       concurrently (default 1). Each worker processes one URL
+                       (including all of its playlist entries) at a time
     cookiefile:        File name or text stream from where cookies should be read and dumped to
     cookiesfrombrowser:  A tuple containing the name of the browser, the profile
                        name/path from where cookies are loaded, the name of the keyring,
@@ -423,6 +515,13 @@ class YoutubeDL:
                        Progress hooks are guaranteed to be called at least twice
                        (with status "started" and "finished") if the processing is successful.
     merge_output_format: "/" separated list of extensions to use when merging formats.
+    native_merge:      Merge the fragmented MP4 formats of DASH without ffmpeg.
+                       By default (None), this is only done if ffmpeg is not available
+    merge_during_download: Merge the fragmented MP4 formats of DASH natively
+                       while they are downloaded, instead of after the download.
+                       Such downloads cannot be resumed. Formats that are not
+                       downloaded as DASH fragments (e.g. YouTube's https
+                       formats) are still merged after the download
     final_ext:         Expected final extension; used to detect when the file was
                        already downloaded and converted
     fixup:             Automatically correct known faults of the file.
@@ -436,6 +535,11 @@ class YoutubeDL:
                        An ImpersonateTarget (from yt_dlp.networking.impersonate)
     sleep_interval_requests: Number of seconds to sleep between requests
                        during extraction
+    shared_ratelimit:  Download speed limits in bytes/sec that are shared by all the
+                       downloads of the process, as a dictionary with the keys
+                       "total", "host" (for each host) and "extractor" (for each extractor)
+    request_ratelimit: Limits for the number of HTTP requests per second, as a
+                       dictionary with the same keys as shared_ratelimit
     sleep_interval:    Number of seconds to sleep before each download when
                        used alone or a lower bound of a range for randomized
                        sleep before each download (minimum possible number
@@ -512,7 +616,8 @@ class YoutubeDL:
     nopart, updatetime, buffersize, ratelimit, throttledratelimit, min_filesize,
     max_filesize, test, noresizebuffer, retries, file_access_retries, fragment_retries,
     continuedl, xattr_set_filesize, hls_use_mpegts, http_chunk_size,
-    external_downloader_args, concurrent_fragment_downloads, progress_delta.
+    external_downloader_args, concurrent_fragment_downloads, progress_delta,
+    fragment_memory_limit, fragment_reorder_limit, http_connections, async_fragment_downloads.
 
     The following options are used by the post processors:
     ffmpeg_location:   Location of the ffmpeg/avconv binary; either the path
@@ -641,6 +746,7 @@ def __init__(self, params=None, auto_init=True):
         self.params = params
         self._ies = {}
         self._ies_instances = {}
+        self._ies_url_index = None
         self._pps = {k: [] for k in POSTPROCESS_WHEN}
         self._printed_messages = set()
         self._first_webpage_request = True
@@ -651,8 +757,11 @@ def __init__(self, params=None, auto_init=True):
         self._download_retcode = 0
         self._num_downloads = 0
         self._num_videos = 0
-        self._playlist_level = 0
-        self._playlist_urls = set()
+        self._format_sorters, self._format_selectors = {}, {}
+        self._thread_state = _ThreadState()
+        self._download_lock = threading.RLock()
+        self._download_cancelled = None
+        self._shared_multiline = None
         self.cache = Cache(self)
         self.__header_cookies = []
 
@@ -841,6 +950,15 @@ def preload_download_archive(fn):
                 return fn
 
             self.write_debug(f'Loading archive file {fn!r}')
+            sqlite_path = SQLiteArchive.sqlite_path(fn)
+            if sqlite_path is not None:
+                archive = SQLiteArchive(sqlite_path)
+                self.add_close_hook(archive.close)
+                import_fn = self.params.get('import_download_archive')
+                if import_fn:
+                    self.to_screen(f'Imported {archive.import_text(import_fn)} entries '
+                                   f'from {import_fn!r} into the download archive')
+                return archive
             try:
                 with locked_file(fn, 'r', encoding='utf-8') as archive_file:
                     for line in archive_file:
@@ -875,6 +993,16 @@ def add_info_extractor(self, ie):
             self._ies_instances[ie_key] = ie
             ie.set_downloader(self)
 
+    def _suitable_ies(self, url):
+        """Yield the (ie_key, ie) of all extractors suitable for the URL, in order"""
+        # Extractors are only ever added, so a change in length means the index is stale
+        if self._ies_url_index is None or len(self._ies_url_index) != len(self._ies):
+            self._ies_url_index = URLIndex(self._ies)
+        for ie_key in self._ies_url_index.candidates(url):
+            ie = self._ies[ie_key]
+            if ie.suitable(url):
+                yield ie_key, ie
+
     def get_info_extractor(self, ie_key):
         """
         Get an instance of an IE with name ie_key, it will try to get one from
@@ -1224,34 +1352,13 @@ def _copy_infodict(info_dict):
         info_dict = dict(info_dict)
         info_dict.pop('__postprocessors', None)
         info_dict.pop('__pending_error', None)
+        info_dict.pop('__ffmpeg_planner', None)
         return info_dict
 
-    def prepare_outtmpl(self, outtmpl, info_dict, sanitize=False):
-        """ Make the outtmpl and info_dict suitable for substitution: ydl.escape_outtmpl(outtmpl) % info_dict
-        @param sanitize    Whether to sanitize the output as a filename
-        """
-
-        info_dict.setdefault('epoch', int(time.time()))  # keep epoch consistent once set
-
-        info_dict = self._copy_infodict(info_dict)
-        info_dict['duration_string'] = (  # %(duration>%H-%M-%S)s is wrong if duration > 24hrs
-            formatSeconds(info_dict['duration'], '-' if sanitize else ':')
-            if info_dict.get('duration', None) is not None
-            else None)
-        info_dict['autonumber'] = int(self.params.get('autonumber_start', 1) - 1 + self._num_downloads)
-        info_dict['video_autonumber'] = self._num_videos
-        if info_dict.get('resolution') is None:
-            info_dict['resolution'] = self.format_resolution(info_dict, default=None)
-
-        # For fields playlist_index, playlist_autonumber and autonumber convert all occurrences
-        # of %(field)s to %(field)0Nd for backward compatibility
-        field_size_compat_map = {
-            'playlist_index': number_of_digits(info_dict.get('__last_playlist_index') or 0),
-            'playlist_autonumber': number_of_digits(info_dict.get('n_entries') or 0),
-            'autonumber': self.params.get('autonumber_size') or 5,
-        }
-
-        TMPL_DICT = {}
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _compile_outtmpl(outtmpl):
+        """ Parse the outtmpl into a tuple of literal strings and _OuttmplField """
         EXTERNAL_FORMAT_RE = re.compile(STR_FORMAT_RE_TMPL.format('[^)]*', f'[{STR_FORMAT_TYPES}ljhqBUDS]'))
         MATH_FUNCTIONS = {
             '+': float.__add__,
@@ -1287,7 +1394,7 @@ def _from_user_input(field):
                 return int(field)
             return field
 
-        def _traverse_infodict(fields):
+        def parse_path(fields):
             fields = [f for x in re.split(r'\.({.+?})\.?', fields)
                       for f in ([x] if x.startswith('{') else x.split('.'))]
             for i in (0, -1):
@@ -1300,42 +1407,108 @@ def _traverse_infodict(fields):
                     continue
                 assert f.endswith('}'), f'No closing brace for {f} in {fields}'
                 fields[i] = {k: list(map(_from_user_input, k.split('.'))) for k in f[1:-1].split(',')}
+            return fields
+
+        def parse_maths(offset_key):
+            maths, operator = [], None
+            while offset_key:
+                item = re.match(
+                    MATH_FIELD_RE if operator else MATH_OPERATORS_RE,
+                    offset_key).group(0)
+                offset_key = offset_key[len(item):]
+                if operator is None:
+                    operator = MATH_FUNCTIONS[item]
+                    continue
+                item, multiplier = (item[1:], -1) if item[0] == '-' else (item, 1)
+                offset = float_or_none(item)
+                maths.append((operator, multiplier, offset, None if offset is not None else parse_path(item)))
+                operator = None
+            return maths
+
+        def parse_alternatives(key):
+            alternatives, mobj = [], INTERNAL_FORMAT_RE.match(key)
+            while mobj:
+                mobj = mobj.groupdict()
+                alternatives.append(_OuttmplAlternative(
+                    mobj['fields'], parse_path(mobj['fields']), bool(mobj['negate']), parse_maths(mobj['maths']),
+                    mobj['strf_format'] and mobj['strf_format'].replace('\\,', ','),
+                    mobj['replacement'], mobj['default'], bool(mobj['alternate'])))
+                mobj = mobj['alternate'] and INTERNAL_FORMAT_RE.match(mobj['remaining'][1:])
+            return alternatives
+
+        compiled, literal, last_end = [], '', 0
+        for mobj in EXTERNAL_FORMAT_RE.finditer(outtmpl):
+            literal += outtmpl[last_end:mobj.start()]
+            last_end = mobj.end()
+            if not mobj.group('has_key'):
+                literal += mobj.group(0)
+                continue
+            if literal:
+                compiled.append(literal)
+                literal = ''
+            key = mobj.group('key')
+            compiled.append(_OuttmplField(
+                mobj.group('prefix'), '{}\0{}'.format(key.replace('%', '%\0'), mobj.group('format')),
+                mobj.group('format'), mobj.group('conversion'), parse_alternatives(key)))
+        literal += outtmpl[last_end:]
+        if literal:
+            compiled.append(literal)
+        return tuple(compiled)
+
+    def prepare_outtmpl(self, outtmpl, info_dict, sanitize=False):
+        """ Make the outtmpl and info_dict suitable for substitution: ydl.escape_outtmpl(outtmpl) % info_dict
+        @param sanitize    Whether to sanitize the output as a filename
+        """
+
+        info_dict.setdefault('epoch', int(time.time()))  # keep epoch consistent once set
+
+        info_dict = self._copy_infodict(info_dict)
+        info_dict['duration_string'] = (  # %(duration>%H-%M-%S)s is wrong if duration > 24hrs
+            formatSeconds(info_dict['duration'], '-' if sanitize else ':')
+            if info_dict.get('duration', None) is not None
+            else None)
+        # The numbers are taken when the downloads start, since other threads may have started more since
+        num_downloads = (self._thread_state.url_downloads if self.params.get('break_per_url')
+                         else self._thread_state.autonumber or self._num_downloads)
+        info_dict['autonumber'] = int(self.params.get('autonumber_start', 1) - 1 + num_downloads)
+        info_dict['video_autonumber'] = self._num_videos
+        if info_dict.get('resolution') is None:
+            info_dict['resolution'] = self.format_resolution(info_dict, default=None)
+
+        # For fields playlist_index, playlist_autonumber and autonumber convert all occurrences
+        # of %(field)s to %(field)0Nd for backward compatibility
+        field_size_compat_map = {
+            'playlist_index': number_of_digits(info_dict.get('__last_playlist_index') or 0),
+            'playlist_autonumber': number_of_digits(info_dict.get('n_entries') or 0),
+            'autonumber': self.params.get('autonumber_size') or 5,
+        }
 
-            return traverse_obj(info_dict, fields, traverse_string=True)
+        def traverse_infodict(path):
+            if len(path) == 1 and isinstance(path[0], str):  # %(field)s
+                return info_dict.get(path[0])
+            return traverse_obj(info_dict, path, traverse_string=True)
 
-        def get_value(mdict):
+        def get_value(alternative):
             # Object traversal
-            value = _traverse_infodict(mdict['fields'])
+            value = traverse_infodict(alternative.path)
             # Negative
-            if mdict['negate']:
+            if alternative.negate:
                 value = float_or_none(value)
                 if value is not None:
                     value *= -1
             # Do maths
-            offset_key = mdict['maths']
-            if offset_key:
+            if alternative.maths:
                 value = float_or_none(value)
-                operator = None
-                while offset_key:
-                    item = re.match(
-                        MATH_FIELD_RE if operator else MATH_OPERATORS_RE,
-                        offset_key).group(0)
-                    offset_key = offset_key[len(item):]
-                    if operator is None:
-                        operator = MATH_FUNCTIONS[item]
-                        continue
-                    item, multiplier = (item[1:], -1) if item[0] == '-' else (item, 1)
-                    offset = float_or_none(item)
+                for operator, multiplier, offset, path in alternative.maths:
                     if offset is None:
-                        offset = float_or_none(_traverse_infodict(item))
+                        offset = float_or_none(traverse_infodict(path))
                     try:
                         value = operator(value, multiplier * offset)
                     except (TypeError, ZeroDivisionError):
                         return None
-                    operator = None
             # Datetime formatting
-            if mdict['strf_format']:
-                value = strftime_or_none(value, mdict['strf_format'].replace('\\,', ','))
+            if alternative.strf_format:
+                value = strftime_or_none(value, alternative.strf_format)
 
             # XXX: Workaround for https://github.com/yt-dlp/yt-dlp/issues/4485
             if sanitize and value == '':
@@ -1367,41 +1540,26 @@ def _dumpjson_default(obj):
                 return list(obj)
             return repr(obj)
 
-        class _ReplacementFormatter(string.Formatter):
-            def get_field(self, field_name, args, kwargs):
-                if field_name.isdigit():
-                    return args[0], -1
-                raise ValueError('Unsupported field')
-
-        replacement_formatter = _ReplacementFormatter()
-
-        def create_key(outer_mobj):
-            if not outer_mobj.group('has_key'):
-                return outer_mobj.group(0)
-            key = outer_mobj.group('key')
-            mobj = re.match(INTERNAL_FORMAT_RE, key)
+        def create_key(field):
             value, replacement, default, last_field = None, None, na, ''
-            while mobj:
-                mobj = mobj.groupdict()
-                default = mobj['default'] if mobj['default'] is not None else default
-                value = get_value(mobj)
-                last_field, replacement = mobj['fields'], mobj['replacement']
-                if value is None and mobj['alternate']:
-                    mobj = re.match(INTERNAL_FORMAT_RE, mobj['remaining'][1:])
-                else:
+            for alternative in field.alternatives:
+                default = alternative.default if alternative.default is not None else default
+                value = get_value(alternative)
+                last_field, replacement = alternative.fields, alternative.replacement
+                if value is not None or not alternative.alternate:
                     break
 
             if None not in (value, replacement):
                 try:
-                    value = replacement_formatter.format(replacement, value)
+                    value = _REPLACEMENT_FORMATTER.format(replacement, value)
                 except ValueError:
                     value, default = None, na
 
-            fmt = outer_mobj.group('format')
+            fmt = field.format
             if fmt == 's' and last_field in field_size_compat_map and isinstance(value, int):
                 fmt = f'0{field_size_compat_map[last_field]:d}d'
 
-            flags = outer_mobj.group('conversion') or ''
+            flags = field.conversion or ''
             str_fmt = f'{fmt[:-1]}s'
             if value is None:
                 value, fmt = default, 's'
@@ -1451,11 +1609,14 @@ def create_key(outer_mobj):
                 if fmt[-1] in 'csra':
                     value = sanitize(last_field, value)
 
-            key = '{}\0{}'.format(key.replace('%', '%\0'), outer_mobj.group('format'))
-            TMPL_DICT[key] = value
-            return '{prefix}%({key}){fmt}'.format(key=key, fmt=fmt, prefix=outer_mobj.group('prefix'))
+            TMPL_DICT[field.key] = value
+            return f'{field.prefix}%({field.key}){fmt}'
 
-        return EXTERNAL_FORMAT_RE.sub(create_key, outtmpl), TMPL_DICT
+        TMPL_DICT = {}
+        outtmpl = ''.join(
+            part if isinstance(part, str) else create_key(part)
+            for part in self._compile_outtmpl(outtmpl))
+        return outtmpl, TMPL_DICT
 
     def evaluate_outtmpl(self, outtmpl, info_dict, *args, **kwargs):
         outtmpl, info_dict = self.prepare_outtmpl(outtmpl, info_dict, *args, **kwargs)
@@ -1635,14 +1796,12 @@ def extract_info(self, url, download=True, ie_key=None, extra_info=None,
             ie_key = 'Generic'
 
         if ie_key:
-            ies = {ie_key: self._ies[ie_key]} if ie_key in self._ies else {}
+            ie = self._ies.get(ie_key)
+            ies = [(ie_key, ie)] if ie and ie.suitable(url) else []
         else:
-            ies = self._ies
-
-        for key, ie in ies.items():
-            if not ie.suitable(url):
-                continue
+            ies = self._suitable_ies(url)
 
+        for key, ie in ies:
             if not ie.working():
                 self.report_warning('The program functionality for this site has been marked as broken, '
                                     'and will probably not work.')
@@ -1939,22 +2098,22 @@ def process_ie_result(self, ie_result, download=True, extra_info=None):
             # Protect from infinite recursion due to recursively nested playlists
             # (see https://github.com/ytdl-org/youtube-dl/issues/27833)
             webpage_url = ie_result.get('webpage_url')  # Playlists maynot have webpage_url
-            if webpage_url and webpage_url in self._playlist_urls:
+            if webpage_url and webpage_url in self._thread_state.playlist_urls:
                 self.to_screen(
                     '[download] Skipping already downloaded playlist: {}'.format(
                         ie_result.get('title')) or ie_result.get('id'))
                 return
 
-            self._playlist_level += 1
-            self._playlist_urls.add(webpage_url)
+            self._thread_state.playlist_level += 1
+            self._thread_state.playlist_urls.add(webpage_url)
             self._fill_common_fields(ie_result, False)
             self._sanitize_thumbnails(ie_result)
             try:
                 return self.__process_playlist(ie_result, download)
             finally:
-                self._playlist_level -= 1
-                if not self._playlist_level:
-                    self._playlist_urls.clear()
+                self._thread_state.playlist_level -= 1
+                if not self._thread_state.playlist_level:
+                    self._thread_state.playlist_urls.clear()
         elif result_type == 'compat_list':
             self.report_warning(
                 'Extractor {} returned a compat_list result. '
@@ -2021,7 +2180,7 @@ def __process_playlist(self, ie_result, download):
         self.to_screen(f'[download] Downloading {ie_result["_type"]}: {title}')
 
         all_entries = PlaylistEntries(self, ie_result)
-        entries = orderedSet(all_entries.get_requested_items(), lazy=True)
+        entries = all_entries.get_requested_items()
 
         lazy = self.params.get('lazy_playlist')
         if lazy:
@@ -2069,12 +2228,14 @@ def __process_playlist(self, ie_result, download):
             keep_resolved_entries = ie_result['_type'] != 'playlist'
         if keep_resolved_entries:
             self.write_debug('The information of all playlist entries will be held in memory')
+        elif lazy:
+            self.write_debug('Playlist entries will be discarded after they are processed')
 
         failures = 0
         max_failures = self.params.get('skip_playlist_after_errors') or float('inf')
         for i, (playlist_index, entry) in enumerate(entries):
             if lazy:
-                resolved_entries.append((playlist_index, entry))
+                resolved_entries.append((playlist_index, entry if keep_resolved_entries else None))
             if not entry:
                 continue
 
@@ -2242,11 +2403,14 @@ def _check_formats(self, formats, warning=True):
     def _select_formats(self, formats, selector):
         return list(selector({
             'formats': formats,
+            'format_index': _FormatIndex(formats),
             'has_merged_format': any('none' not in (f.get('acodec'), f.get('vcodec')) for f in formats),
             'incomplete_formats': (all(f.get('vcodec') == 'none' for f in formats)  # No formats with video
                                    or all(f.get('acodec') == 'none' for f in formats)),  # OR, No formats with audio
         }))
 
+    _NATIVE_MERGE_FORMAT_SPEC = 'bestvideo*[container=mp4_dash]+bestaudio[container=m4a_dash]/best'
+
     def _default_format_spec(self, info_dict):
         prefer_best = (
             self.params['outtmpl']['default'] == '-'
@@ -2256,11 +2420,14 @@ def can_merge():
             merger = FFmpegMergerPP(self)
             return merger.available and merger.can_merge()
 
+        # Without ffmpeg, only the fragmented MP4 formats of DASH can be merged
+        native_merge = False
         if not prefer_best and not can_merge():
-            prefer_best = True
+            native_merge = self.params.get('native_merge') is not False
+            prefer_best = not native_merge
             formats = self._get_formats(info_dict)
             evaluate_formats = lambda spec: self._select_formats(formats, self.build_format_selector(spec))
-            if evaluate_formats('b/bv+ba') != evaluate_formats('bv*+ba/b'):
+            if evaluate_formats(self._NATIVE_MERGE_FORMAT_SPEC if native_merge else 'b/bv+ba') != evaluate_formats('bv*+ba/b'):
                 self.report_warning('ffmpeg not found. The downloaded format may not be the best available. '
                                     'Installing ffmpeg is strongly recommended: https://github.com/yt-dlp/yt-dlp#dependencies')
 
@@ -2268,25 +2435,29 @@ def can_merge():
                   or 'format-spec' in self.params['compat_opts'])
 
         return ('best/bestvideo+bestaudio' if prefer_best
+                else self._NATIVE_MERGE_FORMAT_SPEC if native_merge
                 else 'bestvideo+bestaudio/best' if compat
                 else 'bestvideo*+bestaudio/best')
 
     def build_format_selector(self, format_spec):
+        allow_multiple_streams = {'audio': self.params.get('allow_multiple_audio_streams', False),
+                                  'video': self.params.get('allow_multiple_video_streams', False)}
+        # The same few format specs are used for every video
+        key = (format_spec, allow_multiple_streams['audio'], allow_multiple_streams['video'])
+        if key not in self._format_selectors:
+            self._format_selectors[key] = self._build_format_selector(
+                self._parse_format_spec(format_spec), allow_multiple_streams)
+        return self._format_selectors[key]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _parse_format_spec(format_spec):
         def syntax_error(note, start):
             message = (
                 'Invalid format specification: '
                 '{}\n\t{}\n\t{}^'.format(note, format_spec, ' ' * start[1]))
             return SyntaxError(message)
 
-        PICKFIRST = 'PICKFIRST'
-        MERGE = 'MERGE'
-        SINGLE = 'SINGLE'
-        GROUP = 'GROUP'
-        FormatSelector = collections.namedtuple('FormatSelector', ['type', 'selector', 'filters'])
-
-        allow_multiple_streams = {'audio': self.params.get('allow_multiple_audio_streams', False),
-                                  'video': self.params.get('allow_multiple_video_streams', False)}
-
         def _parse_filter(tokens):
             filter_parts = []
             for type_, string_, _start, _, _ in tokens:
@@ -2384,6 +2555,42 @@ def _parse_format_selection(tokens, inside_merge=False, inside_choice=False, ins
                 selectors.append(current_selector)
             return selectors
 
+        # HACK: Python 3.12 changed the underlying parser, rendering '7_a' invalid
+        #       Prefix numbers with random letters to avoid it being classified as a number
+        #       See: https://github.com/yt-dlp/yt-dlp/pulls/8797
+        # TODO: Implement parser not reliant on tokenize.tokenize
+        prefix = ''.join(random.choices(string.ascii_letters, k=32))
+        stream = io.BytesIO(re.sub(r'\d[_\d]*', rf'{prefix}\g<0>', format_spec).encode())
+        try:
+            tokens = list(_remove_unused_ops(
+                token._replace(string=token.string.replace(prefix, ''))
+                for token in tokenize.tokenize(stream.readline)))
+        except tokenize.TokenError:
+            raise syntax_error('Missing closing/opening brackets or parenthesis', (0, len(format_spec)))
+
+        class TokenIterator:
+            def __init__(self, tokens):
+                self.tokens = tokens
+                self.counter = 0
+
+            def __iter__(self):
+                return self
+
+            def __next__(self):
+                if self.counter >= len(self.tokens):
+                    raise StopIteration
+                value = self.tokens[self.counter]
+                self.counter += 1
+                return value
+
+            next = __next__
+
+            def restore_last_token(self):
+                self.counter -= 1
+
+        return _parse_format_selection(iter(TokenIterator(tokens)))
+
+    def _build_format_selector(self, parsed_selector, allow_multiple_streams):
         def _merge(formats_pair):
             format_1, format_2 = formats_pair
 
@@ -2473,6 +2680,12 @@ def _check_formats(formats):
                 else:
                     yield f
 
+        def get_format_index(ctx):
+            index = ctx.get('format_index')
+            if index is None or index.formats is not ctx['formats']:
+                index = _FormatIndex(ctx['formats'])
+            return index
+
         def _build_selector_function(selector):
             if isinstance(selector, list):  # ,
                 fs = [_build_selector_function(s) for s in selector]
@@ -2533,6 +2746,7 @@ def selector_function(ctx):
                         format_modified = mobj.group('mod') is not None
 
                         format_fallback = not format_type and not format_modified  # for b, w
+                        match_key = (format_type, format_modified)
                         _filter_f = (
                             (lambda f: f.get(f'{format_type}codec') != 'none')
                             if format_type and format_modified  # bv*, ba*, wv*, wa*
@@ -2544,6 +2758,7 @@ def selector_function(ctx):
                         filter_f = lambda f: _filter_f(f) and (
                             f.get('vcodec') != 'none' or f.get('acodec') != 'none')
                     else:
+                        match_key = ('ext', format_spec)
                         if format_spec in self._format_selection_exts['audio']:
                             filter_f = lambda f: f.get('ext') == format_spec and f.get('acodec') != 'none'
                         elif format_spec in self._format_selection_exts['video']:
@@ -2552,11 +2767,13 @@ def selector_function(ctx):
                         elif format_spec in self._format_selection_exts['storyboards']:
                             filter_f = lambda f: f.get('ext') == format_spec and f.get('acodec') == 'none' and f.get('vcodec') == 'none'
                         else:
-                            filter_f = lambda f: f.get('format_id') == format_spec  # id
+                            filter_f = None  # id
 
                     def selector_function(ctx):
-                        formats = list(ctx['formats'])
-                        matches = list(filter(filter_f, formats)) if filter_f is not None else formats
+                        index = get_format_index(ctx)
+                        formats = index.formats
+                        matches = (index.matching(match_key, filter_f) if filter_f is not None
+                                   else index.with_id(format_spec))
                         if not matches:
                             if format_fallback and ctx['incomplete_formats']:
                                 # for extractors with incomplete formats (audio only (soundcloud)
@@ -2572,49 +2789,17 @@ def selector_function(ctx):
                         except LazyList.IndexError:
                             return
 
-            filters = [self._build_format_filter(f) for f in selector.filters]
+            filters = [(f, self._build_format_filter(f)) for f in selector.filters]
 
             def final_selector(ctx):
                 ctx_copy = dict(ctx)
-                for _filter in filters:
-                    ctx_copy['formats'] = list(filter(_filter, ctx_copy['formats']))
+                index = get_format_index(ctx)
+                for filter_spec, _filter in filters:
+                    index = index.filtered(filter_spec, _filter)
+                ctx_copy['formats'], ctx_copy['format_index'] = index.formats, index
                 return selector_function(ctx_copy)
             return final_selector
 
-        # HACK: Python 3.12 changed the underlying parser, rendering '7_a' invalid
-        #       Prefix numbers with random letters to avoid it being classified as a number
-        #       See: https://github.com/yt-dlp/yt-dlp/pulls/8797
-        # TODO: Implement parser not reliant on tokenize.tokenize
-        prefix = ''.join(random.choices(string.ascii_letters, k=32))
-        stream = io.BytesIO(re.sub(r'\d[_\d]*', rf'{prefix}\g<0>', format_spec).encode())
-        try:
-            tokens = list(_remove_unused_ops(
-                token._replace(string=token.string.replace(prefix, ''))
-                for token in tokenize.tokenize(stream.readline)))
-        except tokenize.TokenError:
-            raise syntax_error('Missing closing/opening brackets or parenthesis', (0, len(format_spec)))
-
-        class TokenIterator:
-            def __init__(self, tokens):
-                self.tokens = tokens
-                self.counter = 0
-
-            def __iter__(self):
-                return self
-
-            def __next__(self):
-                if self.counter >= len(self.tokens):
-                    raise StopIteration
-                value = self.tokens[self.counter]
-                self.counter += 1
-                return value
-
-            next = __next__
-
-            def restore_last_token(self):
-                self.counter -= 1
-
-        parsed_selector = _parse_format_selection(iter(TokenIterator(tokens)))
         return _build_selector_function(parsed_selector)
 
     def _calc_headers(self, info_dict, load_cookies=False):
@@ -2763,8 +2948,18 @@ def _raise_pending_errors(self, info):
 
     def sort_formats(self, info_dict):
         formats = self._get_formats(info_dict)
-        formats.sort(key=FormatSorter(
-            self, info_dict.get('_format_sort_fields') or []).calculate_preference)
+        formats.sort(key=self._get_format_sorter(info_dict.get('_format_sort_fields') or []).calculate_preference)
+
+    def _get_format_sorter(self, field_preference):
+        # The sort order is the same for most videos, so it is resolved only once
+        key = (tuple(field_preference), tuple(self.params.get('format_sort') or ()),
+               self.params.get('format_sort_force'), self.params.get('prefer_free_formats'))
+        sorter = self._format_sorters.get(key)
+        if sorter is None:
+            sorter = self._format_sorters[key] = FormatSorter(self, field_preference)
+        elif self.params.get('verbose'):
+            sorter.print_verbose_info(self.write_debug)
+        return sorter
 
     def process_video_result(self, info_dict, download=True):
         assert info_dict.get('_type', 'video') == 'video'
@@ -3285,7 +3480,15 @@ def replace_info_dict(new_info):
 
         new_info, _ = self.pre_process(info_dict, 'video')
         replace_info_dict(new_info)
-        self._num_downloads += 1
+        with self._download_lock:
+            # Concurrent downloads must not start once the queue has been stopped
+            if self._download_cancelled:
+                raise type(self._download_cancelled)(*self._download_cancelled.args)
+            if self._max_downloads_reached():
+                raise MaxDownloadsReached
+            self._num_downloads += 1
+            self._thread_state.url_downloads += 1
+            self._thread_state.autonumber = self._num_downloads
 
         # info_dict['_filename'] needs to be set for backward compatibility
         info_dict['_filename'] = full_filename = self.prepare_filename(info_dict, warn=True)
@@ -3296,7 +3499,7 @@ def replace_info_dict(new_info):
         self.__forced_printings(info_dict, full_filename, incomplete=('format' not in info_dict))
 
         def check_max_downloads():
-            if self._num_downloads >= float(self.params.get('max_downloads') or 'inf'):
+            if self._max_downloads_reached():
                 raise MaxDownloadsReached
 
         if self.params.get('simulate'):
@@ -3464,11 +3667,21 @@ def correct_ext(filename, ext=new_ext):
                     info_dict['requested_formats'] = list(map(dict, info_dict['requested_formats']))
 
                     merger = FFmpegMergerPP(self)
+                    native_merge = self.params.get('native_merge')
+                    if ((not merger.available if native_merge is None else native_merge)
+                            and temp_filename != '-' and MP4MergerPP.can_merge(info_dict)):
+                        merger = MP4MergerPP(self)
+                    merged_by_fd = fd == FFmpegFD or (
+                        fd == DashSegmentsFD and DashSegmentsFD.can_merge_formats(info_dict, self.params))
+                    if self.params.get('merge_during_download') and not merged_by_fd and dl_filename is None:
+                        self.report_warning(
+                            'Formats can only be merged while downloading if all of them are MP4 formats '
+                            'downloaded as DASH fragments. The formats will be merged after the download')
                     downloaded = []
                     if dl_filename is not None:
                         self.report_file_already_downloaded(dl_filename)
                     elif fd:
-                        for f in info_dict['requested_formats'] if fd != FFmpegFD else []:
+                        for f in info_dict['requested_formats'] if not merged_by_fd else []:
                             f['filepath'] = fname = prepend_extension(
                                 correct_ext(temp_filename, info_dict['ext']),
                                 'f{}'.format(f['format_id']), info_dict['ext'])
@@ -3622,9 +3835,15 @@ def ffmpeg_fixup(cndn, msg, cls):
             info_dict['__write_download_archive'] = True
         check_max_downloads()
 
+    def _max_downloads_reached(self):
+        # With break_per_url, --max-downloads applies to each input URL
+        num_downloads = self._thread_state.url_downloads if self.params.get('break_per_url') else self._num_downloads
+        return num_downloads >= float(self.params.get('max_downloads') or 'inf')
+
     def __download_wrapper(self, func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            self._thread_state.url_downloads = 0
             try:
                 res = func(*args, **kwargs)
             except CookieLoadError:
@@ -3635,7 +3854,6 @@ def wrapper(*args, **kwargs):
                 self.to_screen(f'[info] {e}')
                 if not self.params.get('break_per_url'):
                     raise
-                self._num_downloads = 0
             else:
                 if self.params.get('dump_single_json', False):
                     self.post_extract(res)
@@ -3652,12 +3870,72 @@ def download(self, url_list):
                 and self.params.get('max_downloads') != 1):
             raise SameFileError(outtmpl)
 
-        for url in url_list:
-            self.__download_wrapper(self.extract_info)(
-                url, force_generic_extractor=self.params.get('force_generic_extractor', False))
+        download = functools.partial(
+            self.__download_wrapper(self.extract_info),
+            force_generic_extractor=self.params.get('force_generic_extractor', False))
+        workers = min(self.params.get('concurrent_downloads') or 1, len(url_list))
+        if workers > 1:
+            self.__download_concurrently(download, url_list, workers)
+        else:
+            for url in url_list:
+                download(url)
 
         return self._download_retcode
 
+    def __download_concurrently(self, func, items, workers):
+        """Call func for each item using a pool of worker threads, each with its own progress line"""
+        free_lines = list(range(workers))
+
+        def cancel(reason):
+            with self._download_lock:
+                self._download_cancelled = self._download_cancelled or reason
+
+        def worker(item):
+            with self._download_lock:
+                if self._download_cancelled:
+                    return
+                self._thread_state.progress_line = free_lines.pop(0)
+            try:
+                func(item)
+            except DownloadCancelled as e:
+                cancel(e)
+                raise
+            except BaseException:
+                cancel(DownloadCancelled())
+                raise
+            finally:
+                with self._download_lock:
+                    free_lines.append(self._thread_state.progress_line)
+                    self._thread_state.progress_line = None
+
+        self._download_cancelled, interrupted = None, False
+        if not self.params.get('noprogress'):
+            self._shared_multiline = FileDownloader.create_multiline_printer(self, self.params, workers)
+        pool = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix='yt-dlp-download')
+        try:
+            for future in [pool.submit(worker, item) for item in items]:
+                future.result()
+        except KeyboardInterrupt:
+            interrupted = True
+            cancel(DownloadCancelled())
+            self.report_error(
+                'Interrupted by user. Waiting for the current downloads to finish...', is_error=False, tb=False)
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        except BaseException:
+            # The other workers stop before starting their next download
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        else:
+            pool.shutdown(wait=True)
+        finally:
+            if self._shared_multiline:
+                self._shared_multiline.end()
+                self._shared_multiline = None
+            # Threads that are still running after an interrupt should not start new downloads
+            if not interrupted:
+                self._download_cancelled = None
+
     def download_with_info_file(self, info_filename):
         with contextlib.closing(fileinput.FileInput(
                 [info_filename], mode='r',
@@ -3759,20 +4037,26 @@ def run_pp(self, pp, infodict):
                 return infodict
             raise
 
+        self._delete_pp_files(files_to_delete, infodict)
+        return infodict
+
+    def _delete_pp_files(self, files_to_delete, infodict):
         if not files_to_delete:
-            return infodict
+            return
         if self.params.get('keepvideo', False):
             for f in files_to_delete:
                 infodict['__files_to_move'].setdefault(f, '')
         else:
             self._delete_downloaded_files(
                 *files_to_delete, info=infodict, msg='Deleting original file %s (pass -k to keep)')
-        return infodict
 
     def run_all_pps(self, key, info, *, additional_pps=None):
         if key != 'video':
             self._forceprint(key, info)
-        for pp in (additional_pps or []) + self._pps[key]:
+        pps = (additional_pps or []) + self._pps[key]
+        if key == 'post_process' and 'no-batched-ffmpeg' not in self.params['compat_opts']:
+            return FFmpegPassPlanner(self).run(pps, info)
+        for pp in pps:
             info = self.run_pp(pp, info)
         return info
 
@@ -3808,11 +4092,8 @@ def _make_archive_id(self, info_dict):
             if not url:
                 return
             # Try to find matching extractor for the URL and take its ie_key
-            for ie_key, ie in self._ies.items():
-                if ie.suitable(url):
-                    extractor = ie_key
-                    break
-            else:
+            extractor = next((ie_key for ie_key, _ in self._suitable_ies(url)), None)
+            if extractor is None:
                 return
         return make_archive_id(extractor, video_id)
 
@@ -3832,10 +4113,11 @@ def record_download_archive(self, info_dict):
         assert vid_id
 
         self.write_debug(f'Adding to archive: {vid_id}')
-        if is_path_like(fn):
-            with locked_file(fn, 'a', encoding='utf-8') as archive_file:
-                archive_file.write(vid_id + '\n')
-        self.archive.add(vid_id)
+        with self._download_lock:
+            if is_path_like(fn) and not isinstance(self.archive, SQLiteArchive):
+                with locked_file(fn, 'a', encoding='utf-8') as archive_file:
+                    archive_file.write(vid_id + '\n')
+            self.archive.add(vid_id)
 
     @staticmethod
     def format_resolution(format, default='unknown'):
@@ -4213,6 +4495,21 @@ def _unavailable_targets_message(requested_targets, note=None, is_error=False):
 
     def urlopen(self, req):
         """ Start an HTTP download """
+        req = self._prepare_request(req)
+        with self._translate_request_errors(req):
+            return self._request_director.send(req)
+
+    async def urlopen_async(self, req):
+        """
+        Start an HTTP download from a coroutine
+
+        Returns a yt_dlp.networking.common.AsyncResponse, whose body is read with coroutines
+        """
+        req = self._prepare_request(req)
+        with self._translate_request_errors(req):
+            return await self._request_director.send_async(req)
+
+    def _prepare_request(self, req):
         if isinstance(req, str):
             req = Request(req)
         elif isinstance(req, urllib.request.Request):
@@ -4230,9 +4527,12 @@ def urlopen(self, req):
 
         clean_proxies(proxies=req.proxies, headers=req.headers)
         clean_headers(req.headers)
+        return req
 
+    @contextlib.contextmanager
+    def _translate_request_errors(self, req):
         try:
-            return self._request_director.send(req)
+            yield
         except NoSupportingHandlers as e:
             for ue in e.unsupported_errors:
                 # FIXME: This depends on the order of errors.
@@ -4282,7 +4582,14 @@ def build_request_director(self, handlers, preferences=None):
         clean_headers(headers)
         clean_proxies(proxies, headers)
 
-        director = RequestDirector(logger=logger, verbose=self.params.get('debug_printtraffic'))
+        # Connections are only kept alive when concurrent downloads from the same host are asked for
+        max_connections_per_host = max(
+            self.params.get('concurrent_fragment_downloads') or 1, self.params.get('http_connections') or 1)
+        if max_connections_per_host == 1:
+            max_connections_per_host = None
+
+        director = RequestDirector(
+            logger=logger, verbose=self.params.get('debug_printtraffic'), rate_limiter=self.rate_limiter)
         for handler in handlers:
             director.add_handler(handler(
                 logger=logger,
@@ -4291,6 +4598,7 @@ def build_request_director(self, handlers, preferences=None):
                 proxies=proxies,
                 prefer_system_certs='no-certifi' in self.params['compat_opts'],
                 verify=not self.params.get('nocheckcertificate'),
+                max_connections_per_host=max_connections_per_host,
                 **traverse_obj(self.params, {
                     'verbose': 'debug_printtraffic',
                     'source_address': 'source_address',
@@ -4314,6 +4622,11 @@ def build_request_director(self, handlers, preferences=None):
     def _request_director(self):
         return self.build_request_director(_REQUEST_HANDLERS.values(), _RH_PREFERENCES)
 
+    @functools.cached_property
+    def rate_limiter(self):
+        """Limits of the bandwidth and request rate, shared with the other instances that have the same limits"""
+        return RateLimiter(self.params.get('shared_ratelimit'), self.params.get('request_ratelimit'))
+
     def encode(self, s):
         if isinstance(s, bytes):
             return s  # Already encoded
@@ -14,6 +14,7 @@
 import re
 import traceback
 
+from .archive import SQLiteArchive
 from .cookies import SUPPORTED_BROWSERS, SUPPORTED_KEYRINGS, CookieLoadError
 from .downloader.external import get_external_downloader
 from .extractor import list_extractor_classes
@@ -212,6 +213,8 @@ def validate_minmax(min_val, max_val, min_name, max_name=None):
     validate_positive('autonumber start', opts.autonumber_start)
     validate_positive('autonumber size', opts.autonumber_size, True)
     validate_positive('concurrent fragments', opts.concurrent_fragment_downloads, True)
+    validate_positive('concurrent downloads', opts.concurrent_downloads, True)
+    validate_positive('http connections', opts.http_connections, True)
     validate_positive('playlist start', opts.playliststart, True)
     if opts.playlistend != -1:
         validate_minmax(opts.playliststart, opts.playlistend, 'playlist start', 'playlist end')
@@ -219,6 +222,10 @@ def validate_minmax(min_val, max_val, min_name, max_name=None):
     # Time ranges
     validate_positive('subtitles sleep interval', opts.sleep_interval_subtitles)
     validate_positive('requests sleep interval', opts.sleep_interval_requests)
+    for scope, rate in opts.request_ratelimit.items():
+        opts.request_ratelimit[scope] = float_or_none(rate)
+        validate(opts.request_ratelimit[scope] is not None, f'{scope} request rate limit', rate)
+        validate_positive(f'{scope} request rate limit', opts.request_ratelimit[scope], True)
     validate_positive('sleep interval', opts.sleep_interval)
     validate_positive('max sleep interval', opts.max_sleep_interval)
     if opts.sleep_interval is None:
@@ -310,11 +317,16 @@ def validate_bytes(name, value, strict_positive=False):
         return numeric_limit
 
     opts.ratelimit = validate_bytes('rate limit', opts.ratelimit, True)
+    opts.shared_ratelimit = {
+        scope: validate_bytes(f'{scope} shared rate limit', limit, True)
+        for scope, limit in opts.shared_ratelimit.items()}
     opts.throttledratelimit = validate_bytes('throttled rate limit', opts.throttledratelimit)
     opts.min_filesize = validate_bytes('min filesize', opts.min_filesize)
     opts.max_filesize = validate_bytes('max filesize', opts.max_filesize)
     opts.buffersize = validate_bytes('buffer size', opts.buffersize, True)
     opts.http_chunk_size = validate_bytes('http chunk size', opts.http_chunk_size)
+    opts.fragment_memory_limit = validate_bytes('fragment memory limit', opts.fragment_memory_limit)
+    opts.fragment_reorder_limit = validate_bytes('fragment reorder limit', opts.fragment_reorder_limit)
 
     # Output templates
     def validate_outtmpl(tmpl, msg):
@@ -463,7 +475,14 @@ def metadataparser_actions(f):
     opts.match_filter = match_filter_func(opts.match_filter, opts.breaking_match_filter)
 
     if opts.download_archive is not None:
-        opts.download_archive = expand_path(opts.download_archive)
+        sqlite_path = SQLiteArchive.sqlite_path(opts.download_archive)
+        opts.download_archive = (
+            expand_path(opts.download_archive) if sqlite_path is None
+            else SQLiteArchive.SCHEME + expand_path(sqlite_path))
+    if opts.import_download_archive is not None:
+        validate(SQLiteArchive.sqlite_path(opts.download_archive) is not None, 'download archive', opts.download_archive,
+                 '--import-download-archive requires a "sqlite:FILE" --download-archive')
+        opts.import_download_archive = expand_path(opts.import_download_archive)
 
     if opts.ffmpeg_location is not None:
         opts.ffmpeg_location = expand_path(opts.ffmpeg_location)
@@ -856,6 +875,7 @@ def parse_options(argv=None):
         'force_generic_extractor': opts.force_generic_extractor,
         'allowed_extractors': opts.allowed_extractors or ['default'],
         'ratelimit': opts.ratelimit,
+        'shared_ratelimit': opts.shared_ratelimit,
         'throttledratelimit': opts.throttledratelimit,
         'overwrites': opts.overwrites,
         'retries': opts.retries,
@@ -865,7 +885,12 @@ def parse_options(argv=None):
         'retry_sleep_functions': opts.retry_sleep,
         'skip_unavailable_fragments': opts.skip_unavailable_fragments,
         'keep_fragments': opts.keep_fragments,
+        'fragment_memory_limit': opts.fragment_memory_limit,
+        'fragment_reorder_limit': opts.fragment_reorder_limit,
         'concurrent_fragment_downloads': opts.concurrent_fragment_downloads,
+        'async_fragment_downloads': opts.async_fragment_downloads,
+        'concurrent_downloads': opts.concurrent_downloads,
+        'http_connections': opts.http_connections,
         'buffersize': opts.buffersize,
         'noresizebuffer': opts.noresizebuffer,
         'http_chunk_size': opts.http_chunk_size,
@@ -922,6 +947,7 @@ def parse_options(argv=None):
         'youtube_print_sig_code': opts.youtube_print_sig_code,
         'age_limit': opts.age_limit,
         'download_archive': opts.download_archive,
+        'import_download_archive': opts.import_download_archive,
         'break_on_existing': opts.break_on_existing,
         'break_on_reject': opts.break_on_reject,
         'break_per_url': opts.break_per_url,
@@ -950,6 +976,8 @@ def parse_options(argv=None):
         'wait_for_video': opts.wait_for_video,
         'mark_watched': opts.mark_watched,
         'merge_output_format': opts.merge_output_format,
+        'native_merge': opts.native_merge,
+        'merge_during_download': opts.merge_during_download,
         'final_ext': final_ext,
         'postprocessors': postprocessors,
         'fixup': opts.fixup,
@@ -957,6 +985,7 @@ def parse_options(argv=None):
         'impersonate': opts.impersonate,
         'call_home': opts.call_home,
         'sleep_interval_requests': opts.sleep_interval_requests,
+        'request_ratelimit': opts.request_ratelimit,
         'sleep_interval': opts.sleep_interval,
         'max_sleep_interval': opts.max_sleep_interval,
         'sleep_interval_subtitles': opts.sleep_interval_subtitles,
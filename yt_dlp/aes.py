@@ -1,4 +1,6 @@
 import base64
+import functools
+import struct
 from math import ceil
 
 from .compat import compat_ord
@@ -16,11 +18,11 @@ def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
 else:
     def aes_cbc_decrypt_bytes(data, key, iv):
         """ Decrypt bytes with AES-CBC using native implementation since pycryptodome is unavailable """
-        return bytes(aes_cbc_decrypt(*map(list, (data, key, iv))))
+        return _cbc_decrypt(bytes(data), bytes(key), bytes(iv))
 
     def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
         """ Decrypt bytes with AES-GCM using native implementation since pycryptodome is unavailable """
-        return bytes(aes_gcm_decrypt_and_verify(*map(list, (data, key, tag, nonce))))
+        return _gcm_decrypt_and_verify(bytes(data), bytes(key), bytes(tag), bytes(nonce))
 
 
 def aes_cbc_encrypt_bytes(data, key, iv, **kwargs):
@@ -82,15 +84,10 @@ def aes_ecb_encrypt(data, key, iv=None):
     @param {int[]} iv          Unused for this mode
     @returns {int[]}           encrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = ceil(len(data) / BLOCK_SIZE_BYTES)
-
-    encrypted_data = []
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        encrypted_data += aes_encrypt(pkcs7_padding(block), expanded_key)
-
-    return encrypted_data
+    data = list(data)
+    if len(data) % BLOCK_SIZE_BYTES:
+        data = pkcs7_padding(data)
+    return list(_encrypt_blocks(bytes(data), _round_keys(bytes(key))))
 
 
 def aes_ecb_decrypt(data, key, iv=None):
@@ -102,14 +99,7 @@ def aes_ecb_decrypt(data, key, iv=None):
     @param {int[]} iv          Unused for this mode
     @returns {int[]}           decrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = ceil(len(data) / BLOCK_SIZE_BYTES)
-
-    encrypted_data = []
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        encrypted_data += aes_decrypt(block, expanded_key)
-    return encrypted_data[:len(data)]
+    return list(_decrypt_blocks(_zero_pad(bytes(data)), _round_keys(bytes(key)))[:len(data)])
 
 
 def aes_ctr_decrypt(data, key, iv):
@@ -133,19 +123,7 @@ def aes_ctr_encrypt(data, key, iv):
     @param {int[]} iv          16-Byte initialization vector
     @returns {int[]}           encrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = ceil(len(data) / BLOCK_SIZE_BYTES)
-    counter = iter_vector(iv)
-
-    encrypted_data = []
-    for i in range(block_count):
-        counter_block = next(counter)
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block += [0] * (BLOCK_SIZE_BYTES - len(block))
-
-        cipher_counter_block = aes_encrypt(counter_block, expanded_key)
-        encrypted_data += xor(block, cipher_counter_block)
-    return encrypted_data[:len(data)]
+    return list(_ctr_crypt(bytes(data), bytes(key), bytes(iv)))
 
 
 def aes_cbc_decrypt(data, key, iv):
@@ -157,19 +135,7 @@ def aes_cbc_decrypt(data, key, iv):
     @param {int[]} iv          16-Byte IV
     @returns {int[]}           decrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = ceil(len(data) / BLOCK_SIZE_BYTES)
-
-    decrypted_data = []
-    previous_cipher_block = iv
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block += [0] * (BLOCK_SIZE_BYTES - len(block))
-
-        decrypted_block = aes_decrypt(block, expanded_key)
-        decrypted_data += xor(decrypted_block, previous_cipher_block)
-        previous_cipher_block = block
-    return decrypted_data[:len(data)]
+    return list(_cbc_decrypt(bytes(data), bytes(key), bytes(iv)))
 
 
 def aes_cbc_encrypt(data, key, iv, *, padding_mode='pkcs7'):
@@ -182,23 +148,20 @@ def aes_cbc_encrypt(data, key, iv, *, padding_mode='pkcs7'):
     @param padding_mode        Padding mode to use
     @returns {int[]}           encrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = ceil(len(data) / BLOCK_SIZE_BYTES)
-
-    encrypted_data = []
-    previous_cipher_block = iv
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block = pad_block(block, padding_mode)
-
-        mixed_block = xor(block, previous_cipher_block)
-
-        encrypted_block = aes_encrypt(mixed_block, expanded_key)
-        encrypted_data += encrypted_block
-
-        previous_cipher_block = encrypted_block
-
-    return encrypted_data
+    data = list(data)
+    remainder = len(data) % BLOCK_SIZE_BYTES
+    if remainder:
+        data = data[:-remainder] + pad_block(data[-remainder:], padding_mode)
+
+    enc_key, _, rounds = _round_keys(bytes(key))
+    words = struct.unpack(f'>{len(data) // 4}I', bytes(data))
+    p0, p1, p2, p3 = struct.unpack('>4I', bytes(iv))
+    encrypted = []
+    for i in range(0, len(words), 4):
+        p0, p1, p2, p3 = _encrypt_block(
+            words[i] ^ p0, words[i + 1] ^ p1, words[i + 2] ^ p2, words[i + 3] ^ p3, enc_key, rounds)
+        encrypted += (p0, p1, p2, p3)
+    return list(struct.pack(f'>{len(encrypted)}I', *encrypted))
 
 
 def aes_gcm_decrypt_and_verify(data, key, tag, nonce):
@@ -211,37 +174,7 @@ def aes_gcm_decrypt_and_verify(data, key, tag, nonce):
     @param {int[]} nonce       IV (recommended 12-Byte)
     @returns {int[]}           decrypted data
     """
-
-    # XXX: check aes, gcm param
-
-    hash_subkey = aes_encrypt([0] * BLOCK_SIZE_BYTES, key_expansion(key))
-
-    if len(nonce) == 12:
-        j0 = [*nonce, 0, 0, 0, 1]
-    else:
-        fill = (BLOCK_SIZE_BYTES - (len(nonce) % BLOCK_SIZE_BYTES)) % BLOCK_SIZE_BYTES + 8
-        ghash_in = nonce + [0] * fill + list((8 * len(nonce)).to_bytes(8, 'big'))
-        j0 = ghash(hash_subkey, ghash_in)
-
-    # TODO: add nonce support to aes_ctr_decrypt
-
-    # nonce_ctr = j0[:12]
-    iv_ctr = inc(j0)
-
-    decrypted_data = aes_ctr_decrypt(data, key, iv_ctr + [0] * (BLOCK_SIZE_BYTES - len(iv_ctr)))
-    pad_len = (BLOCK_SIZE_BYTES - (len(data) % BLOCK_SIZE_BYTES)) % BLOCK_SIZE_BYTES
-    s_tag = ghash(
-        hash_subkey,
-        data
-        + [0] * pad_len                                  # pad
-        + list((0 * 8).to_bytes(8, 'big')                # length of associated data
-               + ((len(data) * 8).to_bytes(8, 'big'))),  # length of data
-    )
-
-    if tag != aes_ctr_encrypt(s_tag, key, j0):
-        raise ValueError('Mismatching authentication tag')
-
-    return decrypted_data
+    return list(_gcm_decrypt_and_verify(bytes(data), bytes(key), bytes(tag), bytes(nonce)))
 
 
 def aes_encrypt(data, expanded_key):
@@ -252,17 +185,11 @@ def aes_encrypt(data, expanded_key):
     @param {int[]} expanded_key  176/208/240-Byte expanded key
     @returns {int[]}             16-Byte cipher
     """
-    rounds = len(expanded_key) // BLOCK_SIZE_BYTES - 1
-
-    data = xor(data, expanded_key[:BLOCK_SIZE_BYTES])
-    for i in range(1, rounds + 1):
-        data = sub_bytes(data)
-        data = shift_rows(data)
-        if i != rounds:
-            data = list(iter_mix_columns(data, MIX_COLUMN_MATRIX))
-        data = xor(data, expanded_key[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES])
-
-    return data
+    enc_key, _, rounds = _expanded_round_keys(bytes(expanded_key))
+    if not rounds:
+        return xor(data, expanded_key)
+    block = bytes(data[:BLOCK_SIZE_BYTES]).ljust(BLOCK_SIZE_BYTES, b'\0')
+    return list(struct.pack('>4I', *_encrypt_block(*struct.unpack('>4I', block), enc_key, rounds)))[:len(data)]
 
 
 def aes_decrypt(data, expanded_key):
@@ -273,15 +200,11 @@ def aes_decrypt(data, expanded_key):
     @param {int[]} expanded_key  176/208/240-Byte expanded key
     @returns {int[]}             16-Byte state
     """
-    rounds = len(expanded_key) // BLOCK_SIZE_BYTES - 1
-
-    for i in range(rounds, 0, -1):
-        data = xor(data, expanded_key[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES])
-        if i != rounds:
-            data = list(iter_mix_columns(data, MIX_COLUMN_MATRIX_INV))
-        data = shift_rows_inv(data)
-        data = sub_bytes_inv(data)
-    return xor(data, expanded_key[:BLOCK_SIZE_BYTES])
+    _, dec_key, rounds = _expanded_round_keys(bytes(expanded_key))
+    if not rounds:
+        return xor(data, expanded_key)
+    block = bytes(data[:BLOCK_SIZE_BYTES]).ljust(BLOCK_SIZE_BYTES, b'\0')
+    return list(struct.pack('>4I', *_decrypt_block(*struct.unpack('>4I', block), dec_key, rounds)))[:len(data)]
 
 
 def aes_decrypt_text(data, password, key_size_bytes):
@@ -299,17 +222,69 @@ def aes_decrypt_text(data, password, key_size_bytes):
     """
     NONCE_LENGTH_BYTES = 8
 
-    data = list(base64.b64decode(data))
-    password = list(password.encode())
+    data = base64.b64decode(data)
+    password = password.encode()
 
-    key = password[:key_size_bytes] + [0] * (key_size_bytes - len(password))
-    key = aes_encrypt(key[:BLOCK_SIZE_BYTES], key_expansion(key)) * (key_size_bytes // BLOCK_SIZE_BYTES)
+    key = password[:key_size_bytes].ljust(key_size_bytes, b'\0')
+    key = _encrypt_blocks(key[:BLOCK_SIZE_BYTES], _round_keys(key)) * (key_size_bytes // BLOCK_SIZE_BYTES)
 
     nonce = data[:NONCE_LENGTH_BYTES]
     cipher = data[NONCE_LENGTH_BYTES:]
 
-    decrypted_data = aes_ctr_decrypt(cipher, key, nonce + [0] * (BLOCK_SIZE_BYTES - NONCE_LENGTH_BYTES))
-    return bytes(decrypted_data)
+    return _ctr_crypt(cipher, key, nonce.ljust(BLOCK_SIZE_BYTES, b'\0'))
+
+
+def _zero_pad(data):
+    return data + bytes(-len(data) % BLOCK_SIZE_BYTES)
+
+
+def _xor_bytes(data1, data2):
+    """XOR two byte strings of the same length as big integers"""
+    return (int.from_bytes(data1, 'big') ^ int.from_bytes(data2, 'big')).to_bytes(len(data1), 'big')
+
+
+def _cbc_decrypt(data, key, iv):
+    padded = _zero_pad(data)
+    decrypted = _decrypt_blocks(padded, _round_keys(key))
+    # Every block is XOR'ed with the previous cipher block, so this needs only one operation
+    return _xor_bytes(decrypted, (iv + padded)[:len(padded)])[:len(data)]
+
+
+def _ctr_crypt(data, key, iv):
+    block_count = ceil(len(data) / BLOCK_SIZE_BYTES)
+    counter = int.from_bytes(iv, 'big')
+    counter_words = []
+    for i in range(counter, counter + block_count):
+        i &= 0xFFFFFFFF_FFFFFFFF_FFFFFFFF_FFFFFFFF
+        counter_words += (i >> 96, (i >> 64) & 0xFFFFFFFF, (i >> 32) & 0xFFFFFFFF, i & 0xFFFFFFFF)
+    keystream = _encrypt_words(counter_words, _round_keys(key))
+    return _xor_bytes(data, struct.pack(f'>{len(keystream)}I', *keystream)[:len(data)])
+
+
+def _gcm_decrypt_and_verify(data, key, tag, nonce):
+    # XXX: check aes, gcm param
+
+    hash_subkey = _encrypt_blocks(bytes(BLOCK_SIZE_BYTES), _round_keys(key))
+
+    if len(nonce) == 12:
+        j0 = nonce + b'\0\0\0\1'
+    else:
+        fill = (BLOCK_SIZE_BYTES - (len(nonce) % BLOCK_SIZE_BYTES)) % BLOCK_SIZE_BYTES + 8
+        j0 = ghash(hash_subkey, nonce + bytes(fill) + (8 * len(nonce)).to_bytes(8, 'big'))
+
+    iv_ctr = ((int.from_bytes(j0, 'big') + 1) & ((1 << 128) - 1)).to_bytes(BLOCK_SIZE_BYTES, 'big')
+    decrypted_data = _ctr_crypt(data, key, iv_ctr)
+    s_tag = ghash(
+        hash_subkey,
+        _zero_pad(data)
+        + (0 * 8).to_bytes(8, 'big')            # length of associated data
+        + (len(data) * 8).to_bytes(8, 'big'),   # length of data
+    )
+
+    if tag != _ctr_crypt(s_tag, key, j0):
+        raise ValueError('Mismatching authentication tag')
+
+    return decrypted_data
 
 
 RCON = (0x8d, 0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40, 0x80, 0x1b, 0x36)
@@ -345,46 +320,120 @@ def aes_decrypt_text(data, password, key_size_bytes):
             0x60, 0x51, 0x7f, 0xa9, 0x19, 0xb5, 0x4a, 0x0d, 0x2d, 0xe5, 0x7a, 0x9f, 0x93, 0xc9, 0x9c, 0xef,
             0xa0, 0xe0, 0x3b, 0x4d, 0xae, 0x2a, 0xf5, 0xb0, 0xc8, 0xeb, 0xbb, 0x3c, 0x83, 0x53, 0x99, 0x61,
             0x17, 0x2b, 0x04, 0x7e, 0xba, 0x77, 0xd6, 0x26, 0xe1, 0x69, 0x14, 0x63, 0x55, 0x21, 0x0c, 0x7d)
-MIX_COLUMN_MATRIX = ((0x2, 0x3, 0x1, 0x1),
-                     (0x1, 0x2, 0x3, 0x1),
-                     (0x1, 0x1, 0x2, 0x3),
-                     (0x3, 0x1, 0x1, 0x2))
-MIX_COLUMN_MATRIX_INV = ((0xE, 0xB, 0xD, 0x9),
-                         (0x9, 0xE, 0xB, 0xD),
-                         (0xD, 0x9, 0xE, 0xB),
-                         (0xB, 0xD, 0x9, 0xE))
-RIJNDAEL_EXP_TABLE = (0x01, 0x03, 0x05, 0x0F, 0x11, 0x33, 0x55, 0xFF, 0x1A, 0x2E, 0x72, 0x96, 0xA1, 0xF8, 0x13, 0x35,
-                      0x5F, 0xE1, 0x38, 0x48, 0xD8, 0x73, 0x95, 0xA4, 0xF7, 0x02, 0x06, 0x0A, 0x1E, 0x22, 0x66, 0xAA,
-                      0xE5, 0x34, 0x5C, 0xE4, 0x37, 0x59, 0xEB, 0x26, 0x6A, 0xBE, 0xD9, 0x70, 0x90, 0xAB, 0xE6, 0x31,
-                      0x53, 0xF5, 0x04, 0x0C, 0x14, 0x3C, 0x44, 0xCC, 0x4F, 0xD1, 0x68, 0xB8, 0xD3, 0x6E, 0xB2, 0xCD,
-                      0x4C, 0xD4, 0x67, 0xA9, 0xE0, 0x3B, 0x4D, 0xD7, 0x62, 0xA6, 0xF1, 0x08, 0x18, 0x28, 0x78, 0x88,
-                      0x83, 0x9E, 0xB9, 0xD0, 0x6B, 0xBD, 0xDC, 0x7F, 0x81, 0x98, 0xB3, 0xCE, 0x49, 0xDB, 0x76, 0x9A,
-                      0xB5, 0xC4, 0x57, 0xF9, 0x10, 0x30, 0x50, 0xF0, 0x0B, 0x1D, 0x27, 0x69, 0xBB, 0xD6, 0x61, 0xA3,
-                      0xFE, 0x19, 0x2B, 0x7D, 0x87, 0x92, 0xAD, 0xEC, 0x2F, 0x71, 0x93, 0xAE, 0xE9, 0x20, 0x60, 0xA0,
-                      0xFB, 0x16, 0x3A, 0x4E, 0xD2, 0x6D, 0xB7, 0xC2, 0x5D, 0xE7, 0x32, 0x56, 0xFA, 0x15, 0x3F, 0x41,
-                      0xC3, 0x5E, 0xE2, 0x3D, 0x47, 0xC9, 0x40, 0xC0, 0x5B, 0xED, 0x2C, 0x74, 0x9C, 0xBF, 0xDA, 0x75,
-                      0x9F, 0xBA, 0xD5, 0x64, 0xAC, 0xEF, 0x2A, 0x7E, 0x82, 0x9D, 0xBC, 0xDF, 0x7A, 0x8E, 0x89, 0x80,
-                      0x9B, 0xB6, 0xC1, 0x58, 0xE8, 0x23, 0x65, 0xAF, 0xEA, 0x25, 0x6F, 0xB1, 0xC8, 0x43, 0xC5, 0x54,
-                      0xFC, 0x1F, 0x21, 0x63, 0xA5, 0xF4, 0x07, 0x09, 0x1B, 0x2D, 0x77, 0x99, 0xB0, 0xCB, 0x46, 0xCA,
-                      0x45, 0xCF, 0x4A, 0xDE, 0x79, 0x8B, 0x86, 0x91, 0xA8, 0xE3, 0x3E, 0x42, 0xC6, 0x51, 0xF3, 0x0E,
-                      0x12, 0x36, 0x5A, 0xEE, 0x29, 0x7B, 0x8D, 0x8C, 0x8F, 0x8A, 0x85, 0x94, 0xA7, 0xF2, 0x0D, 0x17,
-                      0x39, 0x4B, 0xDD, 0x7C, 0x84, 0x97, 0xA2, 0xFD, 0x1C, 0x24, 0x6C, 0xB4, 0xC7, 0x52, 0xF6, 0x01)
-RIJNDAEL_LOG_TABLE = (0x00, 0x00, 0x19, 0x01, 0x32, 0x02, 0x1a, 0xc6, 0x4b, 0xc7, 0x1b, 0x68, 0x33, 0xee, 0xdf, 0x03,
-                      0x64, 0x04, 0xe0, 0x0e, 0x34, 0x8d, 0x81, 0xef, 0x4c, 0x71, 0x08, 0xc8, 0xf8, 0x69, 0x1c, 0xc1,
-                      0x7d, 0xc2, 0x1d, 0xb5, 0xf9, 0xb9, 0x27, 0x6a, 0x4d, 0xe4, 0xa6, 0x72, 0x9a, 0xc9, 0x09, 0x78,
-                      0x65, 0x2f, 0x8a, 0x05, 0x21, 0x0f, 0xe1, 0x24, 0x12, 0xf0, 0x82, 0x45, 0x35, 0x93, 0xda, 0x8e,
-                      0x96, 0x8f, 0xdb, 0xbd, 0x36, 0xd0, 0xce, 0x94, 0x13, 0x5c, 0xd2, 0xf1, 0x40, 0x46, 0x83, 0x38,
-                      0x66, 0xdd, 0xfd, 0x30, 0xbf, 0x06, 0x8b, 0x62, 0xb3, 0x25, 0xe2, 0x98, 0x22, 0x88, 0x91, 0x10,
-                      0x7e, 0x6e, 0x48, 0xc3, 0xa3, 0xb6, 0x1e, 0x42, 0x3a, 0x6b, 0x28, 0x54, 0xfa, 0x85, 0x3d, 0xba,
-                      0x2b, 0x79, 0x0a, 0x15, 0x9b, 0x9f, 0x5e, 0xca, 0x4e, 0xd4, 0xac, 0xe5, 0xf3, 0x73, 0xa7, 0x57,
-                      0xaf, 0x58, 0xa8, 0x50, 0xf4, 0xea, 0xd6, 0x74, 0x4f, 0xae, 0xe9, 0xd5, 0xe7, 0xe6, 0xad, 0xe8,
-                      0x2c, 0xd7, 0x75, 0x7a, 0xeb, 0x16, 0x0b, 0xf5, 0x59, 0xcb, 0x5f, 0xb0, 0x9c, 0xa9, 0x51, 0xa0,
-                      0x7f, 0x0c, 0xf6, 0x6f, 0x17, 0xc4, 0x49, 0xec, 0xd8, 0x43, 0x1f, 0x2d, 0xa4, 0x76, 0x7b, 0xb7,
-                      0xcc, 0xbb, 0x3e, 0x5a, 0xfb, 0x60, 0xb1, 0x86, 0x3b, 0x52, 0xa1, 0x6c, 0xaa, 0x55, 0x29, 0x9d,
-                      0x97, 0xb2, 0x87, 0x90, 0x61, 0xbe, 0xdc, 0xfc, 0xbc, 0x95, 0xcf, 0xcd, 0x37, 0x3f, 0x5b, 0xd1,
-                      0x53, 0x39, 0x84, 0x3c, 0x41, 0xa2, 0x6d, 0x47, 0x14, 0x2a, 0x9e, 0x5d, 0x56, 0xf2, 0xd3, 0xab,
-                      0x44, 0x11, 0x92, 0xd9, 0x23, 0x20, 0x2e, 0x89, 0xb4, 0x7c, 0xb8, 0x26, 0x77, 0x99, 0xe3, 0xa5,
-                      0x67, 0x4a, 0xed, 0xde, 0xc5, 0x31, 0xfe, 0x18, 0x0d, 0x63, 0x8c, 0x80, 0xc0, 0xf7, 0x70, 0x07)
+
+
+def _build_tables():
+    def mul(a, b):
+        result = 0
+        while b:
+            if b & 1:
+                result ^= a
+            a = ((a << 1) ^ 0x11B) if a & 0x80 else a << 1
+            b >>= 1
+        return result
+
+    def rotations(table):
+        return tuple(tuple(((w >> 8 * n) | (w << (32 - 8 * n))) & 0xFFFFFFFF for w in table) for n in range(4))
+
+    encrypt = [(mul(s, 2) << 24) | (s << 16) | (s << 8) | mul(s, 3) for s in SBOX]
+    decrypt = [(mul(s, 14) << 24) | (mul(s, 9) << 16) | (mul(s, 13) << 8) | mul(s, 11) for s in SBOX_INV]
+    return rotations(encrypt), rotations(decrypt)
+
+
+# Each round of AES is computed on 32-bit columns with 4 table lookups per column.
+# The tables combine SubBytes and (Inv)MixColumns, while ShiftRows is done by the choice of the input bytes
+(TE0, TE1, TE2, TE3), (TD0, TD1, TD2, TD3) = _build_tables()
+
+
+@functools.lru_cache(maxsize=64)
+def _expanded_round_keys(expanded_key):
+    """
+    Convert an expanded key to round keys for _encrypt_block and _decrypt_block
+
+    @param {bytes} expanded_key     176/208/240-Byte expanded key
+    @returns {tuple}                (encryption round keys, decryption round keys, number of rounds)
+    """
+    enc_key = struct.unpack(f'>{len(expanded_key) // 4}I', expanded_key)
+    rounds = len(enc_key) // 4 - 1
+
+    # The decryption uses the "equivalent inverse cipher" (FIPS-197, 5.3.5),
+    # so the keys of the inner rounds need to have InvMixColumns applied
+    dec_key = list(enc_key[-4:])
+    for i in range(rounds - 1, 0, -1):
+        dec_key += (
+            TD0[SBOX[w >> 24]] ^ TD1[SBOX[(w >> 16) & 0xFF]] ^ TD2[SBOX[(w >> 8) & 0xFF]] ^ TD3[SBOX[w & 0xFF]]
+            for w in enc_key[4 * i: 4 * i + 4])
+    dec_key += enc_key[:4]
+    return enc_key, tuple(dec_key), rounds
+
+
+@functools.lru_cache(maxsize=64)
+def _round_keys(key):
+    return _expanded_round_keys(bytes(key_expansion(list(key))))
+
+
+def _encrypt_block(s0, s1, s2, s3, enc_key, rounds):
+    s0 ^= enc_key[0]
+    s1 ^= enc_key[1]
+    s2 ^= enc_key[2]
+    s3 ^= enc_key[3]
+    for k in range(4, 4 * rounds, 4):
+        s0, s1, s2, s3 = (
+            TE0[s0 >> 24] ^ TE1[(s1 >> 16) & 0xFF] ^ TE2[(s2 >> 8) & 0xFF] ^ TE3[s3 & 0xFF] ^ enc_key[k],
+            TE0[s1 >> 24] ^ TE1[(s2 >> 16) & 0xFF] ^ TE2[(s3 >> 8) & 0xFF] ^ TE3[s0 & 0xFF] ^ enc_key[k + 1],
+            TE0[s2 >> 24] ^ TE1[(s3 >> 16) & 0xFF] ^ TE2[(s0 >> 8) & 0xFF] ^ TE3[s1 & 0xFF] ^ enc_key[k + 2],
+            TE0[s3 >> 24] ^ TE1[(s0 >> 16) & 0xFF] ^ TE2[(s1 >> 8) & 0xFF] ^ TE3[s2 & 0xFF] ^ enc_key[k + 3])
+
+    k = 4 * rounds  # The last round has no MixColumns
+    return (
+        ((SBOX[s0 >> 24] << 24) | (SBOX[(s1 >> 16) & 0xFF] << 16) | (SBOX[(s2 >> 8) & 0xFF] << 8) | SBOX[s3 & 0xFF]) ^ enc_key[k],
+        ((SBOX[s1 >> 24] << 24) | (SBOX[(s2 >> 16) & 0xFF] << 16) | (SBOX[(s3 >> 8) & 0xFF] << 8) | SBOX[s0 & 0xFF]) ^ enc_key[k + 1],
+        ((SBOX[s2 >> 24] << 24) | (SBOX[(s3 >> 16) & 0xFF] << 16) | (SBOX[(s0 >> 8) & 0xFF] << 8) | SBOX[s1 & 0xFF]) ^ enc_key[k + 2],
+        ((SBOX[s3 >> 24] << 24) | (SBOX[(s0 >> 16) & 0xFF] << 16) | (SBOX[(s1 >> 8) & 0xFF] << 8) | SBOX[s2 & 0xFF]) ^ enc_key[k + 3])
+
+
+def _decrypt_block(s0, s1, s2, s3, dec_key, rounds):
+    s0 ^= dec_key[0]
+    s1 ^= dec_key[1]
+    s2 ^= dec_key[2]
+    s3 ^= dec_key[3]
+    for k in range(4, 4 * rounds, 4):
+        s0, s1, s2, s3 = (
+            TD0[s0 >> 24] ^ TD1[(s3 >> 16) & 0xFF] ^ TD2[(s2 >> 8) & 0xFF] ^ TD3[s1 & 0xFF] ^ dec_key[k],
+            TD0[s1 >> 24] ^ TD1[(s0 >> 16) & 0xFF] ^ TD2[(s3 >> 8) & 0xFF] ^ TD3[s2 & 0xFF] ^ dec_key[k + 1],
+            TD0[s2 >> 24] ^ TD1[(s1 >> 16) & 0xFF] ^ TD2[(s0 >> 8) & 0xFF] ^ TD3[s3 & 0xFF] ^ dec_key[k + 2],
+            TD0[s3 >> 24] ^ TD1[(s2 >> 16) & 0xFF] ^ TD2[(s1 >> 8) & 0xFF] ^ TD3[s0 & 0xFF] ^ dec_key[k + 3])
+
+    k = 4 * rounds
+    return (
+        ((SBOX_INV[s0 >> 24] << 24) | (SBOX_INV[(s3 >> 16) & 0xFF] << 16) | (SBOX_INV[(s2 >> 8) & 0xFF] << 8) | SBOX_INV[s1 & 0xFF]) ^ dec_key[k],
+        ((SBOX_INV[s1 >> 24] << 24) | (SBOX_INV[(s0 >> 16) & 0xFF] << 16) | (SBOX_INV[(s3 >> 8) & 0xFF] << 8) | SBOX_INV[s2 & 0xFF]) ^ dec_key[k + 1],
+        ((SBOX_INV[s2 >> 24] << 24) | (SBOX_INV[(s1 >> 16) & 0xFF] << 16) | (SBOX_INV[(s0 >> 8) & 0xFF] << 8) | SBOX_INV[s3 & 0xFF]) ^ dec_key[k + 2],
+        ((SBOX_INV[s3 >> 24] << 24) | (SBOX_INV[(s2 >> 16) & 0xFF] << 16) | (SBOX_INV[(s1 >> 8) & 0xFF] << 8) | SBOX_INV[s0 & 0xFF]) ^ dec_key[k + 3])
+
+
+def _encrypt_words(words, round_keys):
+    enc_key, _, rounds = round_keys
+    result = []
+    for i in range(0, len(words), 4):
+        result += _encrypt_block(words[i], words[i + 1], words[i + 2], words[i + 3], enc_key, rounds)
+    return result
+
+
+def _encrypt_blocks(data, round_keys):
+    """Encrypt whole blocks of bytes independently (ECB)"""
+    words = _encrypt_words(struct.unpack(f'>{len(data) // 4}I', data), round_keys)
+    return struct.pack(f'>{len(words)}I', *words)
+
+
+def _decrypt_blocks(data, round_keys):
+    """Decrypt whole blocks of bytes independently (ECB)"""
+    _, dec_key, rounds = round_keys
+    words = struct.unpack(f'>{len(data) // 4}I', data)
+    result = []
+    for i in range(0, len(words), 4):
+        result += _decrypt_block(words[i], words[i + 1], words[i + 2], words[i + 3], dec_key, rounds)
+    return struct.pack(f'>{len(result)}I', *result)
 
 
 def key_expansion(data):
@@ -420,12 +469,6 @@ def key_expansion(data):
     return data[:expanded_key_size_bytes]
 
 
-def iter_vector(iv):
-    while True:
-        yield iv
-        iv = inc(iv)
-
-
 def sub_bytes(data):
     return [SBOX[x] for x in data]
 
@@ -450,71 +493,16 @@ def xor(data1, data2):
     return [x ^ y for x, y in zip(data1, data2)]
 
 
-def iter_mix_columns(data, matrix):
-    for i in (0, 4, 8, 12):
-        for row in matrix:
-            mixed = 0
-            for j in range(4):
-                # xor is (+) and (-)
-                mixed ^= (0 if data[i:i + 4][j] == 0 or row[j] == 0 else
-                          RIJNDAEL_EXP_TABLE[(RIJNDAEL_LOG_TABLE[data[i + j]] + RIJNDAEL_LOG_TABLE[row[j]]) % 0xFF])
-            yield mixed
-
-
-def shift_rows(data):
-    return [data[((column + row) & 0b11) * 4 + row] for column in range(4) for row in range(4)]
-
-
-def shift_rows_inv(data):
-    return [data[((column - row) & 0b11) * 4 + row] for column in range(4) for row in range(4)]
-
-
-def shift_block(data):
-    data_shifted = []
-
-    bit = 0
-    for n in data:
-        if bit:
-            n |= 0x100
-        bit = n & 1
-        n >>= 1
-        data_shifted.append(n)
-
-    return data_shifted
-
-
-def inc(data):
-    data = data[:]  # copy
-    for i in range(len(data) - 1, -1, -1):
-        if data[i] == 255:
-            data[i] = 0
-        else:
-            data[i] = data[i] + 1
-            break
-    return data
-
-
-def block_product(block_x, block_y):
-    # NIST SP 800-38D, Algorithm 1
-
-    if len(block_x) != BLOCK_SIZE_BYTES or len(block_y) != BLOCK_SIZE_BYTES:
-        raise ValueError(f'Length of blocks need to be {BLOCK_SIZE_BYTES} bytes')
-
-    block_r = [0xE1] + [0] * (BLOCK_SIZE_BYTES - 1)
-    block_v = block_y[:]
-    block_z = [0] * BLOCK_SIZE_BYTES
-
-    for i in block_x:
-        for bit in range(7, -1, -1):
-            if i & (1 << bit):
-                block_z = xor(block_z, block_v)
-
-            do_xor = block_v[-1] & 1
-            block_v = shift_block(block_v)
-            if do_xor:
-                block_v = xor(block_v, block_r)
-
-    return block_z
+@functools.lru_cache(maxsize=16)
+def _ghash_table(subkey):
+    # Multiplication by the subkey is linear, so it is precomputed for every bit of the other operand
+    # NB: The bit order of GF(2^128) is reversed, i.e. the first bit of the block is the coefficient of x^0
+    table = []
+    v = int.from_bytes(subkey, 'big')
+    for _ in range(128):
+        table.append(v)
+        v = (v >> 1) ^ (0xE1 << 120) if v & 1 else v >> 1
+    return table[::-1]
 
 
 def ghash(subkey, data):
@@ -523,12 +511,17 @@ def ghash(subkey, data):
     if len(data) % BLOCK_SIZE_BYTES:
         raise ValueError(f'Length of data should be {BLOCK_SIZE_BYTES} bytes')
 
-    last_y = [0] * BLOCK_SIZE_BYTES
+    table = _ghash_table(bytes(subkey))
+    last_y = 0
     for i in range(0, len(data), BLOCK_SIZE_BYTES):
-        block = data[i: i + BLOCK_SIZE_BYTES]
-        last_y = block_product(xor(last_y, block), subkey)
-
-    return last_y
+        x = last_y ^ int.from_bytes(data[i: i + BLOCK_SIZE_BYTES], 'big')
+        last_y = 0
+        while x:
+            low_bit = x & -x
+            last_y ^= table[low_bit.bit_length() - 1]
+            x ^= low_bit
+
+    return last_y.to_bytes(BLOCK_SIZE_BYTES, 'big')
 
 
 __all__ = [
@@ -0,0 +1,83 @@
+import contextlib
+import threading
+
+from .dependencies import sqlite3
+from .utils import locked_file
+
+
+class SQLiteArchive:
+    """
+    A download archive stored in an indexed SQLite database
+
+    Unlike the text archive, it is never loaded into memory, so opening it
+    takes constant time regardless of its size. Membership is checked with
+    an index lookup and every new entry is committed right away, so that
+    other processes using the archive see it and are not locked out.
+    The object behaves like the set that is used for the text archive.
+    """
+
+    SCHEME = 'sqlite:'
+
+    def __init__(self, fn):
+        """
+        @param fn   Path of the database; it is created if it does not exist
+        """
+        if not sqlite3:
+            raise ImportError('sqlite3 is required for a SQLite download archive. '
+                              'Please use a Python interpreter compiled with sqlite3 support')
+        self.filename = fn
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(fn, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS archive (id TEXT PRIMARY KEY NOT NULL) WITHOUT ROWID')
+            self._conn.commit()
+
+    @classmethod
+    def sqlite_path(cls, fn):
+        """The path of the database if the archive is given as "sqlite:PATH", else None"""
+        if isinstance(fn, str) and fn.startswith(cls.SCHEME):
+            return fn[len(cls.SCHEME):]
+        return None
+
+    def __contains__(self, vid_id):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM archive WHERE id = ?', (vid_id,)).fetchone() is not None
+
+    def __bool__(self):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM archive LIMIT 1').fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM archive').fetchone()[0]
+
+    def __iter__(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT id FROM archive').fetchall()
+        return (row[0] for row in rows)
+
+    def add(self, vid_id):
+        self.update((vid_id,))
+
+    def update(self, vid_ids):
+        """Add multiple entries in one transaction. Returns the number of entries that were not already present"""
+        with self._lock, self._conn:
+            return self._conn.executemany(
+                'INSERT OR IGNORE INTO archive (id) VALUES (?)', ((vid_id,) for vid_id in vid_ids)).rowcount
+
+    def close(self):
+        with self._lock, contextlib.suppress(sqlite3.ProgrammingError):  # Already closed
+            self._conn.close()
+
+    def import_text(self, fn):
+        """Add all entries of a text download archive. Returns the number of new entries"""
+        with locked_file(fn, 'r', encoding='utf-8') as archive_file:
+            return self.update(filter(None, map(str.strip, archive_file)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
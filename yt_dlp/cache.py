@@ -1,18 +1,192 @@
+import collections
 import contextlib
 import json
 import os
 import re
 import shutil
+import tempfile
+import threading
+import time
 import traceback
 import urllib.parse
 
-from .utils import expand_path, traverse_obj, version_tuple, write_json_file
+from .dependencies import sqlite3
+from .utils import expand_path, traverse_obj, version_tuple
 from .version import __version__
 
 
+class CacheBackend:
+    """
+    Storage of serialized cache entries
+
+    Entries are JSON strings identified by a section and a key.
+    Writes must be atomic, since the store may be shared by many processes
+    """
+
+    def load(self, section, key):
+        """Return the stored string, or None if it does not exist"""
+        raise NotImplementedError('Must be implemented by sub classes')
+
+    def store(self, section, key, data):
+        raise NotImplementedError('Must be implemented by sub classes')
+
+    def evict(self, section, keep):
+        """Remove all but the `keep` most recently stored entries of the section"""
+        # Backends that cannot evict keep all the entries
+
+    def remove(self, ydl):
+        """Remove all the entries"""
+        raise NotImplementedError('Must be implemented by sub classes')
+
+
+class FileSystemCacheBackend(CacheBackend):
+    """Stores every entry in its own file, as section/key.json"""
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def __str__(self):
+        return self.root_dir
+
+    def _get_cache_fn(self, section, key):
+        key = urllib.parse.quote(key, safe='').replace('%', ',')  # encode non-ascii characters
+        return os.path.join(self.root_dir, section, f'{key}.json')
+
+    def load(self, section, key):
+        with contextlib.suppress(OSError):
+            with open(self._get_cache_fn(section, key), encoding='utf-8') as cachef:
+                return cachef.read()
+
+    def store(self, section, key, data):
+        fn = self._get_cache_fn(section, key)
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        tf = tempfile.NamedTemporaryFile(
+            prefix=f'{os.path.basename(fn)}.', dir=os.path.dirname(fn),
+            suffix='.tmp', delete=False, mode='w', encoding='utf-8')
+        try:
+            with tf:
+                tf.write(data)
+            os.replace(tf.name, fn)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(tf.name)
+            raise
+
+    def evict(self, section, keep):
+        # The entries may be removed concurrently by other processes
+        with contextlib.suppress(OSError):
+            entries = sorted((
+                (entry.stat().st_mtime_ns, entry.path) for entry in os.scandir(os.path.join(self.root_dir, section))
+                if entry.name.endswith('.json')), reverse=True)
+            for _, path in entries[keep:]:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+
+    def remove(self, ydl):
+        cachedir = self.root_dir
+        if not any((term in cachedir) for term in ('cache', 'tmp')):
+            raise Exception(f'Not removing directory {cachedir} - this does not look like a cache dir')
+
+        ydl.to_screen(
+            f'Removing cache dir {cachedir} .', skip_eol=True)
+        if os.path.exists(cachedir):
+            ydl.to_screen('.', skip_eol=True)
+            shutil.rmtree(cachedir)
+        ydl.to_screen('.')
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Stores all the entries in a single SQLite database that can be shared by many processes"""
+
+    EXTENSIONS = ('.sqlite', '.sqlite3', '.db')
+
+    def __init__(self, fn):
+        if not sqlite3:
+            raise ImportError('sqlite3 is required for a SQLite cache. '
+                              'Please use a Python interpreter compiled with sqlite3 support')
+        self.filename = fn
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def _connection(self):
+        if not self._conn:
+            os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+            self._conn = sqlite3.connect(self.filename, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            with self._conn:
+                self._conn.execute('''CREATE TABLE IF NOT EXISTS cache (
+                    section TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL,
+                    stored INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (section, key)) WITHOUT ROWID''')
+                # Databases created before entries could be evicted lack the order of storage
+                if 'stored' not in {row[1] for row in self._conn.execute('PRAGMA table_info(cache)')}:
+                    self._conn.execute('ALTER TABLE cache ADD COLUMN stored INTEGER NOT NULL DEFAULT 0')
+        return self._conn
+
+    def load(self, section, key):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data FROM cache WHERE section = ? AND key = ?', (section, key)).fetchone()
+        return row and row[0]
+
+    def store(self, section, key, data):
+        with self._lock, self._connection as conn:
+            # The entries are numbered in the order they are stored, since the clock may be too coarse to tell them apart
+            conn.execute('''INSERT OR REPLACE INTO cache (section, key, data, stored) VALUES (?, ?, ?, (
+                SELECT IFNULL(MAX(stored), 0) + 1 FROM cache WHERE section = ?))''', (section, key, data, section))
+
+    def evict(self, section, keep):
+        with self._lock, self._connection as conn:
+            conn.execute('''DELETE FROM cache WHERE section = ? AND key NOT IN (
+                SELECT key FROM cache WHERE section = ? ORDER BY stored DESC LIMIT ?)''', (section, section, keep))
+
+    def remove(self, ydl):
+        ydl.to_screen(f'Removing all entries from cache database {self.filename}')
+        if os.path.exists(self.filename):
+            with self._lock, self._connection as conn:
+                conn.execute('DELETE FROM cache')
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Keeps the entries only for the lifetime of the object"""
+
+    def __init__(self):
+        self._entries = {}
+
+    def __str__(self):
+        return '<memory>'
+
+    def load(self, section, key):
+        return self._entries.get((section, key))
+
+    def store(self, section, key, data):
+        self._entries.pop((section, key), None)
+        self._entries[(section, key)] = data
+
+    def evict(self, section, keep):
+        keys = [entry for entry in self._entries if entry[0] == section]
+        for entry in keys[:max(len(keys) - keep, 0)]:
+            del self._entries[entry]
+
+    def remove(self, ydl):
+        ydl.to_screen('Removing in-memory cache')
+        self._entries.clear()
+
+
 class Cache:
+    # Bounds of the in-process layer in front of the backend.
+    # The TTL limits how long changes made by other processes can go unnoticed
+    MEMORY_SIZE = 256
+    MEMORY_TTL = 60
+
     def __init__(self, ydl):
         self._ydl = ydl
+        self._backend_for = self._backend = None
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
 
     def _get_root_dir(self):
         res = self._ydl.params.get('cachedir')
@@ -21,29 +195,60 @@ def _get_root_dir(self):
             res = os.path.join(cache_root, 'yt-dlp')
         return expand_path(res)
 
-    def _get_cache_fn(self, section, key, dtype):
-        assert re.match(r'^[\w.-]+$', section), f'invalid section {section!r}'
-        key = urllib.parse.quote(key, safe='').replace('%', ',')  # encode non-ascii characters
-        return os.path.join(self._get_root_dir(), section, f'{key}.{dtype}')
+    @property
+    def backend(self):
+        cachedir = self._ydl.params.get('cachedir')
+        with self._lock:
+            if self._backend is None or cachedir is not self._backend_for:
+                self._memory.clear()
+                self._backend_for = cachedir
+                if isinstance(cachedir, CacheBackend):
+                    self._backend = cachedir
+                elif cachedir and str(cachedir).lower().endswith(SQLiteCacheBackend.EXTENSIONS):
+                    self._backend = SQLiteCacheBackend(expand_path(cachedir))
+                else:
+                    self._backend = FileSystemCacheBackend(self._get_root_dir())
+            return self._backend
 
     @property
     def enabled(self):
         return self._ydl.params.get('cachedir') is not False
 
-    def store(self, section, key, data, dtype='json'):
+    def _remember(self, section, key, data):
+        with self._lock:
+            self._memory[(section, key)] = (time.monotonic() + self.MEMORY_TTL, data)
+            self._memory.move_to_end((section, key))
+            while len(self._memory) > self.MEMORY_SIZE:
+                self._memory.popitem(last=False)
+
+    def _recall(self, section, key):
+        with self._lock:
+            expiry, data = self._memory.get((section, key), (0, None))
+            if expiry < time.monotonic():
+                self._memory.pop((section, key), None)
+                return NotImplemented
+            self._memory.move_to_end((section, key))
+            return data
+
+    def store(self, section, key, data, dtype='json', *, max_entries=None):
+        """Store the data, keeping only the `max_entries` most recently stored entries of the section if it is given"""
         assert dtype in ('json',)
+        assert re.match(r'^[\w.-]+$', section), f'invalid section {section!r}'
 
         if not self.enabled:
             return
 
-        fn = self._get_cache_fn(section, key, dtype)
+        backend = self.backend
         try:
-            os.makedirs(os.path.dirname(fn), exist_ok=True)
             self._ydl.write_debug(f'Saving {section}.{key} to cache')
-            write_json_file({'yt-dlp_version': __version__, 'data': data}, fn)
+            serialized = json.dumps({'yt-dlp_version': __version__, 'data': data}, ensure_ascii=False)
+            backend.store(section, key, serialized)
+            self._remember(section, key, serialized)
+            if max_entries is not None:
+                backend.evict(section, max_entries)
         except Exception:
             tb = traceback.format_exc()
-            self._ydl.report_warning(f'Writing cache to {fn!r} failed: {tb}')
+            self._ydl.report_warning(f'Writing cache to {backend} failed: {tb}')
 
     def _validate(self, data, min_ver):
         version = traverse_obj(data, 'yt-dlp_version')
@@ -55,37 +260,37 @@ def _validate(self, data, min_ver):
 
     def load(self, section, key, dtype='json', default=None, *, min_ver=None):
         assert dtype in ('json',)
+        assert re.match(r'^[\w.-]+$', section), f'invalid section {section!r}'
 
         if not self.enabled:
             return default
 
-        cache_fn = self._get_cache_fn(section, key, dtype)
-        with contextlib.suppress(OSError):
+        backend = self.backend
+        serialized = self._recall(section, key)
+        if serialized is NotImplemented:
             try:
-                with open(cache_fn, encoding='utf-8') as cachef:
-                    self._ydl.write_debug(f'Loading {section}.{key} from cache')
-                    return self._validate(json.load(cachef), min_ver)
-            except (ValueError, KeyError):
-                try:
-                    file_size = os.path.getsize(cache_fn)
-                except OSError as oe:
-                    file_size = str(oe)
-                self._ydl.report_warning(f'Cache retrieval from {cache_fn} failed ({file_size})')
-
-        return default
+                serialized = backend.load(section, key)
+            except Exception as e:
+                self._ydl.report_warning(f'Cache retrieval of {section}.{key} from {backend} failed: {e}')
+                return default
+            # Misses are remembered too, so that hot keys never reach the backend
+            self._remember(section, key, serialized)
+        if serialized is None:
+            return default
+
+        try:
+            self._ydl.write_debug(f'Loading {section}.{key} from cache')
+            # NB: A new object is decoded every time since callers may modify it
+            return self._validate(json.loads(serialized), min_ver)
+        except (ValueError, KeyError):
+            self._ydl.report_warning(f'Cache retrieval of {section}.{key} from {backend} failed ({len(serialized)})')
+            return default
 
     def remove(self):
         if not self.enabled:
             self._ydl.to_screen('Cache is disabled (Did you combine --no-cache-dir and --rm-cache-dir?)')
             return
 
-        cachedir = self._get_root_dir()
-        if not any((term in cachedir) for term in ('cache', 'tmp')):
-            raise Exception(f'Not removing directory {cachedir} - this does not look like a cache dir')
-
-        self._ydl.to_screen(
-            f'Removing cache dir {cachedir} .', skip_eol=True)
-        if os.path.exists(cachedir):
-            self._ydl.to_screen('.', skip_eol=True)
-            shutil.rmtree(cachedir)
-        self._ydl.to_screen('.')
+        self.backend.remove(self._ydl)
+        with self._lock:
+            self._memory.clear()
@@ -13,7 +13,8 @@ def get_suitable_downloader(info_dict, params={}, default=NO_DEFAULT, protocol=N
         return FFmpegFD
     elif (set(downloaders) == {DashSegmentsFD}
           and not (to_stdout and len(protocols) > 1)
-          and set(protocols) == {'http_dash_segments_generator'}):
+          and (set(protocols) == {'http_dash_segments_generator'}
+               or DashSegmentsFD.can_merge_formats(info_copy, params))):
         return DashSegmentsFD
     elif len(downloaders) == 1:
         return downloaders[0]
@@ -109,7 +110,7 @@ def _get_suitable_downloader(info_dict, protocol, params, default):
             return FFmpegFD
 
     if protocol in ('m3u8', 'm3u8_native'):
-        if info_dict.get('is_live'):
+        if info_dict.get('is_live') and (external_downloader or '').lower() != 'native':
             return FFmpegFD
         elif (external_downloader or '').lower() == 'native':
             return HlsFD
@@ -6,6 +6,7 @@
 import re
 import threading
 import time
+import urllib.parse
 
 from ..minicurses import (
     BreaklineStatusPrinter,
@@ -215,6 +216,16 @@ def slow_down(self, start_time, now, byte_counter):
             if sleep_time > 0:
                 time.sleep(sleep_time)
 
+    def throttle(self, url, byte_count, info_dict):
+        """Sleep if the download is over the rate limits that are shared by the process"""
+        if not self.ydl.rate_limiter:
+            return
+        delay = self.ydl.rate_limiter.reserve(
+            'bytes', byte_count, total=True, host=urllib.parse.urlparse(url).hostname,
+            extractor=info_dict.get('extractor_key'))
+        if delay:
+            time.sleep(delay)
+
     def temp_name(self, filename):
         """Returns a temporary filename for the given filename."""
         if self.params.get('nopart', False) or filename == '-' or \
@@ -291,20 +302,33 @@ def report_destination(self, filename):
         """Report destination filename."""
         self.to_screen('[download] Destination: ' + filename)
 
+    @staticmethod
+    def create_multiline_printer(ydl, params, lines=1):
+        if params.get('noprogress'):
+            multiline = QuietMultilinePrinter()
+        elif ydl.params.get('logger'):
+            multiline = MultilineLogger(ydl.params['logger'], lines)
+        elif params.get('progress_with_newline'):
+            multiline = BreaklineStatusPrinter(ydl._out_files.out, lines)
+        else:
+            multiline = MultilinePrinter(ydl._out_files.out, lines, not params.get('quiet'))
+        multiline.allow_colors = ydl._allow_colors.out and ydl._allow_colors.out != 'no_color'
+        multiline._HAVE_FULLCAP = ydl._allow_colors.out
+        return multiline
+
     def _prepare_multiline_status(self, lines=1):
-        if self.params.get('noprogress'):
-            self._multiline = QuietMultilinePrinter()
-        elif self.ydl.params.get('logger'):
-            self._multiline = MultilineLogger(self.ydl.params['logger'], lines)
-        elif self.params.get('progress_with_newline'):
-            self._multiline = BreaklineStatusPrinter(self.ydl._out_files.out, lines)
+        # When YoutubeDL downloads concurrently, each worker thread has a line in a shared printer
+        shared_multiline = getattr(self.ydl, '_shared_multiline', None)
+        self._multiline_line = try_call(lambda: self.ydl._thread_state.progress_line)
+        if shared_multiline and self._multiline_line is not None and not self.params.get('noprogress'):
+            self._multiline = shared_multiline
         else:
-            self._multiline = MultilinePrinter(self.ydl._out_files.out, lines, not self.params.get('quiet'))
-        self._multiline.allow_colors = self.ydl._allow_colors.out and self.ydl._allow_colors.out != 'no_color'
-        self._multiline._HAVE_FULLCAP = self.ydl._allow_colors.out
+            self._multiline_line = None
+            self._multiline = self.create_multiline_printer(self.ydl, self.params, lines)
 
     def _finish_multiline_status(self):
-        self._multiline.end()
+        if self._multiline_line is None:
+            self._multiline.end()
 
     ProgressStyles = Namespace(
         downloaded_bytes='light blue',
@@ -331,7 +355,7 @@ def _report_progress_status(self, s, default_template):
         progress_template = self.params.get('progress_template', {})
         self._multiline.print_at_line(self.ydl.evaluate_outtmpl(
             progress_template.get('download') or '[download] %(progress._default_template)s',
-            progress_dict), s.get('progress_idx') or 0)
+            progress_dict), (s.get('progress_idx') or 0) if self._multiline_line is None else self._multiline_line)
         self.to_console_title(self.ydl.evaluate_outtmpl(
             progress_template.get('download-title') or 'yt-dlp %(progress._default_template)s',
             progress_dict), _ProgressState.from_dict(s), s.get('_percent'))
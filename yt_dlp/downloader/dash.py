@@ -1,19 +1,41 @@
+import os
 import time
 import urllib.parse
 
 from . import get_suitable_downloader
 from .fragment import FragmentFD
-from ..utils import ReExtractInfo, update_url_query, urljoin
+from ..postprocessor.mp4merger import FragmentedMP4Muxer, MP4MergerPP
+from ..utils import (
+    PostProcessingError,
+    ReExtractInfo,
+    prepend_extension,
+    update_url_query,
+    urljoin,
+)
 
 
 class DashSegmentsFD(FragmentFD):
     """
     Download segments in a DASH manifest. External downloaders can take over
     the fragment downloads by supporting the 'dash_frag_urls' protocol
+
+    With merge_during_download, the requested MP4 formats are merged into the
+    file while their fragments are downloaded (see MP4MergerPP)
     """
 
     FD_NAME = 'dashsegments'
 
+    @classmethod
+    def can_merge_formats(cls, info_dict, params):
+        return (
+            params.get('merge_during_download')
+            and params.get('native_merge') is not False
+            and not params.get('allow_unplayable_formats')
+            and not info_dict.get('to_stdout')
+            and not info_dict.get('is_live')
+            and info_dict.get('requested_formats')
+            and MP4MergerPP.can_merge(info_dict))
+
     def real_download(self, filename, info_dict):
         if 'http_dash_segments_generator' in info_dict['protocol'].split('+'):
             real_downloader = None  # No external FD can support --live-from-start
@@ -26,8 +48,16 @@ def real_download(self, filename, info_dict):
         real_start = time.time()
 
         requested_formats = [{**info_dict, **fmt} for fmt in info_dict.get('requested_formats', [])]
+        muxer = None
+        if requested_formats and self.can_merge_formats(info_dict, self.params):
+            real_downloader = None
+            self.to_screen(f'[{self.FD_NAME}] Merging formats into "{filename}" while downloading')
+            tmpfilename = self.temp_name(filename)
+            dest_stream, tmpfilename = self.sanitize_open(tmpfilename, 'wb')
+            muxer = FragmentedMP4Muxer(dest_stream, [f'format {fmt["format_id"]}' for fmt in requested_formats])
+
         args = []
-        for fmt in requested_formats or [info_dict]:
+        for idx, fmt in enumerate(requested_formats or [info_dict]):
             # Re-extract if --load-info-json is used and 'fragments' was originally a generator
             # See https://github.com/yt-dlp/yt-dlp/issues/13906
             if isinstance(fmt['fragments'], str):
@@ -42,6 +72,10 @@ def real_download(self, filename, info_dict):
                 'live': 'is_from_start' if fmt.get('is_from_start') else fmt.get('is_live'),
                 'total_frags': fragment_count,
             }
+            if muxer:
+                # The fragment files of the formats must not collide
+                ctx['filename'] = prepend_extension(filename, f'f{fmt["format_id"]}', info_dict.get('ext'))
+                ctx['muxer_input'] = muxer.inputs[idx]
 
             if real_downloader:
                 self._prepare_external_frag_download(ctx)
@@ -65,7 +99,32 @@ def real_download(self, filename, info_dict):
 
             args.append([ctx, fragments_to_download, fmt])
 
-        return self.download_and_append_fragments_multiple(*args, is_fatal=lambda idx: idx == 0)
+        if not muxer:
+            return self.download_and_append_fragments_multiple(*args, is_fatal=lambda idx: idx == 0)
+
+        try:
+            success = self.download_and_append_fragments_multiple(*args, is_fatal=lambda idx: idx == 0)
+            if success:
+                muxer.finish()
+        except PostProcessingError as e:
+            self.report_error(f'Unable to merge the formats while downloading: {e}')
+            success = False
+        finally:
+            dest_stream.close()
+        if not success:
+            self.try_remove(tmpfilename)
+            return False
+
+        self.try_rename(tmpfilename, filename)
+        downloaded_bytes = os.path.getsize(filename)
+        self._hook_progress({
+            'downloaded_bytes': downloaded_bytes,
+            'total_bytes': downloaded_bytes,
+            'filename': filename,
+            'status': 'finished',
+            'elapsed': time.time() - real_start,
+        }, info_dict)
+        return True
 
     def _resolve_fragments(self, fragments, ctx):
         fragments = fragments(ctx) if callable(fragments) else fragments
@@ -1,27 +1,143 @@
+import asyncio
+import collections
 import concurrent.futures
 import contextlib
+import io
 import json
 import math
 import os
 import struct
 import time
+import urllib.parse
 
 from .common import FileDownloader
 from .http import HttpFD
 from ..aes import aes_cbc_decrypt_bytes, unpad_pkcs7
 from ..networking import Request
-from ..networking.exceptions import HTTPError, IncompleteRead
-from ..utils import DownloadError, RetryManager, traverse_obj
+from ..networking.exceptions import HTTPError, IncompleteRead, TransportError
+from ..utils import DownloadError, RetryManager, sanitize_open, traverse_obj
 from ..utils.networking import HTTPHeaderDict
 from ..utils.progress import ProgressCalculator
 
 
+class _FragmentBuffer(io.BytesIO):
+    """
+    A fragment file that is kept in memory
+
+    Once it grows larger than max_size, its content is moved to the file on disk
+    """
+
+    def __init__(self, filename, max_size):
+        super().__init__()
+        self.filename, self.max_size = filename, max_size
+        self.file = None
+
+    def open(self, open_mode):
+        if open_mode == 'ab' and self.file is not None:
+            self.file, self.filename = sanitize_open(self.filename, 'ab')
+        elif open_mode != 'ab':
+            self.close()
+            self.file = None
+            self.seek(0)
+            self.truncate()
+        return self
+
+    def write(self, data):
+        if self.file is None and self.tell() + len(data) > self.max_size:
+            self.file, self.filename = sanitize_open(self.filename, 'wb')
+            self.file.write(self.getvalue())
+            self.seek(0)
+            self.truncate()
+        if self.file is not None:
+            return self.file.write(data)
+        return super().write(data)
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        # NB: The content is read after the downloader has closed the stream
+        if self.file is not None:
+            self.file.close()
+
+
+class _AsyncFragmentPool:
+    """
+    Runs coroutines as tasks of an event loop that is driven by the calling thread
+
+    It has the part of the interface of an executor that FragmentFD._map_fragments uses
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def submit(self, func, *args):
+        return self._loop.create_task(func(*args))
+
+    def wait(self, tasks, timeout):
+        self._loop.run_until_complete(asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED))
+
+    def shutdown(self, wait=True):
+        if self._loop.is_closed():
+            return
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+
 class HttpQuietDownloader(HttpFD):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._buffers = {}
+
     def to_screen(self, *args, **kargs):
         pass
 
     to_console_title = to_screen
 
+    def sanitize_open(self, filename, open_mode):
+        if filename in self._buffers:
+            return self._buffers[filename].open(open_mode), filename
+        return super().sanitize_open(filename, open_mode)
+
+    def try_rename(self, old_filename, new_filename):
+        if old_filename in self._buffers and old_filename != new_filename:
+            buffer = self._buffers[new_filename] = self._buffers.pop(old_filename)
+            if buffer.file is None:
+                return
+            buffer.filename = new_filename
+        super().try_rename(old_filename, new_filename)
+
+    def download_fragment(self, filename, info_dict, max_memory=0):
+        """
+        Download a fragment, keeping it in memory if it is not larger than max_memory
+
+        @returns (success, content), where content is None if the fragment was written to filename
+        """
+        if not max_memory:
+            return self.download(filename, info_dict)[0], None
+
+        tmpfilename = self.temp_name(filename)
+        self._buffers[tmpfilename] = _FragmentBuffer(tmpfilename, max_memory)
+        try:
+            success, _ = self.download(filename, info_dict)
+        finally:
+            buffer = self._buffers.pop(filename, None)  # Renamed once the download has finished
+            buffer = self._buffers.pop(tmpfilename, buffer)
+        if not success or buffer.file is not None:
+            return success, None
+        return success, buffer.getvalue()
+
 
 class FragmentFD(FileDownloader):
     """
@@ -35,7 +151,16 @@ class FragmentFD(FileDownloader):
                         Skip unavailable fragments (DASH and hlsnative only)
     keep_fragments:     Keep downloaded fragments on disk after downloading is
                         finished
+    fragment_memory_limit:  Fragments up to this size (in bytes) are kept in memory
+                        instead of being written to temporary files. 0 disables
+                        this. Default is 16MiB
+    fragment_reorder_limit:  When downloading fragments concurrently, no new fragments
+                        are started while the downloaded fragments that wait for an
+                        earlier one hold more than this many bytes. Default is 64MiB
     concurrent_fragment_downloads:  The number of threads to use for native hls and dash downloads
+    async_fragment_downloads:  Download the concurrent fragments as asyncio tasks of a single
+                        thread instead. The fragments are kept in memory, and their progress
+                        is reported once they are complete. Not used with keep_fragments
     _no_ytdl_file:      Don't use .ytdl file
 
     For each incomplete fragment download yt-dlp keeps on disk a special
@@ -59,6 +184,10 @@ class FragmentFD(FileDownloader):
     This feature is experimental and file format may change in future.
     """
 
+    _FRAGMENT_MEMORY_LIMIT = 16 * 1024 * 1024
+    _FRAGMENT_REORDER_LIMIT = 64 * 1024 * 1024
+    _ASYNC_READ_SIZE = 64 * 1024
+
     def report_retry_fragment(self, err, frag_index, count, retries):
         self.deprecation_warning('yt_dlp.downloader.FragmentFD.report_retry_fragment is deprecated. '
                                  'Use yt_dlp.downloader.FileDownloader.report_retry instead')
@@ -77,7 +206,8 @@ def _prepare_and_start_frag_download(self, ctx, info_dict):
         self._start_frag_download(ctx, info_dict)
 
     def __do_ytdl_file(self, ctx):
-        return ctx['live'] is not True and ctx['tmpfilename'] != '-' and not self.params.get('_no_ytdl_file')
+        return (ctx['live'] is not True and ctx['tmpfilename'] != '-' and not ctx.get('muxer_input')
+                and not self.params.get('_no_ytdl_file'))
 
     def _read_ytdl_file(self, ctx):
         assert 'ytdl_corrupt' not in ctx
@@ -115,23 +245,67 @@ def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_dat
             'http_headers': headers or info_dict.get('http_headers'),
             'request_data': request_data,
             'ctx_id': ctx.get('ctx_id'),
+            'extractor_key': info_dict.get('extractor_key'),
         }
         frag_resume_len = 0
         if ctx['dl'].params.get('continuedl', True):
             frag_resume_len = self.filesize_or_none(self.temp_name(fragment_filename))
         fragment_info_dict['frag_resume_len'] = ctx['frag_resume_len'] = frag_resume_len
 
-        success, _ = ctx['dl'].download(fragment_filename, fragment_info_dict)
+        success, frag_content = ctx['dl'].download_fragment(
+            fragment_filename, fragment_info_dict, self._fragment_memory_limit(fragment_filename))
         if not success:
             return False
         if fragment_info_dict.get('filetime'):
             ctx['fragment_filetime'] = fragment_info_dict.get('filetime')
         ctx['fragment_filename_sanitized'] = fragment_filename
+        if frag_content is not None:
+            ctx['fragment_content'] = frag_content
         return True
 
+    async def _download_fragment_async(self, ctx, frag_url, info_dict, headers=None, request_data=None):
+        """Like _download_fragment, but the fragment is requested with YoutubeDL.urlopen_async() and kept in memory"""
+        fragment_info_dict = {
+            'url': frag_url,
+            'ctx_id': ctx.get('ctx_id'),
+            'extractor_key': info_dict.get('extractor_key'),
+        }
+        host, chunks = urllib.parse.urlparse(frag_url).hostname, []
+        response = await self.ydl.urlopen_async(
+            Request(frag_url, request_data, headers or info_dict.get('http_headers')))
+        async with response:
+            while chunk := await response.read(self._ASYNC_READ_SIZE):
+                chunks.append(chunk)
+                if self.ydl.rate_limiter:
+                    await asyncio.sleep(self.ydl.rate_limiter.reserve(
+                        'bytes', len(chunk), total=True, host=host, extractor=info_dict.get('extractor_key')))
+        frag_content = b''.join(chunks)
+
+        fragment_filename = '%s-Frag%d' % (ctx['tmpfilename'], ctx['fragment_index'])
+        ctx['dl']._hook_progress({
+            'status': 'finished',
+            'downloaded_bytes': len(frag_content),
+            'total_bytes': len(frag_content),
+            'filename': fragment_filename,
+            'ctx_id': ctx.get('ctx_id'),
+        }, fragment_info_dict)
+        ctx['fragment_filename_sanitized'] = fragment_filename
+        ctx['fragment_content'] = frag_content
+
+    def _fragment_memory_limit(self, fragment_filename):
+        if self.params.get('keep_fragments', False):
+            return 0
+        # Partially downloaded fragments of a previous run are resumed on disk
+        elif os.path.exists(fragment_filename) or os.path.exists(self.temp_name(fragment_filename)):
+            return 0
+        limit = self.params.get('fragment_memory_limit')
+        return self._FRAGMENT_MEMORY_LIMIT if limit is None else limit
+
     def _read_fragment(self, ctx):
         if not ctx.get('fragment_filename_sanitized'):
             return None
+        elif 'fragment_content' in ctx:
+            return ctx.pop('fragment_content')
         try:
             down, frag_sanitized = self.sanitize_open(ctx['fragment_filename_sanitized'], 'rb')
         except FileNotFoundError:
@@ -153,6 +327,7 @@ def _append_fragment(self, ctx, frag_content):
             if not self.params.get('keep_fragments', False):
                 self.try_remove(ctx['fragment_filename_sanitized'])
             del ctx['fragment_filename_sanitized']
+            ctx.pop('fragment_content', None)
 
     def _prepare_frag_download(self, ctx):
         if not ctx.setdefault('live', False):
@@ -163,7 +338,8 @@ def _prepare_frag_download(self, ctx):
         else:
             total_frags_str = 'unknown (live)'
         self.to_screen(f'[{self.FD_NAME}] Total fragments: {total_frags_str}')
-        self.report_destination(ctx['filename'])
+        if not ctx.get('muxer_input'):
+            self.report_destination(ctx['filename'])
         dl = HttpQuietDownloader(self.ydl, {
             **self.params,
             'noprogress': True,
@@ -171,12 +347,13 @@ def _prepare_frag_download(self, ctx):
             'sleep_interval': 0,
             'max_sleep_interval': 0,
             'sleep_interval_subtitles': 0,
+            'http_connections': 1,
         })
         tmpfilename = self.temp_name(ctx['filename'])
         open_mode = 'wb'
 
-        # Establish possible resume length
-        resume_len = self.filesize_or_none(tmpfilename)
+        # Establish possible resume length. What was written to a muxer cannot be resumed
+        resume_len = 0 if ctx.get('muxer_input') else self.filesize_or_none(tmpfilename)
         if resume_len > 0:
             open_mode = 'ab'
 
@@ -212,7 +389,10 @@ def _prepare_frag_download(self, ctx):
                 self._write_ytdl_file(ctx)
                 assert ctx['fragment_index'] == 0
 
-        dest_stream, tmpfilename = self.sanitize_open(tmpfilename, open_mode)
+        if ctx.get('muxer_input'):
+            dest_stream = ctx['muxer_input']
+        else:
+            dest_stream, tmpfilename = self.sanitize_open(tmpfilename, open_mode)
 
         ctx.update({
             'dl': dl,
@@ -288,7 +468,7 @@ def _finish_frag_download(self, ctx, info_dict):
             self.try_remove(self.ytdl_filename(ctx['filename']))
         elapsed = time.time() - ctx['started']
 
-        to_file = ctx['tmpfilename'] != '-'
+        to_file = ctx['tmpfilename'] != '-' and not ctx.get('muxer_input')
         if to_file:
             downloaded_bytes = self.filesize_or_none(ctx['tmpfilename'])
         else:
@@ -305,6 +485,9 @@ def _finish_frag_download(self, ctx, info_dict):
             if self.params.get('updatetime') and filetime:
                 with contextlib.suppress(Exception):
                     os.utime(ctx['filename'], (time.time(), filetime))
+        elif ctx.get('muxer_input'):
+            # The merged file is reported by the caller once all the formats are finished
+            return True
 
         self._hook_progress({
             'downloaded_bytes': downloaded_bytes,
@@ -364,6 +547,50 @@ def decrypt_fragment(fragment, frag_content):
 
         return decrypt_fragment
 
+    def _map_fragments(self, pool, func, fragments, max_workers):
+        """
+        Like pool.map, but fragments are only started as workers become available
+
+        func must return the ctx of the fragment. The fragments and results are
+        yielded in order, as soon as all the previous ones are done.
+        No new fragments are started while the finished results that wait for an earlier
+        fragment hold more than fragment_reorder_limit bytes in memory, so that the
+        connections are left to the fragments that block the output
+        """
+        limit = self.params.get('fragment_reorder_limit')
+        if limit is None:
+            limit = self._FRAGMENT_REORDER_LIMIT
+
+        def buffered_size():
+            return sum(
+                len(future.result().get('fragment_content') or b'')
+                for _, future in pending if future.done() and not future.exception())
+
+        fragments, pending, exhausted = iter(fragments), collections.deque(), False
+        try:
+            while True:
+                while pending and pending[0][1].done():
+                    fragment, future = pending.popleft()
+                    yield fragment, future.result()
+                running = [future for _, future in pending if not future.done()]
+                if not exhausted and len(running) < max_workers and (not pending or buffered_size() < limit):
+                    fragment = next(fragments, None)
+                    if fragment is None:
+                        exhausted = True
+                    else:
+                        pending.append((fragment, pool.submit(func, fragment)))
+                    continue
+                elif not pending:
+                    return
+                # NB: A timeout is needed for KeyboardInterrupt to be raised on Windows
+                if isinstance(pool, _AsyncFragmentPool):
+                    pool.wait(running, timeout=1)
+                else:
+                    concurrent.futures.wait(running, timeout=1, return_when=concurrent.futures.FIRST_COMPLETED)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
     def download_and_append_fragments_multiple(self, *args, **kwargs):
         """
         @params (ctx1, fragments1, info_dict1), (ctx2, fragments2, info_dict2), ...
@@ -436,10 +663,8 @@ def download_and_append_fragments(
         if not self.params.get('skip_unavailable_fragments', True):
             is_fatal = lambda _: True
 
-        def download_fragment(fragment, ctx):
-            if not interrupt_trigger[0]:
-                return
-
+        def prepare_fragment(fragment, ctx):
+            """Returns the headers of the fragment, whether it is fatal and the RetryManager to download it with"""
             frag_index = ctx['fragment_index'] = fragment['frag_index']
             ctx['last_error'] = None
             headers = HTTPHeaderDict(info_dict.get('http_headers'))
@@ -456,7 +681,13 @@ def error_callback(err, count, retries):
                 self.report_retry(err, count, retries, frag_index, fatal)
                 ctx['last_error'] = err
 
-            for retry in RetryManager(self.params.get('fragment_retries'), error_callback):
+            return headers, fatal, RetryManager(self.params.get('fragment_retries'), error_callback)
+
+        def download_fragment(fragment, ctx):
+            if not interrupt_trigger[0]:
+                return
+            headers, fatal, retry_manager = prepare_fragment(fragment, ctx)
+            for retry in retry_manager:
                 try:
                     ctx['fragment_count'] = fragment.get('fragment_count')
                     if not self._download_fragment(
@@ -469,6 +700,18 @@ def error_callback(err, count, retries):
                     if fatal:
                         raise
 
+        async def download_fragment_async(fragment, ctx):
+            if not interrupt_trigger[0]:
+                return
+            headers, _, retry_manager = prepare_fragment(fragment, ctx)
+            for retry in retry_manager:
+                try:
+                    ctx['fragment_count'] = fragment.get('fragment_count')
+                    await self._download_fragment_async(
+                        ctx, fragment['url'], info_dict, headers, info_dict.get('request_data'))
+                except (HTTPError, TransportError) as err:
+                    retry.error = err
+
         def append_fragment(frag_content, frag_index, ctx):
             if frag_content:
                 self._append_fragment(ctx, pack_func(frag_content, frag_index))
@@ -485,18 +728,35 @@ def append_fragment(frag_content, frag_index, ctx):
         max_workers = math.ceil(
             self.params.get('concurrent_fragment_downloads', 1) / ctx.get('max_progress', 1))
         if max_workers > 1:
-            def _download_fragment(fragment):
+            def copy_ctx():
                 ctx_copy = ctx.copy()
+                ctx_copy.pop('fragment_content', None)
+                return ctx_copy
+
+            def _download_fragment(fragment):
+                ctx_copy = copy_ctx()
                 download_fragment(fragment, ctx_copy)
-                return fragment, fragment['frag_index'], ctx_copy.get('fragment_filename_sanitized')
+                return ctx_copy
 
-            with tpe or concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+            async def _download_fragment_async(fragment):
+                ctx_copy = copy_ctx()
+                await download_fragment_async(fragment, ctx_copy)
+                return ctx_copy
+
+            if self.params.get('async_fragment_downloads') and not self.params.get('keep_fragments'):
+                pool, func = _AsyncFragmentPool(), _download_fragment_async
+            else:
+                pool, func = tpe or concurrent.futures.ThreadPoolExecutor(max_workers), _download_fragment
+            with pool:
                 try:
-                    for fragment, frag_index, frag_filename in pool.map(_download_fragment, fragments):
+                    for fragment, frag_ctx in self._map_fragments(pool, func, fragments, max_workers):
+                        frag_index = fragment['frag_index']
                         ctx.update({
-                            'fragment_filename_sanitized': frag_filename,
+                            'fragment_filename_sanitized': frag_ctx.get('fragment_filename_sanitized'),
                             'fragment_index': frag_index,
                         })
+                        if 'fragment_content' in frag_ctx:
+                            ctx['fragment_content'] = frag_ctx['fragment_content']
                         if not append_fragment(decrypt_fragment(fragment, self._read_fragment(ctx)), frag_index, ctx):
                             return False
                 except KeyboardInterrupt:
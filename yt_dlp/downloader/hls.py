@@ -1,6 +1,7 @@
 import binascii
 import io
 import re
+import time
 import urllib.parse
 
 from . import get_suitable_downloader
@@ -8,8 +9,10 @@
 from .fragment import FragmentFD
 from .. import webvtt
 from ..dependencies import Cryptodome
+from ..networking.exceptions import network_exceptions
 from ..utils import (
     bug_reports_message,
+    float_or_none,
     parse_m3u8_attributes,
     remove_start,
     traverse_obj,
@@ -27,6 +30,8 @@ class HlsFD(FragmentFD):
     """
 
     FD_NAME = 'hlsnative'
+    # Stop a live download once this many reloads of the playlist had no new fragments
+    _LIVE_MAX_IDLE_RELOADS = 10
 
     @staticmethod
     def _has_drm(manifest):  # TODO: https://github.com/yt-dlp/yt-dlp/pull/5039
@@ -64,13 +69,66 @@ def can_download(cls, manifest, info_dict, allow_unplayable_formats=False):
             ]
 
         def check_results():
-            yield not info_dict.get('is_live')
             for feature in UNSUPPORTED_FEATURES:
                 yield not re.search(feature, manifest)
             if not allow_unplayable_formats:
                 yield not cls._has_drm(manifest)
         return all(check_results())
 
+    def _live_fragments(self, info_dict, man_url, s, fragments, parse_fragments):
+        """
+        Yield the fragments of a live media playlist, reloading it until it ends
+
+        Fragments are identified by their media sequence number, so that the ones that are
+        still in the reloaded playlist are not downloaded again. As recommended by RFC 8216,
+        the playlist is reloaded after the target duration, or half of it if it did not change
+        """
+        frag_index, last_sequence, init_section, idle_reloads = 0, None, None, 0
+        last_reload = time.monotonic()
+        while True:
+            new_fragments = 0
+            for fragment in fragments:
+                if fragment.get('init_section'):
+                    if (fragment['url'], fragment['byte_range']) == init_section:
+                        continue
+                    init_section = (fragment['url'], fragment['byte_range'])
+                else:
+                    if last_sequence is not None:
+                        if fragment['media_sequence'] <= last_sequence:
+                            continue
+                        elif fragment['media_sequence'] > last_sequence + 1:
+                            self.report_warning(
+                                f'{fragment["media_sequence"] - last_sequence - 1} fragments were removed '
+                                'from the live playlist before they could be downloaded')
+                    last_sequence = fragment['media_sequence']
+                frag_index += 1
+                new_fragments += 1
+                yield {**fragment, 'frag_index': frag_index}
+
+            if '#EXT-X-ENDLIST' in s:
+                return
+            idle_reloads = 0 if new_fragments else idle_reloads + 1
+            if idle_reloads > self._LIVE_MAX_IDLE_RELOADS:
+                self.report_warning('The live playlist is no longer being updated; finishing the download')
+                return
+
+            target_duration = float_or_none(traverse_obj(
+                re.search(r'#EXT-X-TARGETDURATION:([\d.]+)', s), 1)) or 10
+            try:
+                time.sleep(max(0, last_reload + (target_duration if new_fragments else target_duration / 2)
+                               - time.monotonic()))
+                last_reload = time.monotonic()
+                urlh = self.ydl.urlopen(self._prepare_url(info_dict, info_dict['url']))
+                man_url, s = urlh.url, urlh.read().decode('utf-8', 'ignore')
+            except network_exceptions as err:
+                self.report_warning(f'Unable to reload the live playlist: {err}')
+                fragments = []
+                continue
+            except KeyboardInterrupt:
+                self.to_screen(f'[{self.FD_NAME}] Interrupted by user; finishing the download')
+                return
+            fragments = parse_fragments(s, man_url) or []
+
     def real_download(self, filename, info_dict):
         man_url = info_dict['url']
 
@@ -109,8 +167,8 @@ def real_download(self, filename, info_dict):
                     message += '; decryption will be performed natively, but will be extremely slow'
             elif info_dict.get('extractor_key') == 'Generic' and re.search(r'(?m)#EXT-X-MEDIA-SEQUENCE:(?!0$)', s):
                 install_ffmpeg = '' if has_ffmpeg else 'install ffmpeg and '
-                message = ('Live HLS streams are not supported by the native downloader. If this is a livestream, '
-                           f'please {install_ffmpeg}add "--downloader ffmpeg --hls-use-mpegts" to your command')
+                message = ('Live HLS streams are only supported by the native downloader when they are known to be live. '
+                           f'If this is a livestream, please {install_ffmpeg}add "--downloader ffmpeg --hls-use-mpegts" to your command')
         if not can_download:
             if self._has_drm(s) and not self.params.get('allow_unplayable_formats'):
                 if info_dict.get('has_drm') and self.params.get('test'):
@@ -128,8 +186,12 @@ def real_download(self, filename, info_dict):
             self.report_warning(message)
 
         is_webvtt = info_dict['ext'] == 'vtt'
+        # The playlist of a live stream is reloaded until it ends
+        is_live = bool(info_dict.get('is_live')) and '#EXT-X-ENDLIST' not in s
         if is_webvtt:
             real_downloader = None  # Packing the fragments is not currently supported for external downloader
+        elif is_live:
+            real_downloader = None  # The fragments are not known in advance
         else:
             real_downloader = get_suitable_downloader(
                 info_dict, self.params, None, protocol='m3u8_frag_urls', to_stdout=(filename == '-'))
@@ -146,8 +208,6 @@ def is_ad_fragment_end(s):
             return ((s.startswith('#ANVATO-SEGMENT-INFO') and 'type=master' in s)
                     or (s.startswith('#UPLYNK-SEGMENT') and s.endswith(',segment')))
 
-        fragments = []
-
         media_frags = 0
         ad_frags = 0
         ad_frag_next = False
@@ -168,7 +228,8 @@ def is_ad_fragment_end(s):
 
         ctx = {
             'filename': filename,
-            'total_frags': media_frags,
+            'live': is_live,
+            'total_frags': None if is_live else media_frags,
             'ad_frags': ad_frags,
         }
 
@@ -186,9 +247,6 @@ def is_ad_fragment_end(s):
         extra_key_query = None
         if extra_param_to_key_url := info_dict.get('extra_param_to_key_url'):
             extra_key_query = urllib.parse.parse_qs(extra_param_to_key_url)
-        i = 0
-        media_sequence = 0
-        decrypt_info = {'METHOD': 'NONE'}
         external_aes_key = traverse_obj(info_dict, ('hls_aes', 'key'))
         if external_aes_key:
             external_aes_key = binascii.unhexlify(remove_start(external_aes_key, '0x'))
@@ -196,111 +254,127 @@ def is_ad_fragment_end(s):
         external_aes_iv = traverse_obj(info_dict, ('hls_aes', 'iv'))
         if external_aes_iv:
             external_aes_iv = binascii.unhexlify(remove_start(external_aes_iv, '0x').zfill(32))
-        byte_range = {}
-        byte_range_offset = 0
-        discontinuity_count = 0
-        frag_index = 0
-        ad_frag_next = False
-        for line in s.splitlines():
-            line = line.strip()
-            if line:
-                if not line.startswith('#'):
-                    if format_index is not None and discontinuity_count != format_index:
-                        continue
-                    if ad_frag_next:
-                        continue
-                    frag_index += 1
-                    if frag_index <= ctx['fragment_index']:
-                        continue
-                    frag_url = urljoin(man_url, line)
-                    if extra_segment_query:
-                        frag_url = update_url_query(frag_url, extra_segment_query)
-
-                    fragments.append({
-                        'frag_index': frag_index,
-                        'url': frag_url,
-                        'decrypt_info': decrypt_info,
-                        'byte_range': byte_range,
-                        'media_sequence': media_sequence,
-                    })
-                    media_sequence += 1
-
-                    # If the byte_range is truthy, reset it after appending a fragment that uses it
-                    if byte_range:
-                        byte_range_offset = byte_range['end']
-                        byte_range = {}
-
-                elif line.startswith('#EXT-X-MAP'):
-                    if format_index is not None and discontinuity_count != format_index:
-                        continue
-                    if frag_index > 0:
-                        self.report_error(
-                            'Initialization fragment found after media fragments, unable to download')
-                        return False
-                    frag_index += 1
-                    map_info = parse_m3u8_attributes(line[11:])
-                    frag_url = urljoin(man_url, map_info.get('URI'))
-                    if extra_segment_query:
-                        frag_url = update_url_query(frag_url, extra_segment_query)
-
-                    map_byte_range = {}
-
-                    if map_info.get('BYTERANGE'):
-                        splitted_byte_range = map_info.get('BYTERANGE').split('@')
-                        sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else 0
-                        map_byte_range = {
+
+        resume_index = ctx['fragment_index']
+
+        def parse_fragments(s, man_url):
+            fragments = []
+            i = 0
+            media_sequence = 0
+            decrypt_info = {'METHOD': 'NONE'}
+            byte_range = {}
+            byte_range_offset = 0
+            discontinuity_count = 0
+            frag_index = 0
+            ad_frag_next = False
+            for line in s.splitlines():
+                line = line.strip()
+                if line:
+                    if not line.startswith('#'):
+                        if format_index is not None and discontinuity_count != format_index:
+                            continue
+                        if ad_frag_next:
+                            continue
+                        frag_index += 1
+                        if frag_index <= resume_index:
+                            continue
+                        frag_url = urljoin(man_url, line)
+                        if extra_segment_query:
+                            frag_url = update_url_query(frag_url, extra_segment_query)
+
+                        fragments.append({
+                            'frag_index': frag_index,
+                            'url': frag_url,
+                            'decrypt_info': decrypt_info,
+                            'byte_range': byte_range,
+                            'media_sequence': media_sequence,
+                        })
+                        media_sequence += 1
+
+                        # If the byte_range is truthy, reset it after appending a fragment that uses it
+                        if byte_range:
+                            byte_range_offset = byte_range['end']
+                            byte_range = {}
+
+                    elif line.startswith('#EXT-X-MAP'):
+                        if format_index is not None and discontinuity_count != format_index:
+                            continue
+                        if frag_index > 0:
+                            self.report_error(
+                                'Initialization fragment found after media fragments, unable to download')
+                            return None
+                        frag_index += 1
+                        map_info = parse_m3u8_attributes(line[11:])
+                        frag_url = urljoin(man_url, map_info.get('URI'))
+                        if extra_segment_query:
+                            frag_url = update_url_query(frag_url, extra_segment_query)
+
+                        map_byte_range = {}
+
+                        if map_info.get('BYTERANGE'):
+                            splitted_byte_range = map_info.get('BYTERANGE').split('@')
+                            sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else 0
+                            map_byte_range = {
+                                'start': sub_range_start,
+                                'end': sub_range_start + int(splitted_byte_range[0]),
+                            }
+
+                        fragments.append({
+                            'frag_index': frag_index,
+                            'url': frag_url,
+                            'decrypt_info': decrypt_info,
+                            'byte_range': map_byte_range,
+                            'media_sequence': media_sequence,
+                            'init_section': True,
+                        })
+                        media_sequence += 1
+
+                    elif line.startswith('#EXT-X-KEY'):
+                        decrypt_url = decrypt_info.get('URI')
+                        decrypt_info = parse_m3u8_attributes(line[11:])
+                        if decrypt_info['METHOD'] == 'AES-128':
+                            if external_aes_iv:
+                                decrypt_info['IV'] = external_aes_iv
+                            elif 'IV' in decrypt_info:
+                                decrypt_info['IV'] = binascii.unhexlify(decrypt_info['IV'][2:].zfill(32))
+                            if external_aes_key:
+                                decrypt_info['KEY'] = external_aes_key
+                            else:
+                                decrypt_info['URI'] = urljoin(man_url, decrypt_info['URI'])
+                                if extra_key_query or extra_segment_query:
+                                    # Fall back to extra_segment_query to key for backwards compat
+                                    decrypt_info['URI'] = update_url_query(
+                                        decrypt_info['URI'], extra_key_query or extra_segment_query)
+                                if decrypt_url != decrypt_info['URI']:
+                                    decrypt_info['KEY'] = None
+
+                    elif line.startswith('#EXT-X-MEDIA-SEQUENCE'):
+                        media_sequence = int(line[22:])
+                    elif line.startswith('#EXT-X-BYTERANGE'):
+                        splitted_byte_range = line[17:].split('@')
+                        sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else byte_range_offset
+                        byte_range = {
                             'start': sub_range_start,
                             'end': sub_range_start + int(splitted_byte_range[0]),
                         }
-
-                    fragments.append({
-                        'frag_index': frag_index,
-                        'url': frag_url,
-                        'decrypt_info': decrypt_info,
-                        'byte_range': map_byte_range,
-                        'media_sequence': media_sequence,
-                    })
-                    media_sequence += 1
-
-                elif line.startswith('#EXT-X-KEY'):
-                    decrypt_url = decrypt_info.get('URI')
-                    decrypt_info = parse_m3u8_attributes(line[11:])
-                    if decrypt_info['METHOD'] == 'AES-128':
-                        if external_aes_iv:
-                            decrypt_info['IV'] = external_aes_iv
-                        elif 'IV' in decrypt_info:
-                            decrypt_info['IV'] = binascii.unhexlify(decrypt_info['IV'][2:].zfill(32))
-                        if external_aes_key:
-                            decrypt_info['KEY'] = external_aes_key
-                        else:
-                            decrypt_info['URI'] = urljoin(man_url, decrypt_info['URI'])
-                            if extra_key_query or extra_segment_query:
-                                # Fall back to extra_segment_query to key for backwards compat
-                                decrypt_info['URI'] = update_url_query(
-                                    decrypt_info['URI'], extra_key_query or extra_segment_query)
-                            if decrypt_url != decrypt_info['URI']:
-                                decrypt_info['KEY'] = None
-
-                elif line.startswith('#EXT-X-MEDIA-SEQUENCE'):
-                    media_sequence = int(line[22:])
-                elif line.startswith('#EXT-X-BYTERANGE'):
-                    splitted_byte_range = line[17:].split('@')
-                    sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else byte_range_offset
-                    byte_range = {
-                        'start': sub_range_start,
-                        'end': sub_range_start + int(splitted_byte_range[0]),
-                    }
-                elif is_ad_fragment_start(line):
-                    ad_frag_next = True
-                elif is_ad_fragment_end(line):
-                    ad_frag_next = False
-                elif line.startswith('#EXT-X-DISCONTINUITY'):
-                    discontinuity_count += 1
-                i += 1
+                    elif is_ad_fragment_start(line):
+                        ad_frag_next = True
+                    elif is_ad_fragment_end(line):
+                        ad_frag_next = False
+                    elif line.startswith('#EXT-X-DISCONTINUITY'):
+                        discontinuity_count += 1
+                    i += 1
+            return fragments
+
+        fragments = parse_fragments(s, man_url)
+        if fragments is None:
+            return False
+        elif is_live:
+            fragments = self._live_fragments(info_dict, man_url, s, fragments, parse_fragments)
 
         # We only download the first fragment during the test
         if self.params.get('test', False):
-            fragments = [fragments[0] if fragments else None]
+            fragments = [next(iter(fragments), None)]
 
         if real_downloader:
             info_dict['fragments'] = fragments
@@ -400,7 +474,7 @@ def fin_fragments():
 
                 return output.getvalue().encode()
 
-            if len(fragments) == 1:
+            if not is_live and len(fragments) == 1:
                 self.download_and_append_fragments(ctx, fragments, info_dict)
             else:
                 self.download_and_append_fragments(
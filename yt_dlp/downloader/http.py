@@ -1,5 +1,8 @@
+import concurrent.futures
+import json
 import os
 import random
+import threading
 import time
 
 from .common import FileDownloader
@@ -23,8 +26,53 @@
 from ..utils.networking import HTTPHeaderDict
 
 
+class _Segment:
+    """A byte range [pos, end) of the file that is being downloaded by one connection"""
+
+    def __init__(self, pos, end):
+        self.pos, self.end = pos, end
+        self.active = False
+
+    @property
+    def remaining(self):
+        return self.end - self.pos
+
+
+class _ReadBuffer:
+    """
+    A reusable buffer for reading a response in blocks
+
+    The returned views are only valid until the next read, but no new
+    object has to be allocated for every block
+    """
+
+    def __init__(self):
+        self._view = memoryview(b'')
+
+    def read(self, response, size):
+        if size > len(self._view):
+            # Grow in powers of 2, since the block size changes with the throughput
+            self._view = memoryview(bytearray(1 << (size - 1).bit_length()))
+        return self._view[:response.readinto(self._view[:size])]
+
+
 class HttpFD(FileDownloader):
+    """
+    Available options (in addition to those of FileDownloader):
+
+    http_connections:   Number of connections to use for downloading different
+                        parts of a file concurrently, if the server supports it
+    """
+
+    # Segments are never split into parts that are smaller than this
+    _MIN_SEGMENT_SIZE = 1024 * 1024
+
     def real_download(self, filename, info_dict):
+        if self._can_download_segmented(filename, info_dict):
+            result = self._download_segmented(filename, info_dict)
+            if result is not None:
+                return result
+
         url = info_dict['url']
         request_data = info_dict.get('request_data', None)
         request_extensions = {}
@@ -63,6 +111,11 @@ class DownloadContext(dict):
             # Establish possible resume length
             if os.path.isfile(ctx.tmpfilename):
                 ctx.resume_len = os.path.getsize(ctx.tmpfilename)
+            if self._read_segments_state(filename):
+                # The file was preallocated by a segmented download, so its size is meaningless
+                self.report_unable_to_resume()
+                ctx.resume_len = 0
+                self.try_remove(self.ytdl_filename(filename))
 
         ctx.is_resume = ctx.resume_len > 0
 
@@ -231,6 +284,7 @@ def download():
 
             byte_counter = 0 + ctx.resume_len
             block_size = ctx.block_size
+            buffer = _ReadBuffer()
             start = time.time()
 
             # measure time over whole while-loop, so slow_down() and best_block_size() work together properly
@@ -251,7 +305,7 @@ def retry(e):
             while True:
                 try:
                     # Download and write
-                    data_block = ctx.data.read(block_size if not is_test else min(block_size, data_len - byte_counter))
+                    data_block = buffer.read(ctx.data, block_size if not is_test else min(block_size, data_len - byte_counter))
                 except TransportError as err:
                     retry(err)
 
@@ -288,6 +342,7 @@ def retry(e):
 
                 # Apply rate limit
                 self.slow_down(start, now, byte_counter - ctx.resume_len)
+                self.throttle(url, len(data_block), info_dict)
 
                 # end measuring of one loop run
                 now = time.time()
@@ -383,3 +438,228 @@ def retry(e):
                 close_stream()
                 raise
         return False
+
+    def _can_download_segmented(self, filename, info_dict):
+        if (self.params.get('http_connections') or 1) < 2 or filename == '-':
+            return False
+        # These are only implemented for a single connection
+        elif any(self.params.get(key) for key in (
+                'test', 'ratelimit', 'min_filesize', 'max_filesize', 'xattr_set_filesize')):
+            return False
+        return 'Range' not in HTTPHeaderDict(info_dict.get('http_headers'))
+
+    def _read_segments_state(self, filename):
+        try:
+            with open(self.ytdl_filename(filename), encoding='utf-8') as f:
+                return json.load(f)['downloader']['http_segments']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_segments_state(self, filename, total, segments):
+        with open(self.ytdl_filename(filename), 'w', encoding='utf-8') as f:
+            json.dump({'downloader': {'http_segments': {
+                'total_bytes': total,
+                'remaining': [[segment.pos, segment.end] for segment in segments if segment.remaining > 0],
+            }}}, f)
+
+    def _download_segmented(self, filename, info_dict):
+        """
+        Download different parts of the file with multiple connections
+
+        Every connection downloads a segment of the file. When a connection becomes idle,
+        it takes over the second half of the largest remaining segment.
+        The data is written at its offset in a preallocated file, and the remaining
+        segments are saved in the .ytdl file so that the download can be resumed.
+
+        @returns    None if the server does not support range requests
+        """
+        url = info_dict['url']
+        request_data = info_dict.get('request_data')
+        request_extensions = {}
+        impersonate_target = self._get_impersonate_target(info_dict)
+        if impersonate_target is not None:
+            request_extensions['impersonate'] = impersonate_target
+        headers = HTTPHeaderDict({'Accept-Encoding': 'identity'}, info_dict.get('http_headers'))
+        chunk_size = (
+            self.params.get('http_chunk_size')
+            or info_dict.get('downloader_options', {}).get('http_chunk_size')
+            or 0)
+        connections = self.params['http_connections']
+
+        def open_range(start, end):
+            """Request the bytes [start, end), or a chunk of them. Returns the response, its end and the file size"""
+            if chunk_size:
+                end = min(end or float('inf'), start + random.randint(int(chunk_size * 0.95), chunk_size))
+            # The headers are copied, since the connections request their ranges concurrently
+            request = Request(url, request_data, HTTPHeaderDict(headers, {
+                'Range': f'bytes={start}-{"" if end is None else end - 1}',
+            }), extensions=request_extensions)
+            response = self.ydl.urlopen(request)
+            content_range_start, _, total = parse_http_range(response.headers.get('Content-Range'))
+            if response.status != 206 or content_range_start != start or not total:
+                response.close()
+                return None, None, None
+            return response, min(end or total, total), total
+
+        try:
+            response, response_end, total = open_range(0, None)
+        except (HTTPError, TransportError):
+            # Let the single connection download handle the errors
+            return None
+        if not total or total < 2 * self._MIN_SEGMENT_SIZE:
+            if response:
+                response.close()
+            return None
+        last_modified = response.headers.get('last-modified')
+
+        tmpfilename = self.temp_name(filename)
+        state = self.params.get('continuedl', True) and self._read_segments_state(filename)
+        if (state and state.get('total_bytes') == total
+                and self.filesize_or_none(tmpfilename) == total):
+            segments = [_Segment(pos, end) for pos, end in state['remaining']]
+            self.report_resuming_byte(total - sum(segment.remaining for segment in segments))
+            stream = open(tmpfilename, 'r+b')
+        else:
+            segments = [_Segment(0, total)]
+            stream, tmpfilename = self.sanitize_open(tmpfilename, 'wb')
+            stream.truncate(total)  # Sparse on most file systems
+        if segments and segments[0].pos == 0:
+            segments[0].active = True
+        else:
+            response.close()
+            response = None
+        self.report_destination(filename)
+        self.to_screen(f'[download] Downloading with {connections} connections')
+
+        lock, write_lock, stop = threading.Lock(), threading.Lock(), threading.Event()
+        resume_len = total - sum(segment.remaining for segment in segments)
+
+        def write(offset, data):
+            if hasattr(os, 'pwrite'):
+                while data:
+                    written = os.pwrite(stream.fileno(), data, offset)
+                    data, offset = data[written:], offset + written
+            else:
+                with write_lock:
+                    stream.seek(offset)
+                    stream.write(data)
+
+        def next_segment():
+            with lock:
+                segment = next((s for s in segments if not s.active and s.remaining > 0), None)
+                if segment is None:
+                    # Take over the second half of the largest segment
+                    largest = max(segments, key=lambda s: s.remaining, default=None)
+                    if not largest or largest.remaining < 2 * self._MIN_SEGMENT_SIZE:
+                        return None
+                    segment = _Segment(largest.pos + largest.remaining // 2, largest.end)
+                    largest.end = segment.pos
+                    segments.append(segment)
+                segment.active = True
+                return segment
+
+        def download_segment(segment, response, response_end):
+            block_size, buffer = self.params.get('buffersize', 1024), _ReadBuffer()
+            for retry in RetryManager(self.params.get('retries'), self.report_retry):
+                try:
+                    while not stop.is_set() and segment.remaining > 0:
+                        if response is None:
+                            response, response_end, _ = open_range(segment.pos, segment.end)
+                            if response is None:
+                                raise TransportError('The server did not honor the range request')
+                        with lock:
+                            size = min(block_size, segment.remaining, response_end - segment.pos)
+                        if size <= 0:
+                            response.close()
+                            response = None
+                            continue
+                        before = time.time()
+                        data = buffer.read(response, size)
+                        if not data:
+                            raise ContentTooShortError(segment.pos, response_end)
+                        with lock:
+                            # The end may have moved if the segment was split in the meantime
+                            offset, data = segment.pos, data[:max(segment.remaining, 0)]
+                            segment.pos += len(data)
+                        write(offset, data)
+                        self.throttle(url, len(data), info_dict)
+                        if not self.params.get('noresizebuffer', False):
+                            block_size = self.best_block_size(time.time() - before, len(data))
+                except (TransportError, ContentTooShortError) as err:
+                    if isinstance(err, HTTPError) and not 500 <= err.status < 600:
+                        raise
+                    retry.error = err
+                finally:
+                    if response is not None:
+                        response.close()
+                        response = None
+            return segment.remaining <= 0 or stop.is_set()
+
+        def worker(segment=None, response=None, response_end=None):
+            segment = segment or next_segment()
+            while segment and not stop.is_set():
+                if not download_segment(segment, response, response_end):
+                    stop.set()  # The error has already been reported
+                    return
+                response = None
+                with lock:
+                    segment.active = False
+                segment = next_segment()
+
+        start = last_save = time.time()
+        pool = concurrent.futures.ThreadPoolExecutor(connections)
+        try:
+            futures = [pool.submit(worker, segments[0], response, response_end) if response else pool.submit(worker)]
+            futures += [pool.submit(worker) for _ in range(connections - 1)]
+            while True:
+                done, not_done = concurrent.futures.wait(
+                    futures, timeout=0.5, return_when=concurrent.futures.FIRST_EXCEPTION)
+                if any(future.exception() for future in done):
+                    break
+                now = time.time()
+                with lock:
+                    downloaded = total - sum(max(segment.remaining, 0) for segment in segments)
+                    if now - last_save > 1 or not not_done:
+                        last_save = now
+                        self._write_segments_state(filename, total, segments)
+                if not not_done:
+                    break
+                speed = self.calc_speed(start, now, downloaded - resume_len)
+                self._hook_progress({
+                    'status': 'downloading',
+                    'downloaded_bytes': downloaded,
+                    'total_bytes': total,
+                    'tmpfilename': tmpfilename,
+                    'filename': filename,
+                    'eta': self.calc_eta(speed, total - downloaded),
+                    'speed': speed,
+                    'elapsed': now - start,
+                    'ctx_id': info_dict.get('ctx_id'),
+                }, info_dict)
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+            stream.close()
+            with lock:
+                self._write_segments_state(filename, total, segments)
+        for future in futures:
+            future.result()  # Raise the errors of the workers
+
+        if any(segment.remaining > 0 for segment in segments):
+            self.report_error('Some parts of the file could not be downloaded')
+            return False
+
+        self.try_remove(self.ytdl_filename(filename))
+        self.try_rename(tmpfilename, filename)
+        if self.params.get('updatetime'):
+            info_dict['filetime'] = self.try_utime(filename, last_modified)
+
+        self._hook_progress({
+            'downloaded_bytes': total,
+            'total_bytes': total,
+            'filename': filename,
+            'status': 'finished',
+            'elapsed': time.time() - start,
+            'ctx_id': info_dict.get('ctx_id'),
+        }, info_dict)
+        return True
@@ -0,0 +1,203 @@
+import collections
+import sys
+
+if sys.version_info >= (3, 11):
+    import re._constants as sre_constants
+    import re._parser as sre_parse
+else:
+    import sre_constants
+    import sre_parse
+
+from ..utils import variadic
+
+# Length of the substrings used as index keys. Literals shorter than this cannot be indexed
+KEY_LENGTH = 4
+
+_OP = sre_constants
+_REPEATS = {_OP.MAX_REPEAT, _OP.MIN_REPEAT, getattr(_OP, 'POSSESSIVE_REPEAT', _OP.MAX_REPEAT)}
+_ATOMIC_GROUP = getattr(_OP, 'ATOMIC_GROUP', None)
+_ZERO_WIDTH = {_OP.AT, _OP.ASSERT, _OP.ASSERT_NOT}
+
+
+class _Literals(collections.namedtuple('_Literals', ('exact', 'prefix', 'suffix', 'required'))):
+    """Summary of the literal text every match of a (sub)pattern must contain
+
+    @param exact     The only string the pattern can match, or None
+    @param prefix    A string every match starts with
+    @param suffix    A string every match ends with
+    @param required  A set of strings, one of which is contained in every match, or None
+    """
+
+    @classmethod
+    def unknown(cls):
+        return cls(None, '', '', None)
+
+    def best(self):
+        if self.exact is not None:
+            return {self.exact}
+        return max(
+            (s for s in ({self.prefix}, {self.suffix}, self.required) if s),
+            key=lambda s: (min(map(len, s)), -len(s)), default=None)
+
+
+def _char(op, av):
+    """Return the lowercase character matched by a single-character item, if it is fixed"""
+    if op is _OP.LITERAL:
+        chars = {av}
+    elif op is _OP.IN and all(o is _OP.LITERAL for o, _ in av):
+        chars = {c for _, c in av}
+    else:
+        return None
+    chars = {chr(c).lower() for c in chars}
+    if len(chars) == 1:
+        char = chars.pop()
+        if char.isascii():
+            return char
+    return None
+
+
+def _analyze_branches(branches):
+    results = [_analyze(branch) for branch in branches]
+    exacts = {r.exact for r in results}
+    if len(exacts) == 1 and None not in exacts:
+        return _Literals(exacts.pop(), '', '', None)
+
+    starts = [r.prefix if r.exact is None else r.exact for r in results]
+    ends = [r.suffix if r.exact is None else r.exact for r in results]
+    prefix = starts[0][:min(map(len, starts))]
+    while not all(s.startswith(prefix) for s in starts):
+        prefix = prefix[:-1]
+    suffix = ends[0][len(ends[0]) - min(map(len, ends)):]
+    while not all(s.endswith(suffix) for s in ends):
+        suffix = suffix[1:]
+
+    required = set()
+    for result in results:
+        best = result.best()
+        if not best:
+            required = None
+            break
+        required.update(best)
+    return _Literals(None, prefix, suffix, required)
+
+
+def _analyze(pattern):
+    """Compute the _Literals of a parsed sequence of regex items"""
+    run, prefix, candidates, exact = '', None, [], True
+    for op, av in pattern:
+        char = _char(op, av)
+        if char is not None:
+            run += char
+            continue
+        elif op in _ZERO_WIDTH:
+            continue
+        elif op is _OP.SUBPATTERN:
+            result = _analyze(av[-1])
+        elif op is _ATOMIC_GROUP:
+            result = _analyze(av)
+        elif op is _OP.BRANCH:
+            result = _analyze_branches(av[1])
+        elif op is _OP.GROUPREF_EXISTS:
+            result = _analyze_branches([av[1], av[2] or []])
+        elif op in _REPEATS:
+            min_count, max_count, item = av
+            result = _analyze(item) if min_count else _Literals.unknown()
+            if result.exact is not None and min_count != max_count:
+                result = _Literals(None, result.exact, result.exact, {result.exact})
+            elif result.exact is not None:
+                result = _Literals(result.exact * min_count, '', '', None)
+        else:
+            result = _Literals.unknown()
+
+        if result.exact is not None:
+            run += result.exact
+            continue
+        run += result.prefix
+        if exact:
+            prefix, exact = run, False
+        candidates.extend(({run}, result.required))
+        run = result.suffix
+
+    if exact:
+        return _Literals(run, '', '', None)
+    candidates.append({run})
+    required = max(
+        filter(lambda s: s and all(s), candidates),
+        key=lambda s: (min(map(len, s)), -len(s)), default=None)
+    return _Literals(None, prefix, run, required)
+
+
+def valid_url_literals(valid_url):
+    """
+    Find literal strings that any URL matched by _VALID_URL must contain
+
+    @param valid_url    A regex or a sequence of regexes, as in InfoExtractor._VALID_URL
+    @returns            A tuple of lowercase strings, one of which is contained in
+                        every suitable URL (after lowercasing), or None if unknown
+    """
+    if valid_url is False:
+        return ()
+    elif not valid_url:
+        return None
+    literals = set()
+    for regex in variadic(valid_url):
+        try:
+            best = _analyze(sre_parse.parse(regex)).best()
+        except Exception:
+            return None
+        if not best or min(map(len, best)) < KEY_LENGTH:
+            return None
+        literals.update(best)
+    return tuple(sorted(literals))
+
+
+class URLIndex:
+    """
+    Index of extractors by literal substrings of their _VALID_URL
+
+    Only a few candidate extractors need to be tested using suitable() for a URL,
+    while the relative order of the extractors is preserved.
+    This relies on suitable() never accepting a URL that is not matched by _VALID_URL.
+    Extractors whose _VALID_URL cannot be analyzed are always considered as candidates.
+    """
+
+    def __init__(self, ies):
+        """@param ies    An ordered mapping of ie_key to extractor class or instance"""
+        self._keys = list(ies)
+        self._fallback = []
+        self._index = collections.defaultdict(list)
+
+        all_literals = []
+        for idx, ie in enumerate(ies.values()):
+            literals = ie._VALID_URL_LITERALS
+            if literals is None:
+                self._fallback.append(idx)
+            else:
+                all_literals.append((idx, literals))
+
+        # Key each literal by its least common substring so that the buckets stay small
+        frequency = collections.Counter(
+            key for _, literals in all_literals for literal in literals
+            for key in {literal[i:i + KEY_LENGTH] for i in range(len(literal) - KEY_LENGTH + 1)})
+        for idx, literals in all_literals:
+            for literal in literals:
+                key = min(
+                    (literal[i:i + KEY_LENGTH] for i in range(len(literal) - KEY_LENGTH + 1)),
+                    key=frequency.__getitem__)
+                bucket = self._index[key]
+                if not bucket or bucket[-1] != idx:
+                    bucket.append(idx)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def candidates(self, url):
+        """Return the ie_keys that may be suitable for the URL, in their original order"""
+        url = str(url)
+        if not url.isascii():
+            return list(self._keys)
+        url = url.lower()
+        idxs = set(self._fallback)
+        for key in {url[i:i + KEY_LENGTH] for i in range(len(url) - KEY_LENGTH + 1)}:
+            idxs.update(self._index.get(key, ()))
+        return [self._keys[idx] for idx in sorted(idxs)]
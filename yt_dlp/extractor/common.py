@@ -535,6 +535,8 @@ class InfoExtractor:
     Subclasses may also override suitable() if necessary, but ensure the function
     signature is preserved and that this function imports everything it needs
     (except other extractors), so that lazy_extractors works correctly.
+    suitable() must never accept a URL that is not matched by _VALID_URL,
+    since extractors are pre-selected for a URL using literals from _VALID_URL.
 
     Subclasses can define a list of _EMBED_REGEX, which will be searched for in
     the HTML of Generic webpages. It may also override _extract_embed_urls
@@ -623,6 +625,13 @@ def _match_valid_url(cls, url):
             cls._VALID_URL_RE = tuple(map(re.compile, variadic(cls._VALID_URL)))
         return next(filter(None, (regex.match(url) for regex in cls._VALID_URL_RE)), None)
 
+    @classproperty(cache=True)
+    def _VALID_URL_LITERALS(cls):
+        """Literal strings, one of which is contained in every (lowercased) suitable URL"""
+        from ._urlindex import valid_url_literals
+
+        return valid_url_literals(cls._VALID_URL)
+
     @classmethod
     def suitable(cls, url):
         """Receives a URL and returns True if suitable for this IE."""
@@ -873,6 +882,9 @@ def _request_webpage(self, url_or_request, video_id, note=None, errnote=None, fa
                 time.sleep(sleep_interval)
         else:
             self._downloader._first_webpage_request = False
+        # The total and per host request rates are limited by the request director
+        if self._downloader.rate_limiter:
+            time.sleep(self._downloader.rate_limiter.reserve('requests', extractor=self.ie_key()))
 
         if note is None:
             self.report_download_webpage(video_id)
@@ -84,6 +84,75 @@
 PO_TOKEN_GUIDE_URL = 'https://github.com/yt-dlp/yt-dlp/wiki/PO-Token-Guide'
 
 
+class _PlayerArtifactCache:
+    """
+    In-memory cache of data derived from player JS, shared by all extractor instances
+
+    Artifacts are grouped by the _player_js_cache_key of their player,
+    and only the artifacts of the most recently used players are kept.
+    The persistent counterpart is the cache of the YoutubeDL instance
+    """
+
+    def __init__(self, max_players=4, max_results=1024):
+        self._max_players, self._max_results = max_players, max_results
+        self._players = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def __str__(self):
+        return ', '.join(
+            f'{name} {self.stats[f"{name} hit"]}/{self.stats[f"{name} hit"] + self.stats[f"{name} miss"]}'
+            for name in sorted({key.rpartition(' ')[0] for key in self.stats}))
+
+    def _artifacts(self, player_js_key, create=False):
+        artifacts = self._players.get(player_js_key)
+        if artifacts is None:
+            if not create:
+                return {}
+            artifacts = self._players[player_js_key] = {}
+            while len(self._players) > self._max_players:
+                self._players.popitem(last=False)
+        self._players.move_to_end(player_js_key)
+        return artifacts
+
+    def get(self, player_js_key, name):
+        with self._lock:
+            value = self._artifacts(player_js_key).get(name)
+            self.stats[f'{name} {"miss" if value is None else "hit"}'] += 1
+            return value
+
+    def add(self, player_js_key, name, value):
+        """Returns whether the artifact was not already present"""
+        with self._lock:
+            return self._artifacts(player_js_key, create=True).setdefault(name, value) is value
+
+    def remove(self, player_js_key, name):
+        with self._lock:
+            self._artifacts(player_js_key).pop(name, None)
+
+    def load_results(self, player_js_key, name, loader):
+        """Add the results returned by loader() the first time that the results of the player are needed"""
+        with self._lock:
+            artifacts = self._artifacts(player_js_key, create=True)
+            if f'{name} results' not in artifacts:
+                results = artifacts[f'{name} results'] = collections.OrderedDict(loader())
+                while len(results) > self._max_results:
+                    results.popitem(last=False)
+
+    def get_result(self, player_js_key, name, arg):
+        with self._lock:
+            value = self._artifacts(player_js_key).get(f'{name} results', {}).get(arg)
+            self.stats[f'{name} result {"miss" if value is None else "hit"}'] += 1
+            return value
+
+    def add_result(self, player_js_key, name, arg, value):
+        with self._lock:
+            results = self._artifacts(player_js_key, create=True).setdefault(f'{name} results', collections.OrderedDict())
+            results[arg] = value
+            while len(results) > self._max_results:
+                results.popitem(last=False)
+
+
 class YoutubeIE(YoutubeBaseInfoExtractor):
     IE_DESC = 'YouTube'
     _VALID_URL = r'''(?x)^
@@ -1828,6 +1897,9 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
     }
     _INVERSE_PLAYER_JS_VARIANT_MAP = {v: k for k, v in _PLAYER_JS_VARIANT_MAP.items()}
     _NSIG_FUNC_CACHE_ID = 'nsig func'
+    _PLAYER_ARTIFACTS = _PlayerArtifactCache()
+    # Number of players, and of nsig results of each player, to keep in the persistent cache
+    _CACHED_PLAYERS, _CACHED_NSIG_RESULTS = 4, 1024
     _DUMMY_STRING = 'dlp_wins'
 
     @classmethod
@@ -1841,8 +1913,6 @@ def suitable(cls, url):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._code_cache = {}
-        self._player_cache = {}
         self._pot_director = None
 
     def _real_initialize(self):
@@ -2079,23 +2149,35 @@ def _extract_player_info(cls, player_url):
 
     def _load_player(self, video_id, player_url, fatal=True):
         player_js_key = self._player_js_cache_key(player_url)
-        if player_js_key not in self._code_cache:
+        code = self._PLAYER_ARTIFACTS.get(player_js_key, 'js')
+        if code:
+            return code
+
+        code = self.cache.load('youtube-player', player_js_key, min_ver='2025.07.21')
+        if not code:
+            self.write_debug(f'Player artifact cache hits: {self._PLAYER_ARTIFACTS}')
             code = self._download_webpage(
                 player_url, video_id, fatal=fatal,
                 note=f'Downloading player {player_js_key}',
                 errnote=f'Download of {player_js_key} failed')
-            if code:
-                self._code_cache[player_js_key] = code
-        return self._code_cache.get(player_js_key)
+            if not code:
+                return None
+            # The JS is several MB, so only the most recently downloaded players are kept
+            self.cache.store('youtube-player', player_js_key, code, max_entries=self._CACHED_PLAYERS)
+        self._PLAYER_ARTIFACTS.add(player_js_key, 'js', code)
+        return code
 
     def _extract_signature_function(self, video_id, player_url, example_sig):
-        # Read from filesystem cache
-        func_id = join_nonempty(
-            self._player_js_cache_key(player_url), self._signature_cache_id(example_sig))
+        # Read from memory or filesystem cache
+        player_js_key = self._player_js_cache_key(player_url)
+        artifact_name = f'sigfuncs {self._signature_cache_id(example_sig)}'
+        func_id = join_nonempty(player_js_key, self._signature_cache_id(example_sig))
         assert os.path.basename(func_id) == func_id
 
         self.write_debug(f'Extracting signature function {func_id}')
-        cache_spec, code = self.cache.load('youtube-sigfuncs', func_id, min_ver='2025.07.21'), None
+        cache_spec, code = self._PLAYER_ARTIFACTS.get(player_js_key, artifact_name), None
+        if not cache_spec:
+            cache_spec = self.cache.load('youtube-sigfuncs', func_id, min_ver='2025.07.21')
 
         if not cache_spec:
             code = self._load_player(video_id, player_url)
@@ -2104,6 +2186,8 @@ def _extract_signature_function(self, video_id, player_url, example_sig):
             test_string = ''.join(map(chr, range(len(example_sig))))
             cache_spec = [ord(c) for c in res(test_string)]
             self.cache.store('youtube-sigfuncs', func_id, cache_spec)
+        if cache_spec:
+            self._PLAYER_ARTIFACTS.add(player_js_key, artifact_name, cache_spec)
 
         return lambda s: ''.join(s[i] for i in cache_spec)
 
@@ -2177,39 +2261,44 @@ def _parse_sig_js(self, jscode, player_url):
         initial_function = jsi.extract_function(funcname, filter_dict({varname: global_list}))
         return lambda s: initial_function([s])
 
-    def _cached(self, func, *cache_id):
+    def _cached(self, func, name, player_url, *cache_id):
+        """Memoize the result of func as an artifact of the player, shared by all the instances"""
         def inner(*args, **kwargs):
-            if cache_id not in self._player_cache:
+            if player_url is None:
+                return func(*args, **kwargs)
+            player_js_key = self._player_js_cache_key(player_url)
+            artifact_name = join_nonempty(name, *cache_id, delim=' ')
+            ret = self._PLAYER_ARTIFACTS.get(player_js_key, artifact_name)
+            if ret is None:
                 try:
-                    self._player_cache[cache_id] = func(*args, **kwargs)
+                    ret = func(*args, **kwargs)
                 except ExtractorError as e:
-                    self._player_cache[cache_id] = e
+                    ret = e
                 except Exception as e:
-                    self._player_cache[cache_id] = ExtractorError(traceback.format_exc(), cause=e)
+                    ret = ExtractorError(traceback.format_exc(), cause=e)
+                self._PLAYER_ARTIFACTS.add(player_js_key, artifact_name, ret)
 
-            ret = self._player_cache[cache_id]
             if isinstance(ret, Exception):
                 raise ret
             return ret
         return inner
 
     def _load_player_data_from_cache(self, name, player_url):
-        cache_id = (f'youtube-{name}', self._player_js_cache_key(player_url))
+        player_js_key = self._player_js_cache_key(player_url)
 
-        if data := self._player_cache.get(cache_id):
+        if data := self._PLAYER_ARTIFACTS.get(player_js_key, name):
             return data
 
-        data = self.cache.load(*cache_id, min_ver='2025.07.21')
+        data = self.cache.load(f'youtube-{name}', player_js_key, min_ver='2025.07.21')
         if data:
-            self._player_cache[cache_id] = data
+            self._PLAYER_ARTIFACTS.add(player_js_key, name, data)
 
         return data
 
     def _store_player_data_to_cache(self, name, player_url, data):
-        cache_id = (f'youtube-{name}', self._player_js_cache_key(player_url))
-        if cache_id not in self._player_cache:
-            self.cache.store(*cache_id, data)
-            self._player_cache[cache_id] = data
+        player_js_key = self._player_js_cache_key(player_url)
+        if self._PLAYER_ARTIFACTS.add(player_js_key, name, data):
+            self.cache.store(f'youtube-{name}', player_js_key, data)
 
     def _decrypt_signature(self, s, video_id, player_url):
         """Turn the encrypted s field into a working signature"""
@@ -2224,7 +2313,42 @@ def _decrypt_nsig(self, s, video_id, player_url):
         if player_url is None:
             raise ExtractorError('Cannot decrypt nsig without player_url')
         player_url = urljoin('https://www.youtube.com', player_url)
+        player_js_key = self._player_js_cache_key(player_url)
+        self._PLAYER_ARTIFACTS.load_results(player_js_key, 'nsig', lambda: self._load_nsig_results(player_js_key))
+        if ret := self._PLAYER_ARTIFACTS.get_result(player_js_key, 'nsig', s):
+            if isinstance(ret, Exception):
+                raise ret
+            return ret
 
+        try:
+            ret = self._solve_nsig(s, video_id, player_url)
+        except ExtractorError as e:
+            error = e
+        except Exception as e:
+            error = ExtractorError(traceback.format_exc(), cause=e)
+        else:
+            self.write_debug(f'Decrypted nsig {s} => {ret}')
+            self._PLAYER_ARTIFACTS.add_result(player_js_key, 'nsig', s, ret)
+            self._store_nsig_result(player_js_key, s, ret)
+            return ret
+        # Failures are only remembered in memory, so that the next process retries them
+        self._PLAYER_ARTIFACTS.add_result(player_js_key, 'nsig', s, error)
+        raise error
+
+    def _load_nsig_results(self, player_js_key):
+        results = self.cache.load('youtube-nsig-results', player_js_key, min_ver='2025.07.21')
+        return results if isinstance(results, dict) else {}
+
+    def _store_nsig_result(self, player_js_key, s, ret):
+        # Merge with the results that other processes may have stored since they were loaded
+        results = self._load_nsig_results(player_js_key)
+        results.pop(s, None)
+        results[s] = ret
+        self.cache.store(
+            'youtube-nsig-results', player_js_key, dict(list(results.items())[-self._CACHED_NSIG_RESULTS:]),
+            max_entries=self._CACHED_PLAYERS)
+
+    def _solve_nsig(self, s, video_id, player_url):
         try:
             jsi, player_id, func_code = self._extract_n_function_code(video_id, player_url)
         except ExtractorError as e:
@@ -2250,7 +2374,6 @@ def _decrypt_nsig(self, s, video_id, player_url):
                 f'console.log(function({", ".join(args)}) {{ {func_body} }}({s!r}));',
                 video_id=video_id, note='Executing signature code').strip()
 
-        self.write_debug(f'Decrypted nsig {s} => {ret}')
         # Only cache nsig func JS code to disk if successful, and only once
         self._store_player_data_to_cache('nsig', player_url, func_code)
         return ret
@@ -2368,12 +2491,12 @@ def _fixup_n_function_code(self, argnames, nsig_code, jscode, player_url):
 
         # Fixup global funcs
         jsi = JSInterpreter(fixed_code)
-        cache_id = (self._NSIG_FUNC_CACHE_ID, player_url)
         try:
-            self._cached(
-                self._extract_n_function_from_code, *cache_id)(jsi, (argnames, fixed_code))(self._DUMMY_STRING)
+            self._cached(self._extract_n_function_from_code, self._NSIG_FUNC_CACHE_ID, player_url)(
+                jsi, (argnames, fixed_code))(self._DUMMY_STRING)
         except JSInterpreter.Exception:
-            self._player_cache.pop(cache_id, None)
+            if player_url:
+                self._PLAYER_ARTIFACTS.remove(self._player_js_cache_key(player_url), self._NSIG_FUNC_CACHE_ID)
 
         global_funcnames = jsi._undefined_varnames
         debug_names = []
@@ -3470,9 +3593,8 @@ def gvs_pot_required(policy, is_premium_subscriber, has_player_token):
             query = parse_qs(fmt_url)
             if query.get('n'):
                 try:
-                    decrypt_nsig = self._cached(self._decrypt_nsig, 'nsig', query['n'][0])
                     fmt_url = update_url_query(fmt_url, {
-                        'n': decrypt_nsig(query['n'][0], video_id, player_url),
+                        'n': self._decrypt_nsig(query['n'][0], video_id, player_url),
                     })
                 except ExtractorError as e:
                     if player_url:
@@ -1,5 +1,6 @@
 import collections
 import contextlib
+import functools
 import itertools
 import json
 import math
@@ -191,6 +192,29 @@ def js_number_to_string(val: float, radix: int = 10):
 _NESTED_BRACKETS = r'[^[\]]+(?:\[[^[\]]+(?:\[[^\]]+\])?\])?'
 
 
+_ASSIGNMENT_RE = re.compile(fr'''(?x)
+        (?P<out>{_NAME_RE})(?:\[(?P<index>{_NESTED_BRACKETS})\])?\s*
+        (?P<op>{"|".join(map(re.escape, set(_OPERATORS) - _COMP_OPERATORS))})?
+        =(?!=)(?P<expr>.*)$
+    ''')
+_INCREMENT_RE = re.compile(rf'''(?x)
+        (?P<pre_sign>\+\+|--)(?P<var1>{_NAME_RE})|
+        (?P<var2>{_NAME_RE})(?P<post_sign>\+\+|--)''')
+_EXPRESSION_RE = re.compile(fr'''(?x)
+    (?P<return>
+        (?!if|return|true|false|null|undefined|NaN)(?P<name>{_NAME_RE})$
+    )|(?P<attribute>
+        (?P<var>{_NAME_RE})(?:
+            (?P<nullish>\?)?\.(?P<member>[^(]+)|
+            \[(?P<member2>{_NESTED_BRACKETS})\]
+        )\s*
+    )|(?P<indexing>
+        (?P<in>{_NAME_RE})\[(?P<idx>.+)\]$
+    )|(?P<function>
+        (?P<fname>{_NAME_RE})\((?P<args>.*)\)$
+    )''')
+
+
 class JS_Undefined:
     pass
 
@@ -260,6 +284,39 @@ def interpret_statement(self, stmt, local_vars, allow_recursion, *args, **kwargs
         return interpret_statement
 
 
+# NB: The results of parsing are memoized since the interpreter
+# parses the same code again every time it is evaluated
+@functools.lru_cache(maxsize=16384)
+def _separate_cached(expr, delim, max_split):
+    return tuple(JSInterpreter._separate_uncached(expr, delim, max_split))
+
+
+@functools.lru_cache(maxsize=16384)
+def _separate_at_operator(expr):
+    """Returns (operator, left operand, right operand) of the operator in expr with the lowest precedence"""
+    for op in _OPERATORS:
+        separated = list(JSInterpreter._separate(expr, op))
+        right_expr = separated.pop()
+        while True:
+            if op in '?<>*-' and len(separated) > 1 and not separated[-1].strip():
+                separated.pop()
+            elif not (separated and op == '?' and right_expr.startswith('.')):
+                break
+            right_expr = f'{op}{right_expr}'
+            if op != '-':
+                right_expr = f'{separated.pop()}{op}{right_expr}'
+        if separated:
+            return op, op.join(separated), right_expr
+    return None
+
+
+@functools.lru_cache(maxsize=16384)
+def _js_to_json_cached(expr):
+    with contextlib.suppress(ValueError):
+        return js_to_json(expr, strict=True)
+    return None
+
+
 class JSInterpreter:
     __named_object_counter = 0
 
@@ -308,6 +365,12 @@ def _regex_flags(cls, expr):
 
     @staticmethod
     def _separate(expr, delim=',', max_split=None):
+        if not expr:
+            return iter(())
+        return iter(_separate_cached(expr, delim, max_split))
+
+    @staticmethod
+    def _separate_uncached(expr, delim=',', max_split=None):
         OP_CHARS = '+-*/%&|^=<>!,;{}:['
         if not expr:
             return
@@ -601,11 +664,7 @@ def dict_item(key, val):
                     return ret, True
             return ret, False
 
-        m = re.match(fr'''(?x)
-                (?P<out>{_NAME_RE})(?:\[(?P<index>{_NESTED_BRACKETS})\])?\s*
-                (?P<op>{"|".join(map(re.escape, set(_OPERATORS) - _COMP_OPERATORS))})?
-                =(?!=)(?P<expr>.*)$
-            ''', expr)
+        m = _ASSIGNMENT_RE.match(expr)
         if m:  # We are assigning a value to a variable
             left_val = local_vars.get(m.group('out'))
 
@@ -628,9 +687,7 @@ def dict_item(key, val):
                 m.group('op'), self._index(left_val, idx), m.group('expr'), expr, local_vars, allow_recursion)
             return left_val[idx], should_return
 
-        for m in re.finditer(rf'''(?x)
-                (?P<pre_sign>\+\+|--)(?P<var1>{_NAME_RE})|
-                (?P<var2>{_NAME_RE})(?P<post_sign>\+\+|--)''', expr):
+        for m in _INCREMENT_RE.finditer(expr):
             var = m.group('var1') or m.group('var2')
             start, end = m.span()
             sign = m.group('pre_sign') or m.group('post_sign')
@@ -643,19 +700,7 @@ def dict_item(key, val):
         if not expr:
             return None, should_return
 
-        m = re.match(fr'''(?x)
-            (?P<return>
-                (?!if|return|true|false|null|undefined|NaN)(?P<name>{_NAME_RE})$
-            )|(?P<attribute>
-                (?P<var>{_NAME_RE})(?:
-                    (?P<nullish>\?)?\.(?P<member>[^(]+)|
-                    \[(?P<member2>{_NESTED_BRACKETS})\]
-                )\s*
-            )|(?P<indexing>
-                (?P<in>{_NAME_RE})\[(?P<idx>.+)\]$
-            )|(?P<function>
-                (?P<fname>{_NAME_RE})\((?P<args>.*)\)$
-            )''', expr)
+        m = _EXPRESSION_RE.match(expr)
         if expr.isdigit():
             return int(expr), should_return
 
@@ -683,28 +728,20 @@ def dict_item(key, val):
                     self._undefined_varnames.add(var)
             return ret, should_return
 
-        with contextlib.suppress(ValueError):
-            return json.loads(js_to_json(expr, strict=True)), should_return
+        json_expr = _js_to_json_cached(expr)
+        if json_expr is not None:
+            with contextlib.suppress(ValueError):
+                return json.loads(json_expr), should_return
 
         if m and m.group('indexing'):
             val = local_vars[m.group('in')]
             idx = self.interpret_expression(m.group('idx'), local_vars, allow_recursion)
             return self._index(val, idx), should_return
 
-        for op in _OPERATORS:
-            separated = list(self._separate(expr, op))
-            right_expr = separated.pop()
-            while True:
-                if op in '?<>*-' and len(separated) > 1 and not separated[-1].strip():
-                    separated.pop()
-                elif not (separated and op == '?' and right_expr.startswith('.')):
-                    break
-                right_expr = f'{op}{right_expr}'
-                if op != '-':
-                    right_expr = f'{separated.pop()}{op}{right_expr}'
-            if not separated:
-                continue
-            left_val = self.interpret_expression(op.join(separated), local_vars, allow_recursion)
+        operation = _separate_at_operator(expr)
+        if operation:
+            op, left_expr, right_expr = operation
+            left_val = self.interpret_expression(left_expr, local_vars, allow_recursion)
             return self._operator(op, left_val, right_expr, expr, local_vars, allow_recursion), should_return
 
         if m and m.group('attribute'):
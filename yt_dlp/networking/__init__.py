@@ -13,7 +13,7 @@
 
 # isort: split
 # TODO: all request handlers should be safely imported
-from . import _urllib
+from . import _asyncio, _urllib
 from ..utils import bug_reports_message
 
 try:
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import http.client
+import io
+import socket
+import ssl
+import threading
+import urllib.parse
+import urllib.request
+import urllib.response
+import zlib
+
+from ._helper import CONNECTION_ATTEMPT_DELAY, add_accept_encoding_header, get_redirect_method
+from .common import (
+    AsyncResponse,
+    Features,
+    Response,
+    RequestHandler,
+    register_preference,
+    register_rh,
+)
+from .exceptions import (
+    CertificateVerifyError,
+    HTTPError,
+    IncompleteRead,
+    RequestError,
+    SSLError,
+    TransportError,
+)
+from ..utils.networking import normalize_url
+
+SUPPORTED_ENCODINGS = ['gzip', 'deflate']
+MAX_REDIRECTS = 10
+
+
+class _DeflateDecoder:
+    """Decodes both zlib-wrapped and raw deflate streams, since servers send either"""
+
+    def __init__(self):
+        self._decoder = None
+
+    def decompress(self, data):
+        if self._decoder is None:
+            if not data:
+                return data
+            self._decoder = zlib.decompressobj(zlib.MAX_WBITS if data[0] & 0x0F == 8 else -zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+    def flush(self):
+        return self._decoder.flush() if self._decoder else b''
+
+
+def _make_decoders(content_encoding):
+    # The encodings are listed in the order that they were applied
+    decoders = []
+    for encoding in reversed([e.strip() for e in (content_encoding or '').split(',') if e.strip()]):
+        if encoding == 'gzip':
+            decoders.append(zlib.decompressobj(zlib.MAX_WBITS | 16))
+        elif encoding == 'deflate':
+            decoders.append(_DeflateDecoder())
+        else:
+            # Leave the body encoded, like the other handlers do
+            break
+    return decoders
+
+
+class AsyncioResponse(AsyncResponse):
+    """Response whose body is read from an asyncio stream"""
+
+    def __init__(self, reader, writer, timeout, length, chunked, **kwargs):
+        super().__init__(**kwargs)
+        self._reader, self._writer = reader, writer
+        self._timeout = timeout
+        self._length = length  # None if the body ends with the connection
+        self._chunked = chunked
+        self._chunk_left = 0
+        self._decoders = _make_decoders(self.get_header('Content-Encoding'))
+        self._buffer = b''
+        self._eof = False
+        self._bytes_read = 0
+
+    async def _read_stream(self, coro):
+        try:
+            return await asyncio.wait_for(coro, self._timeout)
+        except asyncio.IncompleteReadError as e:
+            raise IncompleteRead(
+                partial=self._bytes_read + len(e.partial), expected=self._length, cause=e) from e
+        except (OSError, asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError) as e:
+            raise TransportError(cause=e) from e
+
+    async def _read_chunked(self, size):
+        if not self._chunk_left:
+            line = await self._read_stream(self._reader.readuntil(b'\r\n'))
+            try:
+                chunk_size = int(line.split(b';', 1)[0], 16)
+            except ValueError:
+                raise TransportError(f'Invalid chunk size: {line!r}')
+            if chunk_size == 0:
+                # Skip the trailer
+                while await self._read_stream(self._reader.readuntil(b'\r\n')) != b'\r\n':
+                    pass
+                return b''
+            self._chunk_left = chunk_size
+        data = await self._read_stream(self._reader.readexactly(min(size, self._chunk_left)))
+        self._chunk_left -= len(data)
+        if not self._chunk_left:
+            await self._read_stream(self._reader.readexactly(2))
+        return data
+
+    async def _read_raw(self, size):
+        if self._chunked:
+            return await self._read_chunked(size)
+        if self._length is None:
+            return await self._read_stream(self._reader.read(size))
+        size = min(size, self._length - self._bytes_read)
+        if not size:
+            return b''
+        data = await self._read_stream(self._reader.read(size))
+        if not data:
+            raise IncompleteRead(partial=self._bytes_read, expected=self._length - self._bytes_read)
+        return data
+
+    async def _fill_buffer(self, size):
+        while not self._eof and len(self._buffer) < size:
+            data = await self._read_raw(max(size - len(self._buffer), 64 * 1024))
+            self._bytes_read += len(data)
+            self._eof = not data
+            try:
+                for decoder in self._decoders:
+                    data = decoder.decompress(data)
+                    if self._eof:
+                        data += decoder.flush()
+            except zlib.error as e:
+                raise TransportError(cause=e) from e
+            self._buffer += data
+
+    async def read(self, amt=None):
+        if amt is None:
+            parts = []
+            while True:
+                parts.append(self._buffer)
+                self._buffer = b''
+                if self._eof:
+                    break
+                await self._fill_buffer(1024 * 1024)
+            data = b''.join(parts)
+        else:
+            await self._fill_buffer(amt)
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        if self._eof and not self._buffer:
+            await self.close()
+        return data
+
+    async def close(self):
+        if self._writer.is_closing():
+            return
+        self._writer.close()
+        with contextlib.suppress(OSError, ssl.SSLError):
+            await self._writer.wait_closed()
+
+
+class _SyncReader(io.RawIOBase):
+    """Reads an AsyncioResponse from outside of its event loop"""
+
+    def __init__(self, response, run):
+        self._response, self._run = response, run
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._run(self._response.read(None if size is None or size < 0 else size))
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._run(self._response.close())
+        super().close()
+
+
+class AsyncioSyncResponseAdapter(Response):
+    def read(self, amt=None):
+        try:
+            return self.fp.read(amt)
+        except RequestError:
+            raise
+        except Exception as e:
+            raise TransportError(cause=e) from e
+
+
+@register_rh
+class AsyncioRH(RequestHandler):
+    """
+    Request handler that is based on asyncio streams
+
+    Requests that are sent with send_async() run in the event loop of the caller,
+    so that many of them can be in flight on a single thread. send() runs the
+    requests in an event loop of the handler, in a thread of its own.
+
+    Proxies are not supported, and a new connection is opened for every request.
+    """
+    _SUPPORTED_URL_SCHEMES = ('http', 'https')
+    _SUPPORTED_PROXY_SCHEMES = ()
+    _SUPPORTED_FEATURES = (Features.NO_PROXY,)
+    RH_NAME = 'asyncio'
+    supports_async = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._loop = self._loop_thread = None
+        self._lock = threading.Lock()
+        self._ssl_contexts = {}
+
+    def _check_extensions(self, extensions):
+        super()._check_extensions(extensions)
+        extensions.pop('cookiejar', None)
+        extensions.pop('timeout', None)
+        extensions.pop('legacy_ssl', None)
+        extensions.pop('keep_header_casing', None)
+
+    def _prepare_headers(self, _, headers):
+        add_accept_encoding_header(headers, SUPPORTED_ENCODINGS)
+
+    def _run(self, coro):
+        """Run the coroutine in the event loop of the handler and wait for its result"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name=f'{self.RH_NAME} event loop', daemon=True)
+                self._loop_thread.start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop:
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop_thread.join()
+            loop.close()
+
+    def _send(self, request):
+        response = self._run(self._send_async(request))
+        return AsyncioSyncResponseAdapter(
+            fp=_SyncReader(response, self._run), url=response.url, headers=response.headers,
+            status=response.status, reason=response.reason)
+
+    def _get_sslcontext(self, legacy_ssl_support):
+        # Creating a context loads the certificates, which is too slow to do for every request
+        with self._lock:
+            if legacy_ssl_support not in self._ssl_contexts:
+                self._ssl_contexts[legacy_ssl_support] = self._make_sslcontext(legacy_ssl_support=legacy_ssl_support)
+            return self._ssl_contexts[legacy_ssl_support]
+
+    async def _send_async(self, request):
+        headers = self._get_headers(request)
+        url, method, data = normalize_url(request.url), request.method, request.data
+        if data is not None and not isinstance(data, bytes):
+            data = data.read() if hasattr(data, 'read') else b''.join(data)
+        request_args = {
+            'cookiejar': self._get_cookiejar(request),
+            'timeout': self._calculate_timeout(request),
+            'ssl_context': self._get_sslcontext(request.extensions.get('legacy_ssl')),
+        }
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._request(method, url, data, headers, **request_args)
+            location = response.get_header('Location')
+            if response.status not in (301, 302, 303, 307, 308) or not location:
+                break
+            await response.close()
+            new_method = get_redirect_method(method, response.status)
+            if new_method != method:
+                data = None
+                headers = {
+                    name: value for name, value in headers.items()
+                    if name.lower() not in ('content-length', 'content-type')}
+            method = new_method
+            # A Cookie header that was given with the request applies to the original URL only
+            headers = {name: value for name, value in headers.items() if name.lower() != 'cookie'}
+            # As of RFC 2616 default charset is iso-8859-1
+            url = normalize_url(urllib.parse.urljoin(url, location.encode('iso-8859-1').decode()))
+        else:
+            raise HTTPError(await self._read_error_response(response), redirect_loop=True)
+
+        if not 200 <= response.status < 300:
+            raise HTTPError(await self._read_error_response(response))
+        return response
+
+    @staticmethod
+    async def _read_error_response(response):
+        try:
+            body = await response.read()
+        finally:
+            await response.close()
+        return Response(io.BytesIO(body), response.url, response.headers, response.status, response.reason)
+
+    async def _request(self, method, url, data, headers, cookiejar, timeout, ssl_context):
+        parsed = urllib.parse.urlsplit(url)
+        secure = parsed.scheme == 'https'
+        host, port = parsed.hostname, parsed.port or (443 if secure else 80)
+
+        request_headers = {'Host': parsed.netloc.rpartition('@')[2]}
+        request_headers.update(headers)
+        lower_names = {name.lower() for name in request_headers}
+        if 'cookie' not in lower_names:
+            cookie_header = cookiejar.get_cookie_header(url)
+            if cookie_header:
+                request_headers['Cookie'] = cookie_header
+        if data is not None and 'content-length' not in lower_names:
+            request_headers['Content-Length'] = str(len(data))
+        request_headers['Connection'] = 'close'
+
+        target = urllib.parse.urlunsplit(('', '', parsed.path or '/', parsed.query, ''))
+        lines = [f'{method} {target} HTTP/1.1']
+        for name, value in request_headers.items():
+            if any(c in f'{name}{value}' for c in '\r\n\0') or not name or ':' in name:
+                raise RequestError(f'Invalid header: {name!r}: {value!r}')
+            lines.append(f'{name}: {value}')
+        if any(c in lines[0] for c in '\r\n\0') or len(lines[0].split(' ')) != 3:
+            raise RequestError(f'Invalid request line: {lines[0]!r}')
+
+        connection_args = {}
+        if self.source_address:
+            connection_args['local_addr'] = (self.source_address, 0)
+            connection_args['family'] = socket.AF_INET6 if ':' in self.source_address else socket.AF_INET
+        if secure:
+            connection_args.update(ssl=ssl_context, server_hostname=host)
+
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                host, port, happy_eyeballs_delay=CONNECTION_ATTEMPT_DELAY, **connection_args), timeout)
+            writer.write('\r\n'.join((*lines, '', '')).encode('latin-1') + (data or b''))
+            await asyncio.wait_for(writer.drain(), timeout)
+
+            while True:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+                status_line, _, head = head.partition(b'\r\n')
+                version, status, reason = (*status_line.decode('latin-1').split(None, 2), '')[:3]
+                if not version.startswith('HTTP/') or not status.isdigit():
+                    raise TransportError(f'Invalid status line: {status_line!r}')
+                status = int(status)
+                # Skip the interim responses, such as 100 Continue
+                if not 100 <= status < 200:
+                    break
+            response_headers = http.client.parse_headers(io.BytesIO(head))
+        except BaseException as e:
+            if writer:
+                writer.close()
+            if isinstance(e, ssl.SSLCertVerificationError):
+                raise CertificateVerifyError(cause=e) from e
+            elif isinstance(e, ssl.SSLError):
+                raise SSLError(cause=e) from e
+            elif isinstance(e, (OSError, EOFError, asyncio.TimeoutError, asyncio.LimitOverrunError,
+                                http.client.HTTPException)):
+                raise TransportError(cause=e) from e
+            raise
+
+        chunked = 'chunked' in (response_headers.get('Transfer-Encoding') or '').lower()
+        if method == 'HEAD' or status in (204, 304):
+            length, chunked = 0, False
+        elif chunked:
+            length = None
+        else:
+            try:
+                length = int(response_headers['Content-Length'])
+            except (TypeError, ValueError):
+                length = None
+
+        response = AsyncioResponse(
+            reader, writer, timeout, length, chunked,
+            url=url, headers=response_headers, status=status, reason=reason.strip())
+        cookiejar.extract_cookies(
+            urllib.response.addinfourl(io.BytesIO(), response_headers, url), urllib.request.Request(url))
+        return response
+
+
+@register_preference(AsyncioRH)
+def asyncio_preference(rh, request):
+    # For synchronous requests, the handler has the overhead of a thread switch for every read
+    return -200
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import collections
 import contextlib
 import functools
+import itertools
 import os
+import queue
 import socket
 import ssl
 import sys
+import threading
+import time
 import typing
 import urllib.parse
 import urllib.request
@@ -172,6 +177,9 @@ def _get_instance(self, **kwargs):
         self.__instances.append((kwargs, instance))
         return instance
 
+    def _get_instances(self):
+        return [instance for _, instance in self.__instances]
+
     def _close_instance(self, instance):
         if callable(getattr(instance, 'close', None)):
             instance.close()
@@ -199,6 +207,117 @@ def wrapper(self, *args, **kwargs):
     return wrapper
 
 
+class DNSCache:
+    """
+    A cache of getaddrinfo() results, shared by all the request handlers
+
+    getaddrinfo() does not expose the TTL of the DNS records,
+    so every result is kept for the same amount of time.
+
+    @param ttl: Number of seconds to keep a result for
+    @param maxsize: Maximum number of results to keep
+    @param resolver: Function with the signature of socket.getaddrinfo() to use for the lookups
+    """
+
+    def __init__(self, ttl=60, maxsize=256, resolver=socket.getaddrinfo):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.resolver = resolver
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        with self._lock:
+            expiry, result = self._cache.get(key, (0, None))
+            if expiry > time.monotonic():
+                self._cache.move_to_end(key)
+                return list(result)
+
+        # Failures are not cached
+        result = self.resolver(host, port, family, type, proto, flags)
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return list(result)
+
+    def invalidate(self, host, port):
+        """Forget the results for the host, e.g. when none of its addresses could be connected to"""
+        with self._lock:
+            for key in [key for key in self._cache if key[:2] == (host, port)]:
+                del self._cache[key]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+dns_cache = DNSCache()
+
+# Delay before starting a connection attempt to the next address while the previous ones
+# are still pending, as recommended by RFC 8305 (Happy Eyeballs Version 2)
+CONNECTION_ATTEMPT_DELAY = 0.25
+
+
+def _interleave_address_families(ip_addrs):
+    """Alternate between the address families, starting with the preferred (first) one (RFC 8305 section 4)"""
+    by_family = collections.defaultdict(list)
+    for ip_addr in ip_addrs:
+        by_family[ip_addr[0]].append(ip_addr)
+    queues = list(by_family.values())
+    result = []
+    while queues:
+        result.extend(q.pop(0) for q in queues)
+        queues = [q for q in queues if q]
+    return result
+
+
+def _race_connections(ip_addrs, connect, delay):
+    """
+    Connect to the addresses in order, starting a new attempt every `delay` seconds
+    or as soon as the previous one fails. Returns the first socket that is connected
+    """
+    if len(ip_addrs) == 1:
+        return connect(ip_addrs[0])
+    results = queue.Queue()
+
+    def attempt(ip_addr):
+        try:
+            results.put((connect(ip_addr), None))
+        except Exception as e:
+            results.put((None, e))
+
+    started = pending = 0
+    err = None
+    while True:
+        if started < len(ip_addrs):
+            threading.Thread(target=attempt, args=(ip_addrs[started],), daemon=True).start()
+            started += 1
+            pending += 1
+        try:
+            # Once every attempt is started, wait in bounded steps so that it can still be interrupted on Windows
+            sock, err = results.get(timeout=delay if started < len(ip_addrs) else 1)
+        except queue.Empty:
+            continue  # Start the next attempt, if any
+        pending -= 1
+        if sock:
+            break
+        if not pending and started == len(ip_addrs):
+            raise err
+
+    def close_remaining(count):
+        for _ in range(count):
+            late_sock, _ = results.get()
+            if late_sock:
+                late_sock.close()
+
+    if pending:
+        threading.Thread(target=close_remaining, args=(pending,), daemon=True).start()
+    return sock
+
+
 def _socket_connect(ip_addr, timeout, source_address):
     af, socktype, proto, _canonname, sa = ip_addr
     sock = socket.socket(af, socktype, proto)
@@ -216,6 +335,10 @@ def _socket_connect(ip_addr, timeout, source_address):
 
 def create_socks_proxy_socket(dest_addr, proxy_args, proxy_ip_addr, timeout, source_address):
     af, socktype, proto, _canonname, sa = proxy_ip_addr
+    if not proxy_args.get('rdns', True):
+        # Resolve the destination through the cache, instead of letting the proxy socket do it
+        family = 0 if proxy_args['proxytype'] == ProxyType.SOCKS5 else socket.AF_INET
+        dest_addr = (dns_cache.getaddrinfo(dest_addr[0], None, family)[0][4][0], dest_addr[1])
     sock = sockssocket(af, socktype, proto)
     try:
         connect_proxy_args = proxy_args.copy()
@@ -238,12 +361,15 @@ def create_connection(
     source_address=None,
     *,
     _create_socket_func=_socket_connect,
+    _dns_cache=None,
 ):
     # Work around socket.create_connection() which tries all addresses from getaddrinfo() including IPv6.
     # This filters the addresses based on the given source_address.
+    # The addresses are resolved through the DNS cache, and connected to concurrently (RFC 8305).
     # Based on: https://github.com/python/cpython/blob/main/Lib/socket.py#L810
     host, port = address
-    ip_addrs = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    cache = _dns_cache or dns_cache
+    ip_addrs = cache.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
     if not ip_addrs:
         raise OSError('getaddrinfo returns an empty list')
     if source_address is not None:
@@ -254,20 +380,99 @@ def create_connection(
                 f'No remote IPv{4 if af == socket.AF_INET else 6} addresses available for connect. '
                 f'Can\'t use "{source_address[0]}" as source address')
 
-    err = None
-    for ip_addr in ip_addrs:
-        try:
-            sock = _create_socket_func(ip_addr, timeout, source_address)
-            # Explicitly break __traceback__ reference cycle
-            # https://bugs.python.org/issue36820
-            err = None
-            return sock
-        except OSError as e:
-            err = e
-
     try:
-        raise err
-    finally:
-        # Explicitly break __traceback__ reference cycle
-        # https://bugs.python.org/issue36820
-        err = None
+        return _race_connections(
+            _interleave_address_families(ip_addrs),
+            lambda ip_addr: _create_socket_func(ip_addr, timeout, source_address),
+            CONNECTION_ATTEMPT_DELAY)
+    except OSError:
+        # The cached addresses may be outdated
+        cache.invalidate(host, port)
+        raise
+
+
+class TokenBucket:
+    """
+    Token bucket that allows `rate` units per second on average, in bursts of up to `capacity` units
+
+    Reservations are never refused. They may leave the bucket in debt instead,
+    which the following reservations have to wait for, so that concurrent
+    consumers share the rate in the order that they asked for it.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Take amount tokens, and return the number of seconds to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - amount
+            self._updated = now
+            return max(-self._tokens / self.rate, 0)
+
+    @property
+    def full(self):
+        """Whether the bucket has been idle long enough to be as good as a new one"""
+        with self._lock:
+            return self._tokens + (time.monotonic() - self._updated) * self.rate >= self.capacity
+
+
+class RateLimiter:
+    """
+    Limits the bandwidth and the request rate of the process
+
+    The limits can be set for the total of all the transfers, for each host and for each
+    extractor. The buckets are shared by all the instances with the same limits,
+    so that concurrent downloads (and YoutubeDL instances) stay within them together.
+
+    @param bandwidth: Limits in bytes per second, by scope ('total', 'host' or 'extractor')
+    @param requests: Limits in requests per second, by scope
+    """
+    SCOPES = ('total', 'host', 'extractor')
+
+    _buckets = {}
+    _buckets_lock = threading.Lock()
+
+    def __init__(self, bandwidth=None, requests=None):
+        self._limits = {
+            'bytes': {scope: rate for scope, rate in (bandwidth or {}).items() if rate},
+            'requests': {scope: rate for scope, rate in (requests or {}).items() if rate},
+        }
+        for scope in itertools.chain(*self._limits.values()):
+            assert scope in self.SCOPES, f'invalid scope {scope!r}'
+
+    def __bool__(self):
+        return any(self._limits.values())
+
+    def _get_bucket(self, kind, scope, key):
+        rate = self._limits[kind][scope]
+        with self._buckets_lock:
+            bucket = self._buckets.get((kind, scope, key, rate))
+            if not bucket:
+                # Drop the buckets that would be created anew, so that one is not kept for every host ever seen
+                for bucket_id, other in list(self._buckets.items()):
+                    if other.full:
+                        del self._buckets[bucket_id]
+                bucket = self._buckets[(kind, scope, key, rate)] = TokenBucket(rate)
+            return bucket
+
+    def reserve(self, kind, amount=1, *, total=False, host=None, extractor=None):
+        """
+        Take amount from the limits of the given scopes
+
+        @param kind: 'bytes' or 'requests'
+        @param total: Whether to count the amount towards the total
+        @param host: Host to count the amount towards, if any
+        @param extractor: Key of the extractor to count the amount towards, if any
+        @returns The number of seconds to wait before the bytes or requests can be used
+        """
+        delay = 0
+        for scope, key in (('total', total or None), ('host', host), ('extractor', extractor)):
+            if key is not None and scope in self._limits[kind]:
+                delay = max(delay, self._get_bucket(kind, scope, key).reserve(amount))
+        return delay
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import collections
 import functools
 import http.client
 import logging
@@ -287,12 +288,23 @@ def _check_extensions(self, extensions):
         extensions.pop('legacy_ssl', None)
         extensions.pop('keep_header_casing', None)
 
+    def get_connection_stats(self):
+        stats = collections.Counter()
+        for session in self._get_instances():
+            for adapter in session.adapters.values():
+                for manager in (adapter.poolmanager, *adapter.proxy_manager.values()):
+                    for key in manager.pools:
+                        if pool := manager.pools.get(key):
+                            stats.update(requests=pool.num_requests, connections=pool.num_connections)
+        return dict(stats)
+
     def _create_instance(self, cookiejar, legacy_ssl_support=None):
         session = RequestsSession()
         http_adapter = RequestsHTTPAdapter(
             ssl_context=self._make_sslcontext(legacy_ssl_support=legacy_ssl_support),
             source_address=self.source_address,
             max_retries=urllib3.util.retry.Retry(False),
+            pool_maxsize=max(self.max_connections_per_host or 0, requests.adapters.DEFAULT_POOLSIZE),
         )
         session.adapters.clear()
         session.headers = requests.models.CaseInsensitiveDict()
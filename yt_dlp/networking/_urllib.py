@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import collections
 import functools
 import http.client
 import io
+import select
 import ssl
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -62,6 +65,107 @@ def _create_http_connection(http_class, source_address, *args, **kwargs):
     return hc
 
 
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection that can resume a previous TLS session"""
+
+    tls_session = None
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=self._tunnel_host or self.host, session=self.tls_session)
+
+
+class _PooledHTTPResponse(http.client.HTTPResponse):
+    """HTTP response that releases its connection to the pool once its body has been read"""
+
+    release_conn = None
+
+    def _close_conn(self):
+        super()._close_conn()
+        release_conn, self.release_conn = self.release_conn, None
+        if release_conn:
+            release_conn(reusable=not self.will_close)
+
+    def close(self):
+        if self.release_conn and self.length != 0:
+            # The rest of the body would be read as the next response
+            self.will_close = True
+        super().close()
+
+
+class _ConnectionPool:
+    """
+    Idle keep-alive connections, by host
+
+    At most `maxsize` idle connections are kept for each host. The number of
+    connections that are in use at the same time is not limited.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.stats = collections.Counter(requests=0, connections=0, tls_sessions_resumed=0)
+        self._idle = collections.defaultdict(list)
+        self._tls_sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_dropped(conn):
+        # An idle connection is readable only if the server has closed it (or is misbehaving)
+        try:
+            return conn.sock is None or bool(select.select([conn.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def acquire(self, key):
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                conn = idle.pop()
+                if not self._is_dropped(conn):
+                    return conn
+                conn.close()
+            return None
+
+    def release(self, key, conn, reusable=True):
+        sock = conn.sock
+        with self._lock:
+            # With TLS 1.3, the session can only be resumed once a response has been read
+            if isinstance(sock, ssl.SSLSocket) and sock.session:
+                self._tls_sessions[key] = sock.session
+            if reusable and sock and len(self._idle[key]) < self.maxsize:
+                self._idle[key].append(conn)
+                return
+        conn.close()
+
+    def connect(self, key, http_class, host, **kwargs):
+        """Create a new connection to the host"""
+        conn = http_class(host, **kwargs)
+        conn.response_class = _PooledHTTPResponse
+        if isinstance(conn, _HTTPSConnection):
+            with self._lock:
+                conn.tls_session = self._tls_sessions.get(key)
+        return conn
+
+    def count(self, key, conn, new):
+        """Count a request that was sent over the connection"""
+        with self._lock:
+            self.stats['requests'] += 1
+            if not new:
+                return
+            self.stats['connections'] += 1
+            if isinstance(conn.sock, ssl.SSLSocket):
+                self.stats['tls_sessions_resumed'] += conn.sock.session_reused
+
+    def close(self):
+        with self._lock:
+            conns = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+            self._tls_sessions.clear()
+        for conn in conns:
+            conn.close()
+
+
 class HTTPHandler(urllib.request.AbstractHTTPHandler):
     """Handler for HTTP requests and responses.
 
@@ -77,10 +181,16 @@ class HTTPHandler(urllib.request.AbstractHTTPHandler):
     public domain.
     """
 
-    def __init__(self, context=None, source_address=None, *args, **kwargs):
+    def __init__(self, context=None, source_address=None, max_connections_per_host=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._source_address = source_address
         self._context = context
+        # Without a pool, a new connection is opened for every request
+        self._pool = _ConnectionPool(max_connections_per_host) if max_connections_per_host else None
+
+    def close(self):
+        if self._pool:
+            self._pool.close()
 
     @staticmethod
     def _make_conn_class(base, req):
@@ -90,17 +200,69 @@ def _make_conn_class(base, req):
             conn_class = make_socks_conn_class(conn_class, socks_proxy)
         return conn_class
 
+    def _open(self, base, req, **http_conn_args):
+        socks_proxy = req.headers.get('Ytdl-socks-proxy')
+        http_class = functools.partial(
+            _create_http_connection, self._make_conn_class(base, req), self._source_address)
+        if not self._pool:
+            return self.do_open(http_class, req, **http_conn_args)
+        return self._pooled_open(
+            (req.type, req.host, req._tunnel_host, socks_proxy), http_class, req, **http_conn_args)
+
     def http_open(self, req):
-        conn_class = self._make_conn_class(http.client.HTTPConnection, req)
-        return self.do_open(functools.partial(
-            _create_http_connection, conn_class, self._source_address), req)
+        return self._open(http.client.HTTPConnection, req)
 
     def https_open(self, req):
-        conn_class = self._make_conn_class(http.client.HTTPSConnection, req)
-        return self.do_open(
-            functools.partial(
-                _create_http_connection, conn_class, self._source_address),
-            req, context=self._context)
+        return self._open(_HTTPSConnection, req, context=self._context)
+
+    def _pooled_open(self, key, http_class, req, **http_conn_args):
+        if not req.host:
+            raise urllib.error.URLError('no host given')
+
+        # Adapted from urllib.request.AbstractHTTPHandler.do_open, without closing the connection
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+        tunnel_headers = {}
+        if req._tunnel_host and 'Proxy-Authorization' in headers:
+            tunnel_headers['Proxy-Authorization'] = headers.pop('Proxy-Authorization')
+
+        while True:
+            conn = self._pool.acquire(key)
+            new = conn is None
+            if new:
+                conn = self._pool.connect(key, http_class, req.host, timeout=req.timeout, **http_conn_args)
+                conn.set_debuglevel(self._debuglevel)
+                if req._tunnel_host:
+                    conn.set_tunnel(req._tunnel_host, headers=tunnel_headers)
+            else:
+                conn.timeout = req.timeout
+                conn.sock.settimeout(req.timeout)
+
+            try:
+                try:
+                    conn.request(req.get_method(), req.selector, req.data, headers,
+                                 encode_chunked=req.has_header('Transfer-encoding'))
+                except OSError as err:  # timeout error
+                    raise urllib.error.URLError(err)
+                self._pool.count(key, conn, new)
+                res = conn.getresponse()
+            except BaseException as e:
+                conn.close()
+                # The server may have closed the idle connection in the meantime. Retry with
+                # another one, unless the request data can not be sent again
+                if (new or not isinstance(req.data, (bytes, type(None)))
+                        or not isinstance(getattr(e, 'reason', e), ConnectionError)):
+                    raise
+                continue
+
+            if res.will_close:
+                self._pool.release(key, conn, reusable=False)
+            else:
+                res.release_conn = functools.partial(self._pool.release, key, conn)
+            res.url = req.get_full_url()
+            res.msg = res.reason
+            return res
 
     @staticmethod
     def deflate(data):
@@ -195,7 +357,8 @@ def connect(self):
                 _create_socket_func=functools.partial(
                     create_socks_proxy_socket, (self.host, self.port), proxy_args))
             if isinstance(self, http.client.HTTPSConnection):
-                self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host)
+                self.sock = self._context.wrap_socket(
+                    self.sock, server_hostname=self.host, session=getattr(self, 'tls_session', None))
 
     return SocksConnection
 
@@ -311,6 +474,13 @@ def read(self, amt=None):
             handle_response_read_exceptions(e)
             raise e
 
+    def readinto(self, b):
+        try:
+            return self.fp.readinto(b)
+        except Exception as e:
+            handle_response_read_exceptions(e)
+            raise e
+
 
 def handle_sslerror(e: ssl.SSLError):
     if not isinstance(e, ssl.SSLError):
@@ -356,7 +526,8 @@ def _create_instance(self, proxies, cookiejar, legacy_ssl_support=None):
             HTTPHandler(
                 debuglevel=int(bool(self.verbose)),
                 context=self._make_sslcontext(legacy_ssl_support=legacy_ssl_support),
-                source_address=self.source_address),
+                source_address=self.source_address,
+                max_connections_per_host=self.max_connections_per_host),
             HTTPCookieProcessor(cookiejar),
             DataHandler(),
             UnknownHandler(),
@@ -378,6 +549,22 @@ def _create_instance(self, proxies, cookiejar, legacy_ssl_support=None):
         opener.addheaders = []
         return opener
 
+    def close(self):
+        self._clear_instances()
+
+    def _close_instance(self, opener):
+        for handler in opener.handlers:
+            if isinstance(handler, HTTPHandler):
+                handler.close()
+
+    def get_connection_stats(self):
+        stats = collections.Counter()
+        for opener in self._get_instances():
+            for handler in opener.handlers:
+                if isinstance(handler, HTTPHandler) and handler._pool:
+                    stats.update(handler._pool.stats)
+        return dict(stats)
+
     def _prepare_headers(self, _, headers):
         add_accept_encoding_header(headers, SUPPORTED_ENCODINGS)
 
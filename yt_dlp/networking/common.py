@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import abc
+import asyncio
 import copy
 import enum
 import functools
 import io
+import time
 import typing
 import urllib.parse
 import urllib.request
@@ -59,25 +61,33 @@ class RequestDirector:
 
     @param logger: Logger instance.
     @param verbose: Print debug request information to stdout.
+    @param rate_limiter: RateLimiter whose request limits apply to the requests (total and per host).
     """
 
-    def __init__(self, logger, verbose=False):
+    def __init__(self, logger, verbose=False, rate_limiter=None):
         self.handlers: dict[str, RequestHandler] = {}
         self.preferences: set[Preference] = set()
         self.logger = logger  # TODO(Grub4k): default logger
         self.verbose = verbose
+        self.rate_limiter = rate_limiter
 
     def close(self):
         for handler in self.handlers.values():
             handler.close()
         self.handlers.clear()
 
+    def get_connection_stats(self) -> dict[str, dict[str, int]]:
+        """Return the connection statistics of each handler that provides them, by RH_KEY"""
+        return {
+            rh_key: stats for rh_key, handler in self.handlers.items()
+            if (stats := handler.get_connection_stats())}
+
     def add_handler(self, handler: RequestHandler):
         """Add a handler. If a handler of the same RH_KEY exists, it will overwrite it"""
         assert isinstance(handler, RequestHandler), 'handler must be a RequestHandler'
         self.handlers[handler.RH_KEY] = handler
 
-    def _get_handlers(self, request: Request) -> list[RequestHandler]:
+    def _get_handlers(self, request: Request, native_async=False) -> list[RequestHandler]:
         """Sorts handlers by preference, given a request"""
         preferences = {
             rh: sum(pref(rh, request) for pref in self.preferences)
@@ -85,7 +95,38 @@ def _get_handlers(self, request: Request) -> list[RequestHandler]:
         }
         self._print_verbose('Handler preferences for this request: {}'.format(', '.join(
             f'{rh.RH_NAME}={pref}' for rh, pref in preferences.items())))
-        return sorted(self.handlers.values(), key=preferences.get, reverse=True)
+        handlers = sorted(self.handlers.values(), key=preferences.get, reverse=True)
+        if native_async:
+            # Handlers that do not support asyncio natively need a thread for each request
+            handlers.sort(key=lambda rh: not rh.supports_async)
+        return handlers
+
+    def _get_supporting_handlers(self, request, unsupported_errors, native_async=False):
+        for handler in self._get_handlers(request, native_async):
+            self._print_verbose(f'Checking if "{handler.RH_NAME}" supports this request.')
+            try:
+                handler.validate(request)
+            except UnsupportedRequest as e:
+                self._print_verbose(
+                    f'"{handler.RH_NAME}" cannot handle this request (reason: {error_to_str(e)})')
+                unsupported_errors.append(e)
+                continue
+            self._print_verbose(f'Sending request via "{handler.RH_NAME}"')
+            yield handler
+
+    def _report_unexpected_error(self, handler, error):
+        self.logger.error(
+            f'[{handler.RH_NAME}] Unexpected error: {error_to_str(error)}{bug_reports_message()}',
+            is_error=False)
+
+    def _get_request_delay(self, request):
+        if not self.rate_limiter:
+            return 0
+        delay = self.rate_limiter.reserve(
+            'requests', total=True, host=urllib.parse.urlparse(request.url).hostname)
+        if delay:
+            self._print_verbose(f'Delaying request by {delay:.2f}s to stay within the request rate limit')
+        return delay
 
     def _print_verbose(self, msg):
         if self.verbose:
@@ -99,32 +140,51 @@ def send(self, request: Request) -> Response:
             raise RequestError('No request handlers configured')
 
         assert isinstance(request, Request)
+        time.sleep(self._get_request_delay(request))
 
         unexpected_errors = []
         unsupported_errors = []
-        for handler in self._get_handlers(request):
-            self._print_verbose(f'Checking if "{handler.RH_NAME}" supports this request.')
+        for handler in self._get_supporting_handlers(request, unsupported_errors):
             try:
-                handler.validate(request)
-            except UnsupportedRequest as e:
-                self._print_verbose(
-                    f'"{handler.RH_NAME}" cannot handle this request (reason: {error_to_str(e)})')
-                unsupported_errors.append(e)
+                response = handler.send(request)
+            except RequestError:
+                raise
+            except Exception as e:
+                self._report_unexpected_error(handler, e)
+                unexpected_errors.append(e)
                 continue
 
-            self._print_verbose(f'Sending request via "{handler.RH_NAME}"')
+            assert isinstance(response, Response)
+            return response
+
+        raise NoSupportingHandlers(unsupported_errors, unexpected_errors)
+
+    async def send_async(self, request: Request) -> AsyncResponse:
+        """
+        Asynchronous version of send()
+
+        Handlers that support asyncio natively are preferred,
+        so that many requests can be in flight on a single thread
+        """
+        if not self.handlers:
+            raise RequestError('No request handlers configured')
+
+        assert isinstance(request, Request)
+        await asyncio.sleep(self._get_request_delay(request))
+
+        unexpected_errors = []
+        unsupported_errors = []
+        for handler in self._get_supporting_handlers(request, unsupported_errors, native_async=True):
             try:
-                response = handler.send(request)
+                response = await handler.send_async(request)
             except RequestError:
                 raise
             except Exception as e:
-                self.logger.error(
-                    f'[{handler.RH_NAME}] Unexpected error: {error_to_str(e)}{bug_reports_message()}',
-                    is_error=False)
+                self._report_unexpected_error(handler, e)
                 unexpected_errors.append(e)
                 continue
 
-            assert isinstance(response, Response)
+            assert isinstance(response, AsyncResponse)
             return response
 
         raise NoSupportingHandlers(unsupported_errors, unexpected_errors)
@@ -178,6 +238,9 @@ class RequestHandler(abc.ABC):
 
     The above may be set to None to disable the checks.
 
+    Requests can also be sent from an asyncio event loop with send_async(). Handlers that
+    support asyncio natively should redefine _send_async(request) and set `supports_async`.
+
     Parameters:
     @param logger: logger instance
     @param headers: HTTP Headers to include when sending requests.
@@ -191,6 +254,8 @@ class RequestHandler(abc.ABC):
             dict with {client_certificate, client_certificate_key, client_certificate_password}
     @param verify: Verify SSL certificates
     @param legacy_ssl_support: Enable legacy SSL options such as legacy server connect and older cipher support.
+    @param max_connections_per_host: Number of idle connections to keep open to each host for reuse.
+            By default, the handler decides if and how connections are reused.
 
     Some configuration options may be available for individual Requests too. In this case,
     either the Request configuration option takes precedence or they are merged.
@@ -219,6 +284,7 @@ class RequestHandler(abc.ABC):
     _SUPPORTED_URL_SCHEMES = ()
     _SUPPORTED_PROXY_SCHEMES = ()
     _SUPPORTED_FEATURES = ()
+    supports_async = False
 
     def __init__(
         self, *,
@@ -233,6 +299,7 @@ def __init__(
         client_cert: dict[str, str | None] | None = None,
         verify: bool = True,
         legacy_ssl_support: bool = False,
+        max_connections_per_host: int | None = None,
         **_,
     ):
 
@@ -247,6 +314,7 @@ def __init__(
         self._client_cert = client_cert or {}
         self.verify = verify
         self.legacy_ssl_support = legacy_ssl_support
+        self.max_connections_per_host = max_connections_per_host
         super().__init__()
 
     def _make_sslcontext(self, legacy_ssl_support=None):
@@ -363,9 +431,38 @@ def _send(self, request: Request):
         """Handle a request from start to finish. Redefine in subclasses."""
         pass
 
+    async def send_async(self, request: Request) -> AsyncResponse:
+        if not isinstance(request, Request):
+            raise TypeError('Expected an instance of Request')
+        try:
+            return await self._send_async(request)
+        except RequestError as e:
+            if e.handler is None:
+                e.handler = self
+            raise
+
+    async def _send_async(self, request: Request) -> AsyncResponse:
+        """
+        Asynchronous version of _send().
+        By default, _send() is run in another thread. Subclasses that support asyncio
+        natively should redefine this method and set `supports_async`.
+        """
+        response = await asyncio.get_running_loop().run_in_executor(None, self._send, request)
+        return _ThreadedAsyncResponse(response)
+
     def close(self):  # noqa: B027
         pass
 
+    def get_connection_stats(self) -> dict[str, int]:
+        """
+        Statistics about the connections opened by the handler
+
+        Returns a dict with the number of `requests` that were sent and the number of
+        `connections` that were opened for them, and possibly other handler-specific counters.
+        Handlers that do not keep track of their connections return an empty dict.
+        """
+        return {}
+
     @classproperty
     def RH_NAME(cls):
         return cls.__name__[:-2]
@@ -558,6 +655,13 @@ def read(self, amt: int | None = None) -> bytes:
         except Exception as e:
             raise TransportError(cause=e) from e
 
+    def readinto(self, b) -> int:
+        # Reads into a pre-allocated buffer, returning the number of bytes read.
+        # Subclasses may redefine this method to avoid copying the data.
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
     def close(self):
         self.fp.close()
         return super().close()
@@ -597,6 +701,71 @@ def getheader(self, name, default=None):
         return self.get_header(name, default)
 
 
+class AsyncResponse(abc.ABC):
+    """
+    Base class for the responses to asynchronous requests, see RequestDirector.send_async()
+
+    It provides the same information as Response, but the body is read with coroutines.
+    Subclasses must redefine read() and close().
+
+    @param url: URL that this is a response of.
+    @param headers: response headers.
+    @param status: Response HTTP status code. Default is 200 OK.
+    @param reason: HTTP status reason. Will use built-in reasons based on status code if not provided.
+    @param extensions: Dictionary of handler-specific response extensions.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            headers: Mapping[str, str],
+            status: int = 200,
+            reason: str | None = None,
+            extensions: dict | None = None,
+    ):
+        self.headers = Message()
+        for name, value in headers.items():
+            self.headers.add_header(name, value)
+        self.status = status
+        self.url = url
+        try:
+            self.reason = reason or HTTPStatus(status).phrase
+        except ValueError:
+            self.reason = None
+        self.extensions = extensions or {}
+
+    get_header = Response.get_header
+
+    @abc.abstractmethod
+    async def read(self, amt: int | None = None) -> bytes:
+        """Read up to amt bytes of the body, or all of it. Errors should be of type RequestError"""
+        pass
+
+    @abc.abstractmethod
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+class _ThreadedAsyncResponse(AsyncResponse):
+    """Reads a synchronous Response in other threads"""
+
+    def __init__(self, response: Response):
+        super().__init__(response.url, response.headers, response.status, response.reason, response.extensions)
+        self.response = response
+
+    async def read(self, amt=None):
+        return await asyncio.get_running_loop().run_in_executor(None, self.response.read, amt)
+
+    async def close(self):
+        self.response.close()
+
+
 if typing.TYPE_CHECKING:
     RequestData = bytes | Iterable[bytes] | typing.IO | None
     Preference = typing.Callable[[RequestHandler, Request], int]
@@ -530,13 +530,14 @@ def _preset_alias_callback(option, opt_str, value, parser):
                 'embed-metadata', 'seperate-video-versions', 'no-clean-infojson', 'no-keep-subs', 'no-certifi',
                 'no-youtube-channel-redirect', 'no-youtube-unavailable-videos', 'no-youtube-prefer-utc-upload-date',
                 'prefer-legacy-http-handler', 'manifest-filesize-approx', 'allow-unsafe-ext', 'prefer-vp9-sort', 'mtime-by-default',
+                'no-batched-ffmpeg',
             }, 'aliases': {
                 'youtube-dl': ['all', '-multistreams', '-playlist-match-filter', '-manifest-filesize-approx', '-allow-unsafe-ext', '-prefer-vp9-sort'],
                 'youtube-dlc': ['all', '-no-youtube-channel-redirect', '-no-live-chat', '-playlist-match-filter', '-manifest-filesize-approx', '-allow-unsafe-ext', '-prefer-vp9-sort'],
                 '2021': ['2022', 'no-certifi', 'filename-sanitization'],
                 '2022': ['2023', 'no-external-downloader-progress', 'playlist-match-filter', 'prefer-legacy-http-handler', 'manifest-filesize-approx'],
                 '2023': ['2024', 'prefer-vp9-sort'],
-                '2024': ['mtime-by-default'],
+                '2024': ['mtime-by-default', 'no-batched-ffmpeg'],
             },
         }, help=(
             'Options that can help keep compatibility with youtube-dl or youtube-dlc '
@@ -744,11 +745,19 @@ def _preset_alias_callback(option, opt_str, value, parser):
     selection.add_option(
         '--download-archive', metavar='FILE',
         dest='download_archive',
-        help='Download only videos not listed in the archive file. Record the IDs of all downloaded videos in it')
+        help=(
+            'Download only videos not listed in the archive file. Record the IDs of all downloaded videos in it. '
+            'Use "sqlite:FILE" to keep the archive in an indexed SQLite database instead'))
     selection.add_option(
         '--no-download-archive',
         dest='download_archive', action='store_const', const=None,
         help='Do not use archive file (default)')
+    selection.add_option(
+        '--import-download-archive', metavar='FILE',
+        dest='import_download_archive',
+        help=(
+            'Add the IDs of a text archive file to the "sqlite:FILE" archive given with --download-archive, '
+            'e.g. to convert an existing archive'))
     selection.add_option(
         '--max-downloads',
         dest='max_downloads', metavar='NUMBER', type=int, default=None,
@@ -927,6 +936,29 @@ def _preset_alias_callback(option, opt_str, value, parser):
             'Containers that may be used when merging formats, separated by "/", e.g. "mp4/mkv". '
             'Ignored if no merge is required. '
             f'(currently supported: {", ".join(sorted(FFmpegMergerPP.SUPPORTED_EXTS))})'))
+    video_format.add_option(
+        '--native-merge',
+        action='store_true', dest='native_merge', default=None,
+        help=(
+            'Merge the MP4 formats of DASH without ffmpeg. '
+            'By default, this is only done if ffmpeg is not installed'))
+    video_format.add_option(
+        '--no-native-merge',
+        action='store_false', dest='native_merge',
+        help='Always merge the formats with ffmpeg')
+    video_format.add_option(
+        '--merge-during-download',
+        action='store_true', dest='merge_during_download', default=False,
+        help=(
+            'Merge the MP4 formats of DASH into the output file while they are downloaded, '
+            'instead of after the download. Implies --native-merge for these formats. '
+            'Interrupted downloads will be restarted. '
+            'Formats that are not downloaded as DASH fragments (e.g. the https formats of YouTube) '
+            'are still merged after the download'))
+    video_format.add_option(
+        '--no-merge-during-download',
+        action='store_false', dest='merge_during_download',
+        help='Merge the formats only after they are downloaded (default)')
     video_format.add_option(
         '--allow-unplayable-formats',
         action='store_true', dest='allow_unplayable_formats', default=False,
@@ -980,10 +1012,44 @@ def _preset_alias_callback(option, opt_str, value, parser):
         '-N', '--concurrent-fragments',
         dest='concurrent_fragment_downloads', metavar='N', default=1, type=int,
         help='Number of fragments of a dash/hlsnative video that should be downloaded concurrently (default is %default)')
+    downloader.add_option(
+        '--async-fragments',
+        action='store_true', dest='async_fragment_downloads', default=False,
+        help=(
+            'Download the concurrent fragments of --concurrent-fragments as asyncio tasks of a single thread, '
+            'instead of a thread for each fragment. The fragments are kept in memory. Not used with --keep-fragments'))
+    downloader.add_option(
+        '--no-async-fragments',
+        action='store_false', dest='async_fragment_downloads',
+        help='Download the concurrent fragments in threads (default)')
+    downloader.add_option(
+        '--concurrent-downloads',
+        dest='concurrent_downloads', metavar='N', default=1, type=int,
+        help=(
+            'Number of input URLs that should be extracted and downloaded concurrently (default is %default). '
+            'The entries of a playlist are still processed one after another'))
+    downloader.add_option(
+        '--http-connections',
+        dest='http_connections', metavar='N', default=1, type=int,
+        help=(
+            'Number of connections to use for downloading different parts of a file over HTTP concurrently, '
+            'if the server supports range requests (default is %default). Not used with --limit-rate'))
     downloader.add_option(
         '-r', '--limit-rate', '--rate-limit',
         dest='ratelimit', metavar='RATE',
         help='Maximum download rate in bytes per second, e.g. 50K or 4.2M')
+    downloader.add_option(
+        '--shared-limit-rate',
+        dest='shared_ratelimit', metavar='[SCOPE:]RATE', default={}, type='str',
+        action='callback', callback=_dict_from_options_callback,
+        callback_kwargs={
+            'allowed_keys': 'total|host|extractor',
+            'default_key': 'total',
+        }, help=(
+            'Maximum download rate in bytes per second that is shared by all the downloads, '
+            'optionally prefixed by the scope of the limit: total (default), host (for each host) '
+            'or extractor (for each extractor). Unlike --limit-rate, this also limits concurrent downloads together. '
+            'This option can be used multiple times, e.g. --shared-limit-rate 10M --shared-limit-rate host:2M'))
     downloader.add_option(
         '--throttled-rate',
         dest='throttledratelimit', metavar='RATE',
@@ -1029,6 +1095,18 @@ def _preset_alias_callback(option, opt_str, value, parser):
         '--no-keep-fragments',
         action='store_false', dest='keep_fragments',
         help='Delete downloaded fragments after downloading is finished (default)')
+    downloader.add_option(
+        '--fragment-memory-limit',
+        dest='fragment_memory_limit', metavar='SIZE', default=None,
+        help=(
+            'Keep fragments of up to this size in memory instead of writing them to temporary files, '
+            'e.g. 50K or 4.2M (default is 16M). Use 0 to always write fragments to disk'))
+    downloader.add_option(
+        '--fragment-reorder-limit',
+        dest='fragment_reorder_limit', metavar='SIZE', default=None,
+        help=(
+            'Maximum total size of concurrently downloaded fragments that are kept in memory while waiting '
+            'for an earlier fragment, e.g. 50M (default is 64M). No new fragments are started while this is exceeded'))
     downloader.add_option(
         '--buffer-size',
         dest='buffersize', metavar='SIZE', default='1024',
@@ -1066,7 +1144,9 @@ def _preset_alias_callback(option, opt_str, value, parser):
     downloader.add_option(
         '--lazy-playlist',
         action='store_true', dest='lazy_playlist',
-        help='Process entries in the playlist as they are received. This disables n_entries, --playlist-random and --playlist-reverse')
+        help=(
+            'Process entries in the playlist as they are received. This disables n_entries, --playlist-random and --playlist-reverse. '
+            'Processed entries are not kept in memory unless they are needed for the playlist metadata or post-processors'))
     downloader.add_option(
         '--no-lazy-playlist',
         action='store_false', dest='lazy_playlist',
@@ -1177,6 +1257,17 @@ def _preset_alias_callback(option, opt_str, value, parser):
         '--sleep-requests', metavar='SECONDS',
         dest='sleep_interval_requests', type=float,
         help='Number of seconds to sleep between requests during data extraction')
+    workarounds.add_option(
+        '--limit-request-rate',
+        dest='request_ratelimit', metavar='[SCOPE:]RATE', default={}, type='str',
+        action='callback', callback=_dict_from_options_callback,
+        callback_kwargs={
+            'allowed_keys': 'total|host|extractor',
+            'default_key': 'total',
+        }, help=(
+            'Maximum number of HTTP requests per second, optionally prefixed by the scope of the limit: '
+            'total (default), host (for each host) or extractor (for the data extraction of each extractor). '
+            'This option can be used multiple times, e.g. --limit-request-rate 5 --limit-request-rate host:0.5'))
     workarounds.add_option(
         '--sleep-interval', '--min-sleep-interval', metavar='SECONDS',
         dest='sleep_interval', type=float,
@@ -1557,7 +1648,8 @@ def _preset_alias_callback(option, opt_str, value, parser):
         '--cache-dir', dest='cachedir', default=None, metavar='DIR',
         help=(
             'Location in the filesystem where yt-dlp can store some downloaded information '
-            '(such as client ids and signatures) permanently. By default ${XDG_CACHE_HOME}/yt-dlp'))
+            '(such as client ids and signatures) permanently. A path ending in .sqlite, .sqlite3 or .db '
+            'is used as a single database file that can be shared by many processes. By default ${XDG_CACHE_HOME}/yt-dlp'))
     filesystem.add_option(
         '--no-cache-dir', action='store_false', dest='cachedir',
         help='Disable filesystem caching')
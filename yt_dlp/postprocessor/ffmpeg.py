@@ -1,10 +1,13 @@
 import collections
+import contextlib
 import contextvars
 import functools
+import hashlib
 import itertools
 import json
 import os
 import re
+import shutil
 import subprocess
 import time
 
@@ -83,6 +86,50 @@ class FFmpegPostProcessorError(PostProcessingError):
     pass
 
 
+def _file_fingerprint(path):
+    """ Identify the current version of a file, or return None if it does not exist """
+    with contextlib.suppress(OSError, TypeError):
+        stat = os.stat(path)
+        return f'{os.path.abspath(path)}\0{stat.st_ino}\0{stat.st_mtime_ns}\0{stat.st_size}'
+    return None
+
+
+class FFmpegPass:
+    """
+    A pass of ffmpeg that rewrites a file by copying its streams
+
+    The passes of consecutive post-processors over a file are made in a single run
+    of ffmpeg when their copy options agree (see FFmpegPassPlanner)
+
+    @param message          What the pass does, to be shown on screen
+    @param copy_opts        The options that copy the streams of the file
+    @param opts             The other output options, or a function returning them
+                            given the index of the first of the extra inputs
+    @param inputs           The extra input files
+    @param files_to_delete  Files for the post-processor to return once the pass is made
+    @param temp_files       Files to delete once the pass is made
+    """
+
+    def __init__(self, message, copy_opts, opts=(), inputs=(), files_to_delete=(), temp_files=()):
+        self.message = message
+        self.copy_opts = tuple(copy_opts)
+        self._opts = opts
+        self.inputs = list(inputs)
+        self.files_to_delete = list(files_to_delete)
+        self.temp_files = list(temp_files)
+
+    def output_opts(self, first_input=1):
+        return list(self._opts(first_input) if callable(self._opts) else self._opts)
+
+    @staticmethod
+    def combine_copy_opts(passes):
+        """ The copy options to make the passes together with, or None if they disagree """
+        # Only mp4 files get "-c:s mov_text", and they cannot hold copies of other subtitles anyway
+        if len({p.copy_opts[:-2] if p.copy_opts[-2:] == ('-c:s', 'mov_text') else p.copy_opts
+                for p in passes}) == 1:
+            return max((p.copy_opts for p in passes), key=len)
+
+
 class FFmpegPostProcessor(PostProcessor):
     _ffmpeg_location = contextvars.ContextVar('ffmpeg_location', default=None)
 
@@ -132,12 +179,35 @@ def _determine_executables(self):
             paths[basename] = location
         return paths
 
-    _version_cache, _features_cache = {None: None}, {}
+    _version_cache, _features_cache, _audio_codec_cache = {None: None}, {}, {}
 
     def _get_ffmpeg_version(self, prog):
         path = self._paths.get(prog)
         if path in self._version_cache:
             return self._version_cache[path], self._features_cache.get(path, {})
+
+        # The probe results are kept in the cache for as long as the executable is not changed
+        fingerprint = _file_fingerprint(shutil.which(path) if path else None)
+        cache = fingerprint and getattr(self._downloader, 'cache', None)
+        cache_key = cache and hashlib.sha256(f'{prog}\0{fingerprint}'.encode()).hexdigest()
+        cached = cache and cache.load('ffmpeg-probe', cache_key)
+        if isinstance(cached, dict) and cached.get('version'):
+            ver, features = cached['version'], cached.get('features')
+        else:
+            ver, features = self._probe_ffmpeg_version(prog, path)
+            # A failed probe is not kept, so that it is retried on the next run
+            if cache and ver:
+                cache.store('ffmpeg-probe', cache_key, {'version': ver, 'features': features})
+
+        self._version_cache[path] = ver
+        if features is None:
+            return ver, {}
+        self._features_cache[path] = features
+        return ver, features
+
+    @staticmethod
+    def _probe_ffmpeg_version(prog, path):
+        """ Run the executable to find its version and features (None if they are unknown) """
         out = _get_exe_version_output(path, ['-bsfs'])
         ver = detect_exe_version(out) if out else False
         if ver:
@@ -150,18 +220,16 @@ def _get_ffmpeg_version(self, prog):
                 mobj = re.match(regex, ver)
                 if mobj:
                     ver = mobj.group(1)
-        self._version_cache[path] = ver
         if prog != 'ffmpeg' or not out:
-            return ver, {}
+            return ver, None
 
         mobj = re.search(r'(?m)^\s+libavformat\s+(?:[0-9. ]+)\s+/\s+(?P<runtime>[0-9. ]+)', out)
         lavf_runtime_version = mobj.group('runtime').replace(' ', '') if mobj else None
-        self._features_cache[path] = features = {
+        return ver, {
             'fdk': '--enable-libfdk-aac' in out,
             'setts': 'setts' in out.splitlines(),
             'needs_adtstoasc': is_outdated_version(lavf_runtime_version, '57.56.100', False),
         }
-        return ver, features
 
     @property
     def _versions(self):
@@ -239,6 +307,17 @@ def check_version(self):
     def get_audio_codec(self, path):
         if not self.probe_available and not self.available:
             raise PostProcessingError('ffprobe and ffmpeg not found. Please install or provide the path using --ffmpeg-location')
+        # Several post-processors may ask for the codec of the same file
+        fingerprint = _file_fingerprint(path)
+        cache_key = (self.probe_executable if self.probe_available else self.executable, fingerprint)
+        if fingerprint and cache_key in self._audio_codec_cache:
+            return self._audio_codec_cache[cache_key]
+        audio_codec = self._get_audio_codec(path)
+        if fingerprint:
+            self._audio_codec_cache[cache_key] = audio_codec
+        return audio_codec
+
+    def _get_audio_codec(self, path):
         try:
             if self.probe_available:
                 cmd = [
@@ -373,6 +452,44 @@ def make_args(file, args, name, number):
     def run_ffmpeg(self, path, out_path, opts, **kwargs):
         return self.run_ffmpeg_multiple_files([path], out_path, opts, **kwargs)
 
+    def _ffmpeg_pass(self, info):
+        """ The FFmpegPass that run() makes over info['filepath'] using _run_pass, if any """
+        return None
+
+    def _can_plan_pass(self, info):
+        """
+        Whether run() only makes its _ffmpeg_pass, which does not depend on
+        the streams of the file, so that it can be made together with others
+        """
+        return False
+
+    def _run_pass(self, info):
+        ffmpeg_pass = self._ffmpeg_pass(info)
+        if not ffmpeg_pass:
+            return [], info
+        self.to_screen(ffmpeg_pass.message)
+        planner = info.get('__ffmpeg_planner')
+        if planner:
+            planner.add(self, ffmpeg_pass, info)
+            return [], info
+        self.make_passes(info['filepath'], [ffmpeg_pass])
+        return ffmpeg_pass.files_to_delete, info
+
+    def make_passes(self, filename, passes):
+        """ Make the FFmpegPasses over the file in a single run of ffmpeg """
+        copy_opts = FFmpegPass.combine_copy_opts(passes)
+        if copy_opts is None:
+            raise FFmpegPostProcessorError('The ffmpeg passes cannot be made together')
+        inputs, opts = [filename], list(copy_opts)
+        for ffmpeg_pass in passes:
+            opts.extend(ffmpeg_pass.output_opts(len(inputs)))
+            inputs.extend(ffmpeg_pass.inputs)
+
+        temp_filename = prepend_extension(filename, 'temp')
+        self.run_ffmpeg_multiple_files(inputs, temp_filename, opts)
+        self._delete_downloaded_files(*itertools.chain.from_iterable(p.temp_files for p in passes))
+        os.replace(temp_filename, filename)
+
     @staticmethod
     def _ffmpeg_filename_argument(fn):
         # Always use 'file:' because the filename may contain ':' (ffmpeg
@@ -594,13 +711,19 @@ def __init__(self, downloader=None, already_have_subtitle=False):
 
     @PostProcessor._restrict_to(images=False)
     def run(self, info):
+        return self._run_pass(info)
+
+    def _can_plan_pass(self, info):
+        return True
+
+    def _ffmpeg_pass(self, info):
         if info['ext'] not in self.SUPPORTED_EXTS:
             self.to_screen(f'Subtitles can only be embedded in {", ".join(self.SUPPORTED_EXTS)} files')
-            return [], info
+            return None
         subtitles = info.get('requested_subtitles')
         if not subtitles:
             self.to_screen('There aren\'t any subtitles to embed')
-            return [], info
+            return None
 
         filename = info['filepath']
 
@@ -611,7 +734,7 @@ def run(self, info):
         if info.get('duration') and not info.get('__real_download') and self._duration_mismatch(
                 self._get_real_video_duration(filename, False), info['duration']):
             self.to_screen(f'Skipping {self.pp_key()} since the real and expected durations mismatch')
-            return [], info
+            return None
         '''
 
         ext = info['ext']
@@ -639,31 +762,23 @@ def run(self, info):
                 self.report_warning('ASS subtitles cannot be properly embedded in mp4 files; expect issues')
 
         if not sub_langs:
-            return [], info
-
-        input_files = [filename, *sub_filenames]
+            return None
 
-        opts = [
-            *self.stream_copy_opts(ext=info['ext']),
+        def output_opts(first_input):
             # Don't copy the existing subtitles, we may be running the
             # postprocessor a second time
-            '-map', '-0:s',
-        ]
-        for i, (lang, name) in enumerate(zip(sub_langs, sub_names)):
-            opts.extend(['-map', f'{i + 1}:0'])
-            lang_code = ISO639Utils.short2long(lang) or lang
-            opts.extend([f'-metadata:s:s:{i}', f'language={lang_code}'])
-            if name:
-                opts.extend([f'-metadata:s:s:{i}', f'handler_name={name}',
-                             f'-metadata:s:s:{i}', f'title={name}'])
-
-        temp_filename = prepend_extension(filename, 'temp')
-        self.to_screen(f'Embedding subtitles in "{filename}"')
-        self.run_ffmpeg_multiple_files(input_files, temp_filename, opts)
-        os.replace(temp_filename, filename)
+            yield from ('-map', '-0:s')
+            for i, (lang, name) in enumerate(zip(sub_langs, sub_names)):
+                yield from ('-map', f'{first_input + i}:0')
+                lang_code = ISO639Utils.short2long(lang) or lang
+                yield from (f'-metadata:s:s:{i}', f'language={lang_code}')
+                if name:
+                    yield from (f'-metadata:s:s:{i}', f'handler_name={name}',
+                                f'-metadata:s:s:{i}', f'title={name}')
 
-        files_to_delete = [] if self._already_have_subtitle else sub_filenames
-        return files_to_delete, info
+        return FFmpegPass(
+            f'Embedding subtitles in "{filename}"', self.stream_copy_opts(ext=ext), output_opts,
+            inputs=sub_filenames, files_to_delete=[] if self._already_have_subtitle else sub_filenames)
 
 
 class FFmpegMetadataPP(FFmpegPostProcessor):
@@ -683,12 +798,19 @@ def _options(target_ext):
 
     @PostProcessor._restrict_to(images=False)
     def run(self, info):
+        return self._run_pass(info)
+
+    def _can_plan_pass(self, info):
+        # The info-json is attached after the streams that are in the file
+        return not (self._add_infojson and info['ext'] in ('mkv', 'mka'))
+
+    def _ffmpeg_pass(self, info):
         self._fixup_chapters(info)
         filename, metadata_filename = info['filepath'], None
         files_to_delete, options = [], []
-        if self._add_chapters and info.get('chapters'):
+        chapters = self._add_chapters and info.get('chapters')
+        if chapters:
             metadata_filename = replace_extension(filename, 'meta')
-            options.extend(self._get_chapter_opts(info['chapters'], metadata_filename))
             files_to_delete.append(metadata_filename)
         if self._add_metadata:
             options.extend(self._get_metadata_opts(info))
@@ -702,21 +824,20 @@ def run(self, info):
             elif self._add_infojson is True:
                 self.to_screen('The info-json can only be attached to mkv/mka files')
 
-        if not options:
+        if not options and not chapters:
             self.to_screen('There isn\'t any metadata to add')
-            return [], info
+            return None
 
-        temp_filename = prepend_extension(filename, 'temp')
-        self.to_screen(f'Adding metadata to "{filename}"')
-        self.run_ffmpeg_multiple_files(
-            (filename, metadata_filename), temp_filename,
-            itertools.chain(self._options(info['ext']), *options))
-        self._delete_downloaded_files(*files_to_delete)
-        os.replace(temp_filename, filename)
-        return [], info
+        def output_opts(first_input):
+            chapter_opts = self._get_chapter_opts(chapters, metadata_filename, first_input) if chapters else []
+            return itertools.chain(*chapter_opts, *options)
+
+        return FFmpegPass(
+            f'Adding metadata to "{filename}"', self._options(info['ext']), output_opts,
+            inputs=[metadata_filename] if chapters else [], temp_files=files_to_delete)
 
     @staticmethod
-    def _get_chapter_opts(chapters, metadata_filename):
+    def _get_chapter_opts(chapters, metadata_filename, input_index=1):
         with open(metadata_filename, 'w', encoding='utf-8') as f:
             def ffmpeg_escape(text):
                 return re.sub(r'([\\=;#\n])', r'\\\1', text)
@@ -730,7 +851,7 @@ def ffmpeg_escape(text):
                 if chapter_title:
                     metadata_file_content += f'title={ffmpeg_escape(chapter_title)}\n'
             f.write(metadata_file_content)
-        yield ('-map_metadata', '1')
+        yield ('-map_metadata', str(input_index))
 
     def _get_metadata_opts(self, info):
         meta_prefix = 'meta'
@@ -865,23 +986,32 @@ def _fixup(self, msg, filename, options):
 
         os.replace(temp_filename, filename)
 
+    def _can_plan_pass(self, info):
+        return True
+
+    def _fixup_pass(self, msg, filename, options):
+        return FFmpegPass(f'{msg} of "{filename}"', self.stream_copy_opts(), options)
+
 
 class FFmpegFixupStretchedPP(FFmpegFixupPostProcessor):
     @PostProcessor._restrict_to(images=False, audio=False)
     def run(self, info):
+        return self._run_pass(info)
+
+    def _ffmpeg_pass(self, info):
         stretched_ratio = info.get('stretched_ratio')
         if stretched_ratio not in (None, 1):
-            self._fixup('Fixing aspect ratio', info['filepath'], [
-                *self.stream_copy_opts(), '-aspect', f'{stretched_ratio:f}'])
-        return [], info
+            return self._fixup_pass('Fixing aspect ratio', info['filepath'], ['-aspect', f'{stretched_ratio:f}'])
 
 
 class FFmpegFixupM4aPP(FFmpegFixupPostProcessor):
     @PostProcessor._restrict_to(images=False, video=False)
     def run(self, info):
+        return self._run_pass(info)
+
+    def _ffmpeg_pass(self, info):
         if info.get('container') == 'm4a_dash':
-            self._fixup('Correcting container', info['filepath'], [*self.stream_copy_opts(), '-f', 'mp4'])
-        return [], info
+            return self._fixup_pass('Correcting container', info['filepath'], ['-f', 'mp4'])
 
 
 class FFmpegFixupM3u8PP(FFmpegFixupPostProcessor):
@@ -898,13 +1028,14 @@ def _needs_fixup(self, info):
 
     @PostProcessor._restrict_to(images=False)
     def run(self, info):
+        return self._run_pass(info)
+
+    def _ffmpeg_pass(self, info):
         if all(self._needs_fixup(info)):
             args = ['-f', 'mp4']
             if self.get_audio_codec(info['filepath']) == 'aac':
                 args.extend(['-bsf:a', 'aac_adtstoasc'])
-            self._fixup('Fixing MPEG-TS in MP4 container', info['filepath'], [
-                *self.stream_copy_opts(), *args])
-        return [], info
+            return self._fixup_pass('Fixing MPEG-TS in MP4 container', info['filepath'], args)
 
 
 class FFmpegFixupTimestampPP(FFmpegFixupPostProcessor):
@@ -927,14 +1058,19 @@ def run(self, info):
         self._fixup('Fixing frame timestamp', info['filepath'], [*opts, *self.stream_copy_opts(False), '-ss', self.trim])
         return [], info
 
+    def _can_plan_pass(self, info):
+        return False
+
 
 class FFmpegCopyStreamPP(FFmpegFixupPostProcessor):
     MESSAGE = 'Copying stream'
 
     @PostProcessor._restrict_to(images=False)
     def run(self, info):
-        self._fixup(self.MESSAGE, info['filepath'], self.stream_copy_opts())
-        return [], info
+        return self._run_pass(info)
+
+    def _ffmpeg_pass(self, info):
+        return self._fixup_pass(self.MESSAGE, info['filepath'], [])
 
 
 class FFmpegFixupDurationPP(FFmpegCopyStreamPP):
@@ -0,0 +1,77 @@
+import re
+
+from .ffmpeg import FFmpegPass, FFmpegPostProcessor
+from ..utils import PostProcessingError
+
+
+class FFmpegPassPlanner:
+    """
+    Run a chain of post-processors, making the consecutive FFmpegPasses that
+    they would each make over the file in as few runs of ffmpeg as possible
+
+    The pass of a post-processor that can plan it (see FFmpegPostProcessor._can_plan_pass)
+    is put off until a post-processor that cannot, or a pass that conflicts with it, comes.
+    If the passes fail to be made together, they are made one by one
+    """
+
+    def __init__(self, ydl):
+        self._ydl = ydl
+        self._filename, self._pending = None, []
+
+    def _can_plan(self, pp, info):
+        if not isinstance(pp, FFmpegPostProcessor) or not pp._can_plan_pass(info):
+            return False
+        # The passes are made with the arguments that are not specific to any post-processor
+        pp_args = self._ydl.params.get('postprocessor_args')
+        pp_key = re.escape(pp.pp_key().lower())
+        return not isinstance(pp_args, dict) or not any(re.match(rf'{pp_key}(?:\+|$)', key) for key in pp_args)
+
+    def run(self, pps, info):
+        try:
+            for pp in pps:
+                if not self._can_plan(pp, info):
+                    info = self._ydl.run_pp(pp, self.flush(info))
+                    continue
+                info['__ffmpeg_planner'] = self
+                try:
+                    info = self._ydl.run_pp(pp, info)
+                finally:
+                    info.pop('__ffmpeg_planner', None)
+        except PostProcessingError:
+            # The passes that were put off would have been made before the error
+            self.flush(info)
+            raise
+        return self.flush(info)
+
+    def add(self, pp, ffmpeg_pass, info):
+        """ Put off the pass of the post-processor, making the pending ones first if they conflict """
+        if self._pending and (
+                any(type(other) is type(pp) for other, _ in self._pending)
+                or FFmpegPass.combine_copy_opts([ffmpeg_pass, *(p for _, p in self._pending)]) is None):
+            self.flush(info)
+        self._filename = info['filepath']
+        self._pending.append((pp, ffmpeg_pass))
+
+    def _make_passes(self, pending):
+        if len(pending) > 1:
+            try:
+                return pending[0][0].make_passes(self._filename, [p for _, p in pending])
+            except PostProcessingError as e:
+                self._ydl.report_warning(f'Unable to make the ffmpeg passes together; making them one by one: {e}')
+        for pp, ffmpeg_pass in pending:
+            pp.make_passes(self._filename, [ffmpeg_pass])
+
+    def flush(self, info):
+        """ Make the pending passes """
+        pending, self._pending = self._pending, []
+        try:
+            self._make_passes(pending)
+        except PostProcessingError as e:
+            # Must be True and not 'only_download'
+            if self._ydl.params.get('ignoreerrors') is not True:
+                raise
+            self._ydl.report_error(e)
+            return info
+        for _, ffmpeg_pass in pending:
+            self._ydl._delete_pp_files(ffmpeg_pass.files_to_delete, info)
+        return info
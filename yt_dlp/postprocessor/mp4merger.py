@@ -0,0 +1,464 @@
+import collections
+import heapq
+import os
+import threading
+
+from .common import PostProcessor
+from .ffmpeg import FFmpegMergerPP
+from ..downloader.ism import box, u32, u64
+from ..utils import PostProcessingError, prepend_extension
+
+# The boxes between the fragments that are only valid for the input file
+_SKIPPED_BOXES = (b'sidx', b'ssix', b'mfra', b'styp')
+
+
+def _iter_boxes(data, start=0, end=None):
+    """ Yield (box type, payload start, payload end) of the boxes in data[start:end] """
+    end = len(data) if end is None else end
+    while start + 8 <= end:
+        size, box_type, header_size = u32.unpack_from(data, start)[0], bytes(data[start + 4:start + 8]), 8
+        if size == 1:
+            size, header_size = u64.unpack_from(data, start + 8)[0], 16
+        elif size == 0:
+            size = end - start
+        if size < header_size or start + size > end:
+            raise PostProcessingError(f'Invalid {box_type!r} box')
+        yield box_type, start + header_size, start + size
+        start += size
+
+
+def _parse_boxes(data):
+    return [(box_type, data[start:end]) for box_type, start, end in _iter_boxes(data)]
+
+
+def _find_box(boxes, *path):
+    for box_type, payload in boxes:
+        if box_type == path[0]:
+            return payload if len(path) == 1 else _find_box(_parse_boxes(payload), *path[1:])
+    return None
+
+
+def _full_box_field(payload, v0_offset, v1_offset):
+    """ Return the struct and offset of a field whose size depends on the version of the full box """
+    return (u64, v1_offset) if payload[0] == 1 else (u32, v0_offset)
+
+
+def _rescale(value, timescale, new_timescale):
+    return value if timescale == new_timescale else value * new_timescale // timescale
+
+
+class _Track:
+    """ The header of a fragmented MP4 input with a single track """
+
+    def _parse_header(self, ftyp, moov):
+        if not ftyp or not moov:
+            raise PostProcessingError(f'{self.name} is not an MP4 file')
+        self.ftyp, self.moov = ftyp, _parse_boxes(moov)
+        traks = [payload for box_type, payload in self.moov if box_type == b'trak']
+        if len(traks) != 1 or _find_box(self.moov, b'mvex', b'trex') is None:
+            raise PostProcessingError(f'{self.name} is not a fragmented MP4 file with a single track')
+        self.trak = _parse_boxes(traks[0])
+        for chunk_offsets in (b'stco', b'co64'):
+            payload = _find_box(self.trak, b'mdia', b'minf', b'stbl', chunk_offsets)
+            if payload and u32.unpack_from(payload, 4)[0]:
+                raise PostProcessingError(f'{self.name} has samples outside of its fragments')
+
+        mvhd = _find_box(self.moov, b'mvhd')
+        self.movie_timescale = u32.unpack_from(mvhd, 20 if mvhd[0] == 1 else 12)[0]
+        mdhd = _find_box(self.trak, b'mdia', b'mdhd')
+        self.timescale = u32.unpack_from(mdhd, 20 if mdhd[0] == 1 else 12)[0]
+        tkhd = _find_box(self.trak, b'tkhd')
+        self.track_id = u32.unpack_from(tkhd, 20 if tkhd[0] == 1 else 12)[0]
+        if not self.movie_timescale or not self.timescale:
+            raise PostProcessingError(f'{self.name} has an invalid timescale')
+
+    def decode_time(self, moof, default=0):
+        """ Return the decode time (in seconds) of the fragment, or default if it has none """
+        header_size = 16 if u32.unpack_from(moof, 0)[0] == 1 else 8
+        for box_type, start, end in _iter_boxes(moof, header_size):
+            if box_type != b'traf':
+                continue
+            for traf_type, traf_start, _ in _iter_boxes(moof, start, end):
+                if traf_type == b'tfdt':
+                    field = u64 if moof[traf_start] == 1 else u32
+                    return field.unpack_from(moof, traf_start + 4)[0] / self.timescale
+        return default
+
+    def patch_moof(self, moof, sequence_number, track_id, moved_by):
+        """ Renumber the fragment and its track, and move its absolute data offsets """
+        header_size = 16 if u32.unpack_from(moof, 0)[0] == 1 else 8
+        for box_type, start, end in _iter_boxes(moof, header_size):
+            if box_type == b'mfhd':
+                u32.pack_into(moof, start + 4, sequence_number)
+            elif box_type == b'traf':
+                for traf_type, traf_start, _ in _iter_boxes(moof, start, end):
+                    if traf_type != b'tfhd':
+                        continue
+                    if u32.unpack_from(moof, traf_start + 4)[0] != self.track_id:
+                        raise PostProcessingError(f'{self.name} has fragments of an unknown track')
+                    u32.pack_into(moof, traf_start + 4, track_id)
+                    if moof[traf_start + 3] & 0x1:  # base-data-offset-present
+                        base_data_offset = u64.unpack_from(moof, traf_start + 8)[0]
+                        u64.pack_into(moof, traf_start + 8, base_data_offset + moved_by)
+        return moof
+
+
+class _FragmentedMP4Input(_Track):
+    """
+    A fragmented MP4 file with a single track
+
+    The header is read on creation and the fragments are only read as they are iterated
+    """
+
+    def __init__(self, filename):
+        self.name = filename
+        self.file = open(filename, 'rb')
+        try:
+            self._read_header()
+        except Exception:
+            self.file.close()
+            raise
+
+    def _read_top_level_boxes(self):
+        """ Yield (box type, box start, header size, box size) and leave the file at the payload """
+        file_size = os.fstat(self.file.fileno()).st_size
+        position = self.file.tell()
+        while position + 8 <= file_size:
+            self.file.seek(position)
+            header = self.file.read(8)
+            size, box_type, header_size = u32.unpack(header[:4])[0], header[4:], 8
+            if size == 1:
+                size, header_size = u64.unpack(self.file.read(8))[0], 16
+            elif size == 0:
+                size = file_size - position
+            if size < header_size or position + size > file_size:
+                raise PostProcessingError(f'{self.name} is truncated or is not an MP4 file')
+            yield box_type, position, header_size, size
+            position += size
+
+    def _read_header(self):
+        ftyp = moov = self._first_fragment = None
+        for box_type, start, header_size, size in self._read_top_level_boxes():
+            if box_type == b'moof':
+                self._first_fragment = start
+                break
+            elif box_type in (b'ftyp', b'moov'):
+                payload = self.file.read(size - header_size)
+                if box_type == b'ftyp':
+                    ftyp = payload
+                else:
+                    moov = payload
+        self._parse_header(ftyp, moov)
+        if self._first_fragment is None:
+            raise PostProcessingError(f'{self.name} is not a fragmented MP4 file with a single track')
+
+    def fragments(self):
+        """
+        Yield (decode time in seconds, moof box, moof start, data start, data end)
+
+        The data of a fragment is everything up to the next fragment (usually a single mdat)
+        """
+        self.file.seek(self._first_fragment)
+        decode_time, fragment = 0, None
+        for box_type, start, _, size in self._read_top_level_boxes():
+            if box_type in (b'moof', *_SKIPPED_BOXES) and fragment:
+                yield (*fragment, start)
+                fragment = None
+            if box_type == b'moof':
+                self.file.seek(start)
+                moof = bytearray(self.file.read(size))
+                decode_time = self.decode_time(moof, decode_time)
+                fragment = (decode_time, moof, start, start + size)
+        if fragment:
+            yield (*fragment, self.file.seek(0, os.SEEK_END))
+
+    def copy_data(self, start, end, out_file):
+        self.file.seek(start)
+        while start < end:
+            chunk = self.file.read(min(end - start, 1024 * 1024))
+            if not chunk:
+                raise PostProcessingError(f'{self.name} is truncated')
+            out_file.write(chunk)
+            start += len(chunk)
+
+    def close(self):
+        self.file.close()
+
+
+def _merge_moov(inputs):
+    """ Combine the movie boxes of the inputs, numbering the tracks in order """
+    movie_timescale = inputs[0].movie_timescale
+
+    def rescale_field(payload, v0_offset, v1_offset, timescale):
+        payload = bytearray(payload)
+        field, offset = _full_box_field(payload, v0_offset, v1_offset)
+        value = _rescale(field.unpack_from(payload, offset)[0], timescale, movie_timescale)
+        field.pack_into(payload, offset, min(value, 2 ** (field.size * 8) - 1))
+        return payload, value
+
+    duration, fragment_duration, traks, trexs = 0, None, [], []
+    for track_id, inp in enumerate(inputs, 1):
+        _, track_duration = rescale_field(_find_box(inp.moov, b'mvhd'), 16, 24, inp.movie_timescale)
+        duration = max(duration, track_duration)
+        if mehd := _find_box(inp.moov, b'mvex', b'mehd'):
+            fragment_duration = max(fragment_duration or 0, rescale_field(mehd, 4, 4, inp.movie_timescale)[1])
+
+        trak = []
+        for box_type, payload in inp.trak:
+            if box_type == b'tkhd':
+                payload, _ = rescale_field(payload, 20, 28, inp.movie_timescale)
+                u32.pack_into(payload, 20 if payload[0] == 1 else 12, track_id)
+            elif box_type == b'edts':
+                edts = []
+                for edts_type, edts_payload in _parse_boxes(payload):
+                    if edts_type == b'elst' and inp.movie_timescale != movie_timescale:
+                        entry_size = 20 if edts_payload[0] == 1 else 12
+                        for i in range(u32.unpack_from(edts_payload, 4)[0]):
+                            edts_payload, _ = rescale_field(
+                                edts_payload, 8 + i * entry_size, 8 + i * entry_size, inp.movie_timescale)
+                    edts.append(box(edts_type, bytes(edts_payload)))
+                payload = b''.join(edts)
+            trak.append(box(box_type, bytes(payload)))
+        traks.append(box(b'trak', b''.join(trak)))
+
+        trex = bytearray(_find_box(inp.moov, b'mvex', b'trex'))
+        u32.pack_into(trex, 4, track_id)
+        trexs.append(box(b'trex', bytes(trex)))
+
+    mvhd = bytearray(_find_box(inputs[0].moov, b'mvhd'))
+    field, offset = _full_box_field(mvhd, 16, 24)
+    field.pack_into(mvhd, offset, min(duration, 2 ** (field.size * 8) - 1))
+    u32.pack_into(mvhd, len(mvhd) - 4, len(inputs) + 1)  # next track ID
+
+    mvex = []
+    if fragment_duration is not None:
+        mehd = bytearray(_find_box(inputs[0].moov, b'mvex', b'mehd') or b'\x01\0\0\0' + u64.pack(0))
+        field, offset = _full_box_field(mehd, 4, 4)
+        field.pack_into(mehd, offset, min(fragment_duration, 2 ** (field.size * 8) - 1))
+        mvex.append(box(b'mehd', bytes(mehd)))
+    mvex.extend(trexs)
+
+    return box(b'moov', b''.join((
+        box(b'mvhd', bytes(mvhd)),
+        *traks,
+        box(b'mvex', b''.join(mvex)),
+        # The other boxes (e.g. udta) are taken from the first input. The iods references the tracks
+        *(box(box_type, payload) for box_type, payload in inputs[0].moov
+          if box_type not in (b'mvhd', b'trak', b'mvex', b'iods')),
+    )))
+
+
+def _track_fragments(track_id, inp):
+    for fragment in inp.fragments():
+        yield (*fragment, track_id, inp)
+
+
+def merge_fragmented_mp4(filenames, out_filename):
+    """
+    Merge fragmented MP4 files that have a single track each into one file
+
+    The fragments of all the tracks are interleaved by their decode time and copied as they are.
+    Raises PostProcessingError if the inputs cannot be merged this way
+    """
+    inputs = []
+    try:
+        for filename in filenames:
+            inputs.append(_FragmentedMP4Input(filename))
+
+        with open(out_filename, 'wb') as out_file:
+            out_file.write(box(b'ftyp', inputs[0].ftyp))
+            out_file.write(_merge_moov(inputs))
+            fragments = heapq.merge(*(
+                _track_fragments(track_id, inp) for track_id, inp in enumerate(inputs, 1)),
+                key=lambda fragment: fragment[0])
+            for sequence_number, (_, moof, start, data_start, data_end, track_id, inp) in enumerate(fragments, 1):
+                out_file.write(inp.patch_moof(moof, sequence_number, track_id, out_file.tell() - start))
+                inp.copy_data(data_start, data_end, out_file)
+    finally:
+        for inp in inputs:
+            inp.close()
+
+
+class _StreamInput(_Track):
+    """ A fragmented MP4 stream with a single track that is written into a FragmentedMP4Muxer """
+
+    def __init__(self, muxer, name):
+        self.name, self._muxer = name, muxer
+        self._ftyp, self._buffer, self._position = None, bytearray(), 0
+        self._fragment, self._decode_time = None, 0
+        # The complete fragments as (decode time in seconds, moof box, moof position, data, size)
+        self.fragments = collections.deque()
+        self.header_parsed = self.closed = False
+
+    def write(self, data):
+        self._muxer._write(self, data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._muxer._close(self)
+
+    def _feed(self, data):
+        """ Add data to the buffer and consume all the complete top-level boxes in it """
+        self._buffer += data
+        offset = 0
+        while len(self._buffer) - offset >= 8:
+            size, header_size = u32.unpack_from(self._buffer, offset)[0], 8
+            if size == 1:
+                if len(self._buffer) - offset < 16:
+                    break
+                size, header_size = u64.unpack_from(self._buffer, offset + 8)[0], 16
+            elif size == 0 and self.closed:
+                size = len(self._buffer) - offset
+            if size < header_size and size != 0:
+                raise PostProcessingError(f'{self.name} is not an MP4 file')
+            elif not size or len(self._buffer) - offset < size:
+                break
+            self._add_box(
+                bytes(self._buffer[offset + 4:offset + 8]), self._buffer[offset:offset + size],
+                self._position + offset, header_size)
+            offset += size
+        del self._buffer[:offset]
+        self._position += offset
+
+    def _finish(self):
+        self._feed(b'')
+        self._end_fragment()
+
+    def _add_box(self, box_type, data, position, header_size):
+        if not self.header_parsed:
+            if box_type == b'ftyp':
+                self._ftyp = bytes(data[header_size:])
+            elif box_type == b'moov':
+                self._parse_header(self._ftyp, bytes(data[header_size:]))
+                self.header_parsed = True
+            elif box_type == b'moof':
+                raise PostProcessingError(f'{self.name} is not a fragmented MP4 file with a single track')
+        elif box_type == b'moof':
+            self._end_fragment()
+            self._decode_time = self.decode_time(data, self._decode_time)
+            self._fragment = (self._decode_time, data, position, [])
+        elif box_type in _SKIPPED_BOXES:
+            self._end_fragment()
+        elif self._fragment:
+            self._fragment[3].append(data)
+            # The fragment is complete with its media data, the next one may be far away
+            if box_type == b'mdat':
+                self._end_fragment()
+
+    def _end_fragment(self):
+        if self._fragment:
+            size = len(self._fragment[1]) + sum(map(len, self._fragment[3]))
+            self.fragments.append((*self._fragment, size))
+            self._muxer._buffered += size
+            self._fragment = None
+
+
+class FragmentedMP4Muxer:
+    """
+    Merge fragmented MP4 streams that have a single track each into one file while they are written
+
+    The inputs are file-like objects that can be written concurrently (e.g. by fragment downloaders),
+    each of them in order. Their fragments are interleaved by decode time, unless more than
+    BUFFER_LIMIT bytes are waiting for an input that is behind the others
+    """
+
+    BUFFER_LIMIT = 32 * 1024 * 1024
+
+    def __init__(self, out_stream, names):
+        self._out, self._lock = out_stream, threading.Lock()
+        self.inputs = [_StreamInput(self, name) for name in names]
+        self._position = self._buffered = self._sequence_number = 0
+        self._header_written, self._error = False, None
+
+    def _write(self, inp, data):
+        with self._lock:
+            self._update(inp._feed, data)
+
+    def _close(self, inp):
+        with self._lock:
+            inp.closed = True
+            self._update(inp._finish)
+
+    def _update(self, func, *args):
+        if self._error:
+            raise self._error
+        try:
+            func(*args)
+            self._mux()
+        except PostProcessingError as e:
+            self._error = e
+            raise
+
+    def _output(self, data):
+        self._out.write(data)
+        self._position += len(data)
+
+    def _mux(self):
+        if not self._header_written:
+            if not all(inp.header_parsed for inp in self.inputs):
+                return
+            self._output(box(b'ftyp', self.inputs[0].ftyp))
+            self._output(_merge_moov(self.inputs))
+            self._header_written = True
+
+        while True:
+            waiting = [inp for inp in self.inputs if inp.fragments]
+            if not waiting or (
+                    self._buffered <= self.BUFFER_LIMIT
+                    and any(not inp.fragments and not inp.closed for inp in self.inputs)):
+                return
+            inp = min(waiting, key=lambda inp: inp.fragments[0][0])
+            _, moof, position, data, size = inp.fragments.popleft()
+            self._buffered -= size
+            self._sequence_number += 1
+            self._output(inp.patch_moof(
+                moof, self._sequence_number, self.inputs.index(inp) + 1, self._position - position))
+            for chunk in data:
+                self._output(chunk)
+
+    def finish(self):
+        """ Check that all the inputs were merged completely. They must have been closed """
+        with self._lock:
+            if self._error:
+                raise self._error
+            for inp in self.inputs:
+                if not inp.header_parsed:
+                    raise PostProcessingError(f'{inp.name} is not an MP4 file')
+                elif not inp.closed or inp._buffer:
+                    raise PostProcessingError(f'{inp.name} is truncated')
+            self._out.flush()
+
+
+class MP4MergerPP(PostProcessor):
+    """
+    Merge the fragmented MP4 formats of DASH (e.g. YouTube's) into an MP4 file without ffmpeg
+
+    The result is itself a fragmented MP4 file. Other formats are merged with FFmpegMergerPP
+    """
+    available = True
+
+    @staticmethod
+    def can_merge(info):
+        return info.get('ext') == 'mp4' and all(
+            fmt.get('container') in ('mp4_dash', 'm4a_dash') for fmt in info.get('requested_formats') or [{}])
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        filename = info['filepath']
+        temp_filename = prepend_extension(filename, 'temp')
+        self.to_screen(f'Merging formats into "{filename}"')
+        try:
+            merge_fragmented_mp4(info['__files_to_merge'], temp_filename)
+        except PostProcessingError as e:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            ffmpeg_merger = FFmpegMergerPP(self._downloader)
+            if not ffmpeg_merger.available:
+                raise
+            self.report_warning(f'{e}; merging with {ffmpeg_merger.basename} instead')
+            return ffmpeg_merger.run(info)
+        os.replace(temp_filename, filename)
+        return info['__files_to_merge'], info
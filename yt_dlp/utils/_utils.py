@@ -2419,9 +2419,30 @@ def __init__(self, ydl, info_dict):
                 self._entries[i - 1] = entry
         elif isinstance(entries, (list, PagedList, LazyList)):
             self._entries = entries
+        elif ydl.params.get('lazy_playlist') and self._is_forward_only(self._requested_items()):
+            self._entries = self._EntryStream(entries)
         else:
             self._entries = LazyList(entries)
 
+    class _EntryStream:
+        """Forward-only view of an iterable of entries. Consumed entries are not retained"""
+
+        def __init__(self, iterable):
+            self._iterable, self._position = iter(iterable), 0
+
+        def __getitem__(self, idx):
+            assert idx >= self._position, 'Entries of a stream must be requested in increasing order'
+            try:
+                entry = next(itertools.islice(self._iterable, idx - self._position, None))
+            except StopIteration:
+                raise LazyList.IndexError(idx)
+            self._position = idx + 1
+            return entry
+
+    @property
+    def is_streamed(self):
+        return isinstance(self._entries, self._EntryStream)
+
     PLAYLIST_ITEMS_RE = re.compile(r'''(?x)
         (?P<start>[+-]?\d+)?
         (?P<range>[:-]
@@ -2442,7 +2463,7 @@ def parse_playlist_items(cls, string):
                 raise ValueError(f'Step in {segment!r} cannot be zero')
             yield slice(int_or_none(start), float_or_none(end), int_or_none(step)) if has_range else int(start)
 
-    def get_requested_items(self):
+    def _requested_items(self):
         playlist_items = self.ydl.params.get('playlist_items')
         playlist_start = self.ydl.params.get('playliststart', 1)
         playlist_end = self.ydl.params.get('playlistend')
@@ -2453,9 +2474,30 @@ def get_requested_items(self):
             playlist_items = f'{playlist_start}:{playlist_end}'
         elif playlist_start != 1 or playlist_end:
             self.ydl.report_warning('Ignoring playliststart and playlistend because playlistitems was given', only_once=True)
+        return tuple(self.parse_playlist_items(playlist_items))
+
+    @staticmethod
+    def _is_forward_only(requested_items):
+        """Whether the items can be got in a single pass without knowing the length of the playlist"""
+        last = 0
+        for index in requested_items:
+            if isinstance(index, int):
+                start, stop, step = index, index, 1
+            else:
+                start, stop, step = index.start or 1, index.stop, index.step or 1
+            if start <= last or step < 0 or (stop is not None and stop < 0):
+                return False
+            last = float('inf') if stop is None else max(start, stop)
+        return True
 
-        for index in self.parse_playlist_items(playlist_items):
+    def get_requested_items(self):
+        seen = set()
+        for index in self._requested_items():
             for i, entry in self[index]:
+                if i in seen:
+                    continue
+                elif not self.is_streamed:
+                    seen.add(i)
                 yield i, entry
                 if not entry:
                     continue
@@ -2468,7 +2510,9 @@ def get_requested_items(self):
                     return
 
     def get_full_count(self):
-        if self.is_exhausted and not self.is_incomplete:
+        if self.is_streamed:
+            return None
+        elif self.is_exhausted and not self.is_incomplete:
             return len(self)
         elif isinstance(self._entries, InAdvancePagedList):
             if self._entries._pagesize == 1:
@@ -3207,7 +3251,19 @@ def filter_using_list(row, filter_array):
     return '\n'.join(''.join(row).rstrip() for row in table)
 
 
+def _is_incomplete_func(incomplete):
+    if isinstance(incomplete, bool):
+        return lambda _: incomplete
+    return lambda k: k in incomplete
+
+
 def _match_one(filter_part, dct, incomplete):
+    return _compile_match_one(filter_part)(dct, _is_incomplete_func(incomplete))
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_match_one(filter_part):
+    """ Compile a filter part into a function(dct, is_incomplete) """
     # TODO: Generalize code with YoutubeDL._build_format_filter
     STRING_OPERATORS = {
         '*=': operator.contains,
@@ -3224,11 +3280,6 @@ def _match_one(filter_part, dct, incomplete):
         '=': operator.eq,
     }
 
-    if isinstance(incomplete, bool):
-        is_incomplete = lambda _: incomplete
-    else:
-        is_incomplete = lambda k: k in incomplete
-
     operator_rex = re.compile(r'''(?x)
         (?P<key>[a-z_]+)
         \s*(?P<negation>!\s*)?(?P<op>{})(?P<none_inclusive>\s*\?)?\s*
@@ -3240,6 +3291,7 @@ def _match_one(filter_part, dct, incomplete):
     m = operator_rex.fullmatch(filter_part.strip())
     if m:
         m = m.groupdict()
+        key, none_inclusive = m['key'], m['none_inclusive']
         unnegated_op = COMPARISON_OPERATORS[m['op']]
         if m['negation']:
             op = lambda attr, value: not unnegated_op(attr, value)
@@ -3248,26 +3300,32 @@ def _match_one(filter_part, dct, incomplete):
         comparison_value = m['quotedstrval'] or m['strval']
         if m['quote']:
             comparison_value = comparison_value.replace(r'\{}'.format(m['quote']), m['quote'])
-        actual_value = dct.get(m['key'])
-        numeric_comparison = None
-        if isinstance(actual_value, (int, float)):
-            # If the original field is a string and matching comparisonvalue is
-            # a number we should respect the origin of the original field
-            # and process comparison value as a string (see
-            # https://github.com/ytdl-org/youtube-dl/issues/11082)
-            try:
-                numeric_comparison = int(comparison_value)
-            except ValueError:
-                numeric_comparison = parse_filesize(comparison_value)
-                if numeric_comparison is None:
-                    numeric_comparison = parse_filesize(f'{comparison_value}B')
-                if numeric_comparison is None:
-                    numeric_comparison = parse_duration(comparison_value)
-        if numeric_comparison is not None and m['op'] in STRING_OPERATORS:
-            raise ValueError('Operator {} only supports string values!'.format(m['op']))
-        if actual_value is None:
-            return is_incomplete(m['key']) or m['none_inclusive']
-        return op(actual_value, comparison_value if numeric_comparison is None else numeric_comparison)
+        # If the original field is a string and matching comparisonvalue is
+        # a number we should respect the origin of the original field
+        # and process comparison value as a string (see
+        # https://github.com/ytdl-org/youtube-dl/issues/11082)
+        try:
+            numeric_comparison = int(comparison_value)
+        except ValueError:
+            numeric_comparison = parse_filesize(comparison_value)
+            if numeric_comparison is None:
+                numeric_comparison = parse_filesize(f'{comparison_value}B')
+            if numeric_comparison is None:
+                numeric_comparison = parse_duration(comparison_value)
+        string_only = numeric_comparison is not None and m['op'] in STRING_OPERATORS
+        if numeric_comparison is None:
+            numeric_comparison = comparison_value
+
+        def match_comparison(dct, is_incomplete):
+            actual_value = dct.get(key)
+            if isinstance(actual_value, (int, float)):
+                if string_only:
+                    raise ValueError('Operator {} only supports string values!'.format(m['op']))
+                return op(actual_value, numeric_comparison)
+            elif actual_value is None:
+                return is_incomplete(key) or none_inclusive
+            return op(actual_value, comparison_value)
+        return match_comparison
 
     UNARY_OPERATORS = {
         '': lambda v: (v is True) if isinstance(v, bool) else (v is not None),
@@ -3278,13 +3336,32 @@ def _match_one(filter_part, dct, incomplete):
         '''.format('|'.join(map(re.escape, UNARY_OPERATORS.keys()))))
     m = operator_rex.fullmatch(filter_part.strip())
     if m:
-        op = UNARY_OPERATORS[m.group('op')]
-        actual_value = dct.get(m.group('key'))
-        if is_incomplete(m.group('key')) and actual_value is None:
-            return True
-        return op(actual_value)
+        key, op = m.group('key'), UNARY_OPERATORS[m.group('op')]
+
+        def match_unary(dct, is_incomplete):
+            actual_value = dct.get(key)
+            if is_incomplete(key) and actual_value is None:
+                return True
+            return op(actual_value)
+        return match_unary
+
+    def invalid(dct, is_incomplete):
+        # Raised only when evaluated, since the preceding parts may have already failed
+        raise ValueError(f'Invalid filter part {filter_part!r}')
+    return invalid
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_match_str(filter_str):
+    """ Compile a filter string into a function(dct, incomplete=False) that behaves like match_str """
+    predicates = tuple(
+        _compile_match_one(filter_part.replace(r'\&', '&'))
+        for filter_part in re.split(r'(?<!\\)&', filter_str))
 
-    raise ValueError(f'Invalid filter part {filter_part!r}')
+    def match(dct, incomplete=False):
+        is_incomplete = _is_incomplete_func(incomplete)
+        return all(predicate(dct, is_incomplete) for predicate in predicates)
+    return match
 
 
 def match_str(filter_str, dct, incomplete=False):
@@ -3294,9 +3371,7 @@ def match_str(filter_str, dct, incomplete=False):
                        Can be True/False to indicate all/none of the keys may be missing.
                        All conditions on incomplete keys pass if the key is missing
     """
-    return all(
-        _match_one(filter_part.replace(r'\&', '&'), dct, incomplete)
-        for filter_part in re.split(r'(?<!\\)&', filter_str))
+    return _compile_match_str(filter_str)(dct, incomplete)
 
 
 def match_filter_func(filters, breaking_filters=None):
@@ -3310,6 +3385,7 @@ def match_filter_func(filters, breaking_filters=None):
     interactive = '-' in filters
     if interactive:
         filters.remove('-')
+    compiled_filters = [_compile_match_str(f) for f in filters]
 
     @function_with_repr.set_repr(repr_)
     def _match_func(info_dict, incomplete=False):
@@ -3317,7 +3393,7 @@ def _match_func(info_dict, incomplete=False):
         if ret is not None:
             raise RejectedVideoReached(ret)
 
-        if not filters or any(match_str(f, info_dict, incomplete) for f in filters):
+        if not filters or any(match(info_dict, incomplete) for match in compiled_filters):
             return NO_DEFAULT if interactive and not incomplete else None
         else:
             video_title = info_dict.get('title') or info_dict.get('id') or 'entry'
@@ -5418,6 +5494,8 @@ def __init__(self, ydl, field_preference):
         self.ydl = ydl
         self._order = []
         self.evaluate_params(self.ydl.params, field_preference)
+        # NB: The settings are shared by all the instances, so they are resolved now
+        self._field_preference_funcs = tuple(map(self._compile_field_preference, self._order))
         if ydl.params.get('verbose'):
             self.print_verbose_info(self.ydl.write_debug)
 
@@ -5584,6 +5662,84 @@ def _calculate_field_preference(self, format_, field):
             value = get_value(field)
         return self._calculate_field_preference_from_value(format_, field, type_, value)
 
+    def _compile_order(self, field):
+        """Equivalent of _resolve_field_value() with convert_none for ordered fields"""
+        if self._get_field_setting(field, 'convert') != 'order':
+            return lambda value: self._resolve_field_value(field, value, True)
+
+        order_list = ((self._use_free_order and self._get_field_setting(field, 'order_free'))
+                      or self._get_field_setting(field, 'order'))
+        list_length = len(order_list)
+        empty_pos = order_list.index('') if '' in order_list else list_length + 1
+        not_in_list = list_length - empty_pos
+        positions = {}
+        for i, value in enumerate(order_list):
+            positions.setdefault(value, list_length - i)
+
+        if not self._get_field_setting(field, 'regex'):
+            return lambda value: positions.get(value if value is None else value.lower(), not_in_list)
+
+        none_position = positions.get(None, not_in_list)
+        regexes = [(re.compile(regex).match, list_length - i) for i, regex in enumerate(order_list) if regex]
+
+        def resolve(value):
+            if value is None:
+                return none_position
+            value = value.lower()
+            return next((position for match, position in regexes if match(value)), not_in_list)
+        return resolve
+
+    def _compile_field_preference(self, field):
+        """Resolve the settings of the field into a function that is equivalent to _calculate_field_preference()"""
+        type_ = self._get_field_setting(field, 'type')
+        if type_ == 'multiple':
+            type_ = 'field'
+            keys = tuple(self._get_field_setting(f, 'field') for f in self._get_field_setting(field, 'field'))
+            function = self._get_field_setting(field, 'function')
+            get_value = lambda format_: function(format_.get(key) for key in keys)
+        else:
+            key = self._get_field_setting(field, 'field')
+            get_value = lambda format_: format_.get(key)
+
+        convert = None
+        if type_ == 'extractor':
+            maximum = self._get_field_setting(field, 'max')
+            convert = lambda value: -1 if value is None or (maximum is not None and value >= maximum) else value
+        elif type_ == 'boolean':
+            in_list = self._get_field_setting(field, 'in_list')
+            not_in_list = self._get_field_setting(field, 'not_in_list')
+            convert = lambda value: (
+                0 if (in_list is None or value in in_list) and (not_in_list is None or value not in not_in_list)
+                else -1)
+        elif type_ == 'ordered':
+            convert = self._compile_order(field)
+
+        reverse = self._get_field_setting(field, 'reverse')
+        closest = self._get_field_setting(field, 'closest')
+        limit = self._get_field_setting(field, 'limit')
+        default = self._get_field_setting(field, 'default')
+        is_string = self._get_field_setting(field, 'convert') == 'string'
+
+        def calculate(format_):
+            value = get_value(format_)
+            if convert:
+                value = convert(value)
+            # Same as float_or_none(), which is too slow to be called for every field
+            try:
+                val_num = default if value is None else float(value)
+            except (ValueError, TypeError):
+                val_num = default
+            is_num = not is_string and val_num is not None
+            if is_num:
+                value = val_num
+            return ((-10, 0) if value is None
+                    else (1, value, 0) if not is_num
+                    else (0, -abs(value - limit), value - limit if reverse else limit - value) if closest
+                    else (0, value, 0) if not reverse and (limit is None or value <= limit)
+                    else (0, -value, 0) if limit is None or (reverse and value == limit) or value > limit
+                    else (-1, value, 0))
+        return calculate
+
     @staticmethod
     def _fill_sorting_fields(format):
         # Determine missing protocol
@@ -5622,7 +5778,7 @@ def _fill_sorting_fields(format):
 
     def calculate_preference(self, format):
         self._fill_sorting_fields(format)
-        return tuple(self._calculate_field_preference(format, field) for field in self._order)
+        return tuple(func(format) for func in self._field_preference_funcs)
 
 
 def filesize_from_tbr(tbr, duration):